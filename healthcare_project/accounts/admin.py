@@ -1,9 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+
+from core.scalable_admin import ScalableAdminMixin
 from .models import CustomUser, PatientProfile, DoctorProfile
 
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(ScalableAdminMixin, UserAdmin):
     model = CustomUser
     list_display = ['email', 'first_name', 'last_name', 'user_type', 'is_staff']
     list_filter = ['user_type', 'is_staff', 'is_active']
@@ -24,6 +26,24 @@ class CustomUserAdmin(UserAdmin):
     ordering = ['email']
 
 
+class PatientProfileAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['user', 'blood_group', 'date_of_birth']
+    list_filter = ['blood_group']
+    list_select_related = ['user']
+    deferred_fields = ['medical_history']
+    search_fields = ['user__email']
+    raw_id_fields = ['user']
+
+
+class DoctorProfileAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    list_display = ['user', 'specialization', 'medical_license', 'years_of_experience', 'consultation_fee']
+    list_filter = ['specialization']
+    list_select_related = ['user']
+    deferred_fields = ['professional_bio']
+    search_fields = ['user__email', '=medical_license']
+    raw_id_fields = ['user']
+
+
 admin.site.register(CustomUser, CustomUserAdmin)
-admin.site.register(PatientProfile)
-admin.site.register(DoctorProfile)
+admin.site.register(PatientProfile, PatientProfileAdmin)
+admin.site.register(DoctorProfile, DoctorProfileAdmin)
@@ -0,0 +1,52 @@
+"""JSON API for the doctor directory (see ``core.api``)."""
+from core.api import ApiError, FieldSet, api_view, detail, media_url, paginate
+from .directory import SORTS, filtered_listings
+from .forms import DoctorDirectoryForm
+from .models import DoctorListing, DoctorProfile
+
+SPECIALIZATION_LABELS = dict(DoctorProfile.SPECIALIZATION_CHOICES)
+
+DOCTOR_FIELDS = FieldSet({
+    'id': 'pk',
+    'name': 'name',
+    'specialization': 'specialization',
+    'specialization_display': 'specialization',
+    'qualification': 'qualification',
+    'years_of_experience': 'years_of_experience',
+    'consultation_fee': 'consultation_fee',
+    'city': 'city',
+    'state': 'state',
+    'pincode': 'pincode',
+    'profile_image': 'profile_image',
+}, convert={
+    'specialization_display': lambda value: SPECIALIZATION_LABELS.get(value, value),
+    'profile_image': media_url,
+}, default=('id', 'name', 'specialization', 'specialization_display', 'qualification', 'years_of_experience',
+            'consultation_fee', 'city', 'state'))
+
+DOCTOR_DETAIL_FIELDS = FieldSet({
+    **DOCTOR_FIELDS.fields,
+    'bio': 'user__doctor_profile__professional_bio',
+}, convert=DOCTOR_FIELDS.convert, default=DOCTOR_FIELDS.default + ('pincode', 'profile_image', 'bio'))
+
+
+class DoctorFilterForm(DoctorDirectoryForm):
+    # Distance search is not keyset-paged; /accounts/doctors.json serves it.
+    near = None
+    radius_km = None
+
+
+@api_view
+def doctor_list_view(request):
+    """Doctors filtered like the directory (specialization, city, state, fee, experience, sort)."""
+    form = DoctorFilterForm(request.GET)
+    if not form.is_valid():
+        field, errors = next(iter(form.errors.get_json_data().items()))
+        raise ApiError(field, errors[0]['message'], errors[0]['code'])
+    field, descending = SORTS.get(form.cleaned_data.get('sort') or 'name', SORTS['name'])
+    return paginate(request, filtered_listings(form.cleaned_data), DOCTOR_FIELDS, field, descending)
+
+
+@api_view
+def doctor_detail_view(request, pk):
+    return detail(request, DoctorListing.objects.filter(pk=pk), DOCTOR_DETAIL_FIELDS)
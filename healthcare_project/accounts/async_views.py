@@ -0,0 +1,47 @@
+"""Async dashboard for ASGI deployments; see ``blog.async_views``."""
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import render, redirect
+
+from core.aio import independent
+from .models import PatientProfile, DoctorProfile
+from .usercache import get_post_counts
+
+
+def _role_profile(user):
+    try:
+        return user.patient_profile if user.user_type == 'patient' else user.doctor_profile
+    except (PatientProfile.DoesNotExist, DoctorProfile.DoesNotExist):
+        return None
+
+
+def _dashboard_context(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    context = {'user': user}
+
+    # The auth backend attaches the role profile, so this only queries when
+    # it is missing.
+    profile = _role_profile(user)
+    if user.user_type == 'patient':
+        context['profile'] = profile or PatientProfile.objects.create(user=user)
+    elif user.user_type == 'doctor':
+        if profile is None:
+            context['profile'] = DoctorProfile.objects.create(user=user)
+            context.update(total_posts=0, published_posts=0)
+        else:
+            context['profile'] = profile
+            context.update(get_post_counts(user))
+    return context
+
+
+async def dashboard_view(request):
+    # One executor hop for every query the page needs, one for rendering.
+    context = await independent(lambda: _dashboard_context(request))
+    if context is None:
+        return redirect_to_login(request.get_full_path())
+    template = {'patient': 'accounts/patient_dashboard.html',
+                'doctor': 'accounts/doctor_dashboard.html'}.get(context['user'].user_type)
+    if template is None:
+        return redirect('accounts:login')
+    return await independent(lambda: render(request, template, context))
@@ -0,0 +1,15 @@
+from django.contrib.auth.backends import ModelBackend
+
+from . import usercache
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose per-request user lookup goes through ``accounts.usercache``.
+
+    Those users come without their password hash; ``CustomUser.get_session_auth_hash()``
+    answers from the value cached beside them.
+    """
+
+    def get_user(self, user_id):
+        user = usercache.get_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,169 @@
+"""Doctor directory: maintenance of ``DoctorListing`` and the directory query.
+
+Filters on specialization, city and state are facets; fee range and minimum
+experience are plain range filters. Facet counts are disjunctive (each facet
+counts doctors matching every *other* selected facet) and all three are
+computed from one ``GROUP BY specialization, state, city`` query, whose row
+count is bounded by the number of distinct combinations, not by doctors.
+That query still scans every listing in the fee/experience range, so its
+rows are cached per range filter under the ``directory`` page-cache
+namespace, which every listing change bumps.
+"""
+from django.db.models import Count
+
+from blog.pagination import KeysetPage, KeysetPaginator
+from core.pagecache import bump_page_version, get_cache, get_page_version
+from .geo import location_fields, locate, locations_for, nearest_listings
+from .models import CustomUser, DoctorProfile, DoctorListing
+
+DOCTORS_PER_PAGE = 20
+
+# sort option -> (field, descending)
+SORTS = {
+    'name': ('name', False),
+    'fee': ('consultation_fee', False),
+    '-fee': ('consultation_fee', True),
+    'experience': ('years_of_experience', True),
+}
+SORT_CHOICES = (
+    ('name', 'Name'),
+    ('fee', 'Fee: low to high'),
+    ('-fee', 'Fee: high to low'),
+    ('experience', 'Most experienced'),
+)
+FACETS = ('specialization', 'state', 'city')
+FACET_CACHE_TIMEOUT = 300
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 200
+
+
+def build_listing(user, profile, location=None):
+    """``location`` is the ``(latitude, longitude)`` of the user's pincode, if known."""
+    return DoctorListing(
+        user_id=user.pk,
+        name=user.get_full_name(),
+        specialization=profile.specialization,
+        qualification=profile.qualification,
+        years_of_experience=profile.years_of_experience,
+        consultation_fee=profile.consultation_fee,
+        city=user.city,
+        state=user.state,
+        city_key=user.city.strip().lower(),
+        state_key=user.state.strip().lower(),
+        pincode=user.pincode,
+        profile_image=user.profile_image.name if user.profile_image else '',
+        **location_fields(location),
+    )
+
+
+def sync_listing(user, profile=None):
+    """Create, update or remove the user's directory row."""
+    if profile is None and user.user_type == 'doctor':
+        profile = DoctorProfile.objects.filter(user_id=user.pk).first()
+    if user.user_type != 'doctor' or not user.is_active or profile is None:
+        DoctorListing.objects.filter(user_id=user.pk).delete()
+    else:
+        # Saving with an explicit pk issues an UPDATE and falls back to INSERT.
+        build_listing(user, profile, locate(user.pincode)).save()
+    bump_page_version('directory')
+
+
+def _create_listings(users):
+    locations = locations_for(user.pincode for user in users)
+    DoctorListing.objects.bulk_create([
+        build_listing(user, user.doctor_profile, locations.get(user.pincode.strip())) for user in users
+    ])
+    return len(users)
+
+
+def rebuild_listings(chunk_size=1000):
+    """Rebuild every listing from scratch; returns the number of rows written."""
+    DoctorListing.objects.all().delete()
+    doctors = (CustomUser.objects.filter(user_type='doctor', is_active=True, doctor_profile__isnull=False)
+               .select_related('doctor_profile').order_by('pk'))
+    batch, total = [], 0
+    for user in doctors.iterator(chunk_size=chunk_size):
+        batch.append(user)
+        if len(batch) >= chunk_size:
+            total += _create_listings(batch)
+            batch = []
+    if batch:
+        total += _create_listings(batch)
+    bump_page_version('directory')
+    return total
+
+
+def _facet_filters(filters):
+    selected = {}
+    if filters.get('specialization'):
+        selected['specialization'] = filters['specialization']
+    if filters.get('state'):
+        selected['state'] = filters['state'].strip().lower()
+    if filters.get('city'):
+        selected['city'] = filters['city'].strip().lower()
+    return selected
+
+
+def _range_filtered(filters):
+    qs = DoctorListing.objects.all()
+    if filters.get('fee_min') is not None:
+        qs = qs.filter(consultation_fee__gte=filters['fee_min'])
+    if filters.get('fee_max') is not None:
+        qs = qs.filter(consultation_fee__lte=filters['fee_max'])
+    if filters.get('min_experience') is not None:
+        qs = qs.filter(years_of_experience__gte=filters['min_experience'])
+    return qs
+
+
+def facet_counts(filters):
+    """``{'specialization': [(value, label, count)], 'state': [...], 'city': [...]}``."""
+    selected = _facet_filters(filters)
+    ranges = tuple(str(filters.get(f)) for f in ('fee_min', 'fee_max', 'min_experience'))
+    key = f"directory:facets:v{get_page_version('directory')}:{':'.join(ranges)}"
+    cache = get_cache()
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(_range_filtered(filters).order_by()
+                    .values_list('specialization', 'state_key', 'city_key').annotate(n=Count('pk')))
+        cache.set(key, rows, FACET_CACHE_TIMEOUT)
+    counts = {facet: {} for facet in FACETS}
+    for specialization, state, city, n in rows:
+        values = {'specialization': specialization, 'state': state, 'city': city}
+        for facet in FACETS:
+            if values[facet] and all(values[other] == selected[other] for other in selected if other != facet):
+                counts[facet][values[facet]] = counts[facet].get(values[facet], 0) + n
+    labels = dict(DoctorProfile.SPECIALIZATION_CHOICES)
+    return {
+        facet: sorted(((value, labels.get(value, value) if facet == 'specialization' else value.title(), n)
+                       for value, n in values.items()), key=lambda item: item[1])
+        for facet, values in counts.items()
+    }
+
+
+def filtered_listings(filters):
+    qs = _range_filtered(filters)
+    selected = _facet_filters(filters)
+    if 'specialization' in selected:
+        qs = qs.filter(specialization=selected['specialization'])
+    if 'state' in selected:
+        qs = qs.filter(state_key=selected['state'])
+    if 'city' in selected:
+        qs = qs.filter(city_key=selected['city'])
+    return qs
+
+
+def search_listings(filters, after=None, before=None, per_page=DOCTORS_PER_PAGE):
+    """Return a ``KeysetPage`` of listings; raises ``InvalidCursor`` for bad cursors."""
+    qs = filtered_listings(filters)
+    field, descending = SORTS.get(filters.get('sort') or 'name', SORTS['name'])
+    return KeysetPaginator(qs, per_page=per_page, field=field, descending=descending).get_page(
+        after=after, before=before)
+
+
+def nearby_listings(filters, origin, k=DOCTORS_PER_PAGE):
+    """Return a ``KeysetPage`` of the ``k`` nearest matching listings, each with ``distance_km`` set."""
+    results = nearest_listings(*origin, k=k, radius_km=filters.get('radius_km') or DEFAULT_RADIUS_KM,
+                               queryset=filtered_listings(filters))
+    for listing, distance in results:
+        listing.distance_km = round(distance, 1)
+    return KeysetPage([listing for listing, _ in results])
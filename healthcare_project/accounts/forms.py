@@ -1,5 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from .directory import SORT_CHOICES, MAX_RADIUS_KM
+from .geo import locate
 from .models import CustomUser, PatientProfile, DoctorProfile
 
 
@@ -62,3 +64,40 @@ class DoctorProfileForm(forms.ModelForm):
             'professional_bio': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
             'qualification': forms.TextInput(attrs={'class': 'form-control'}),
         }
+
+
+class DoctorDirectoryForm(forms.Form):
+    specialization = forms.ChoiceField(
+        required=False, choices=(('', 'Any specialization'),) + DoctorProfile.SPECIALIZATION_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'}))
+    city = forms.CharField(required=False, max_length=100, widget=forms.TextInput(attrs={
+        'class': 'form-control', 'placeholder': 'City'
+    }))
+    state = forms.CharField(required=False, max_length=100, widget=forms.TextInput(attrs={
+        'class': 'form-control', 'placeholder': 'State'
+    }))
+    fee_min = forms.DecimalField(required=False, min_value=0, widget=forms.NumberInput(attrs={
+        'class': 'form-control', 'placeholder': 'Min fee'
+    }))
+    fee_max = forms.DecimalField(required=False, min_value=0, widget=forms.NumberInput(attrs={
+        'class': 'form-control', 'placeholder': 'Max fee'
+    }))
+    min_experience = forms.IntegerField(required=False, min_value=0, widget=forms.NumberInput(attrs={
+        'class': 'form-control', 'placeholder': 'Min years'
+    }))
+    near = forms.CharField(required=False, max_length=10, label='Near pincode', widget=forms.TextInput(attrs={
+        'class': 'form-control', 'placeholder': 'Pincode'
+    }))
+    radius_km = forms.FloatField(required=False, min_value=1, max_value=MAX_RADIUS_KM, label='Within (km)',
+                                 widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '25'}))
+    sort = forms.ChoiceField(required=False, choices=SORT_CHOICES, widget=forms.Select(attrs={
+        'class': 'form-control'
+    }))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('near'):
+            cleaned_data['origin'] = locate(cleaned_data['near'])
+            if cleaned_data['origin'] is None:
+                self.add_error('near', 'Unknown pincode.')
+        return cleaned_data
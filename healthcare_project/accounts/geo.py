@@ -0,0 +1,97 @@
+"""Nearest-doctor lookup over a fixed latitude/longitude grid.
+
+Each ``DoctorListing`` stores the coordinates of its pincode and the grid cell
+they fall in (``CELL_DEGREES`` square, about 11 km). A lookup reads the block
+of cells around the origin through the ``(grid_row, grid_col)`` index,
+widening the block until ``k`` doctors are known to be the nearest or the
+block covers the search radius. Only rows in those cells are read, so the cost
+depends on local density, not on the size of the table.
+"""
+import math
+
+from .models import DoctorListing, Pincode
+
+CELL_DEGREES = 0.1
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+
+def cell_for(latitude, longitude):
+    return math.floor(latitude / CELL_DEGREES), math.floor(longitude / CELL_DEGREES)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def locate(pincode):
+    """``(latitude, longitude)`` of a pincode, or None if it is unknown."""
+    row = Pincode.objects.filter(code=(pincode or '').strip()).values_list('latitude', 'longitude').first()
+    return tuple(row) if row else None
+
+
+def locations_for(pincodes):
+    """``{pincode: (latitude, longitude)}`` for the known pincodes among ``pincodes``."""
+    codes = {p.strip() for p in pincodes if p and p.strip()}
+    return {code: (lat, lon) for code, lat, lon in
+            Pincode.objects.filter(code__in=codes).values_list('code', 'latitude', 'longitude')}
+
+
+def location_fields(location):
+    """``DoctorListing`` keyword arguments for a ``(latitude, longitude)`` pair or None."""
+    if location is None:
+        return {'latitude': None, 'longitude': None, 'grid_row': None, 'grid_col': None}
+    row, col = cell_for(*location)
+    return {'latitude': location[0], 'longitude': location[1], 'grid_row': row, 'grid_col': col}
+
+
+def nearest_listings(latitude, longitude, k=10, radius_km=25, queryset=None):
+    """Return up to ``k`` ``(listing, distance_km)`` pairs within ``radius_km``, nearest first."""
+    queryset = DoctorListing.objects.all() if queryset is None else queryset
+    row, col = cell_for(latitude, longitude)
+    max_rings = max(1, math.ceil(radius_km / (CELL_DEGREES * KM_PER_DEGREE)))
+    rings = 1
+    while True:
+        # Columns narrow away from the equator, so span enough of them that
+        # the block reaches ``covered`` km east and west as well as north and
+        # south. Every point within ``covered`` km is then inside the block.
+        widest = math.radians(min(abs(latitude) + (rings + 1) * CELL_DEGREES, 89))
+        col_rings = math.ceil(rings / math.cos(widest))
+        covered = rings * CELL_DEGREES * KM_PER_DEGREE
+        candidates = queryset.filter(
+            grid_row__range=(row - rings, row + rings), grid_col__range=(col - col_rings, col + col_rings),
+        ).values_list('pk', 'latitude', 'longitude')
+        hits = sorted(
+            (distance, pk) for pk, lat, lon in candidates
+            if (distance := haversine_km(latitude, longitude, lat, lon)) <= radius_km
+        )
+        if covered >= radius_km or sum(1 for distance, _ in hits if distance <= covered) >= k:
+            break
+        rings = min(rings * 2, max_rings)
+    hits = hits[:k]
+    listings = queryset.in_bulk([pk for _, pk in hits])
+    return [(listings[pk], distance) for distance, pk in hits if pk in listings]
+
+
+def refresh_listing_locations(chunk_size=1000):
+    """Recompute coordinates for every listing, e.g. after loading pincodes; returns rows updated."""
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(DoctorListing.objects.filter(pk__gt=last_pk).order_by('pk')
+                     .only('pk', 'pincode', 'latitude', 'longitude', 'grid_row', 'grid_col')[:chunk_size])
+        if not batch:
+            return updated
+        locations = locations_for(listing.pincode for listing in batch)
+        changed = []
+        for listing in batch:
+            fields = location_fields(locations.get(listing.pincode.strip()))
+            if any(getattr(listing, name) != value for name, value in fields.items()):
+                for name, value in fields.items():
+                    setattr(listing, name, value)
+                changed.append(listing)
+        DoctorListing.objects.bulk_update(changed, ['latitude', 'longitude', 'grid_row', 'grid_col'])
+        updated += len(changed)
+        last_pk = batch[-1].pk
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from accounts.directory import rebuild_listings
+
+
+class Command(BaseCommand):
+    help = 'Backfill the DoctorListing directory table from doctors and their profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_listings(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Built {total} doctor listings'))
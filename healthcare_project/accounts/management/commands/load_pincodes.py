@@ -0,0 +1,69 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from accounts.geo import refresh_listing_locations
+from accounts.models import Pincode
+from core.pagecache import bump_page_version
+
+# Accepted header names for each column (the government post-office
+# directory uses the second spelling).
+COLUMNS = {
+    'code': ('pincode', 'pin', 'code'),
+    'latitude': ('latitude', 'lat'),
+    'longitude': ('longitude', 'lon', 'lng'),
+    'district': ('district', 'districtname'),
+    'state': ('state', 'statename'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Load pincode coordinates from a CSV file and update doctor directory locations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--replace', action='store_true', help='Delete existing pincodes first')
+
+    def handle(self, *args, **options):
+        # Post-office files list one row per office; average the offices of
+        # each pincode.
+        sums, skipped = {}, 0
+        with open(options['path'], newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            headers = {name.strip().lower(): name for name in reader.fieldnames or []}
+            columns = {key: next((headers[a] for a in aliases if a in headers), None)
+                       for key, aliases in COLUMNS.items()}
+            missing = [key for key in ('code', 'latitude', 'longitude') if columns[key] is None]
+            if missing:
+                raise CommandError(f"Missing column(s): {', '.join(missing)}")
+            for row in reader:
+                code = (row[columns['code']] or '').strip()
+                try:
+                    lat, lon = float(row[columns['latitude']]), float(row[columns['longitude']])
+                except (TypeError, ValueError):
+                    skipped += 1
+                    continue
+                if not code or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    skipped += 1
+                    continue
+                entry = sums.setdefault(code, [0.0, 0.0, 0, '', ''])
+                entry[0] += lat
+                entry[1] += lon
+                entry[2] += 1
+                for i, key in ((3, 'district'), (4, 'state')):
+                    if columns[key] and not entry[i]:
+                        entry[i] = (row[columns[key]] or '').strip().title()
+
+        pincodes = [Pincode(code=code, latitude=lat / n, longitude=lon / n, district=district, state=state)
+                    for code, (lat, lon, n, district, state) in sums.items()]
+        with transaction.atomic():
+            if options['replace']:
+                Pincode.objects.all().delete()
+            Pincode.objects.bulk_create(
+                pincodes, batch_size=options['batch_size'], update_conflicts=True,
+                unique_fields=['code'], update_fields=['latitude', 'longitude', 'district', 'state'])
+            updated = refresh_listing_locations(chunk_size=options['batch_size'])
+        bump_page_version('directory')
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {len(pincodes)} pincodes ({skipped} rows skipped); updated {updated} doctor locations'))
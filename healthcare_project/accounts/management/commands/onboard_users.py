@@ -0,0 +1,66 @@
+import csv
+import itertools
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts.onboarding import Onboarder, read_records
+
+
+class Command(BaseCommand):
+    help = 'Create doctors and patients in bulk from a CSV or JSONL file (resumable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV with a header row, or one JSON object per line')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: guessed from the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing processes (default: CPUs)')
+        parser.add_argument('--checkpoint', help='Default: <path>.checkpoint.json')
+        parser.add_argument('--errors', help='Error report CSV (default: <path>.errors.csv)')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint.json'
+        errors_path = options['errors'] or f'{path}.errors.csv'
+
+        state = {'path': os.path.abspath(path), 'size': os.path.getsize(path),
+                 'last_record': 0, 'created': 0, 'failed': 0}
+        if not options['restart'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                saved = json.load(f)
+            if (saved.get('path'), saved.get('size')) != (state['path'], state['size']):
+                raise CommandError(f'{checkpoint_path} belongs to a different input; pass --restart to discard it')
+            state = saved
+            self.stdout.write(f"Resuming after record {state['last_record']}")
+
+        records = itertools.dropwhile(lambda item: item[0] <= state['last_record'],
+                                      read_records(path, options['format']))
+        with open(errors_path, 'a' if state['last_record'] else 'w', newline='', encoding='utf-8') as report:
+            writer = csv.writer(report)
+            if not state['last_record']:
+                writer.writerow(['record', 'email', 'errors'])
+
+            def on_error(number, email, errors):
+                writer.writerow([number, email, json.dumps(errors)])
+
+            onboarder = Onboarder(chunk_size=options['chunk_size'], workers=options['workers'], on_error=on_error)
+
+            def on_chunk(last_record):
+                report.flush()
+                state.update(last_record=last_record, created=state['created'] + onboarder.created,
+                             failed=state['failed'] + onboarder.failed)
+                onboarder.created = onboarder.failed = 0
+                tmp = f'{checkpoint_path}.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp, checkpoint_path)
+                self.stdout.write(f"  record {last_record}: {state['created']} created, {state['failed']} failed")
+
+            onboarder.run(records, on_chunk=on_chunk)
+
+        style = self.style.WARNING if state['failed'] else self.style.SUCCESS
+        self.stdout.write(style(f"Onboarded {state['created']} users; {state['failed']} failed "
+                                f"(see {errors_path}). Checkpoint: {checkpoint_path}"))
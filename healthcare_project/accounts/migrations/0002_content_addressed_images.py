@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:00
+
+import core.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_image',
+            field=core.images.ContentAddressedImageField(blank=True, null=True, upload_to='profiles/'),
+        ),
+    ]
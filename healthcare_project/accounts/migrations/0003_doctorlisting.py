@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_listings(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    DoctorListing = apps.get_model('accounts', 'DoctorListing')
+    doctors = (CustomUser.objects.filter(user_type='doctor', is_active=True, doctor_profile__isnull=False)
+               .select_related('doctor_profile'))
+    DoctorListing.objects.bulk_create([
+        DoctorListing(
+            user_id=user.pk, name=f'{user.first_name} {user.last_name}'.strip() or user.email,
+            specialization=user.doctor_profile.specialization, qualification=user.doctor_profile.qualification,
+            years_of_experience=user.doctor_profile.years_of_experience,
+            consultation_fee=user.doctor_profile.consultation_fee,
+            city=user.city, state=user.state, city_key=user.city.strip().lower(),
+            state_key=user.state.strip().lower(), pincode=user.pincode,
+            profile_image=user.profile_image.name if user.profile_image else '',
+        )
+        for user in doctors.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorListing',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('name', models.CharField(max_length=255)),
+                ('specialization', models.CharField(choices=[('cardiology', 'Cardiology'), ('neurology', 'Neurology'), ('orthopedics', 'Orthopedics'), ('pediatrics', 'Pediatrics'), ('general', 'General Practitioner'), ('other', 'Other')], max_length=20)),
+                ('qualification', models.CharField(blank=True, max_length=255)),
+                ('years_of_experience', models.PositiveIntegerField(default=0)),
+                ('consultation_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('state', models.CharField(blank=True, max_length=100)),
+                ('city_key', models.CharField(blank=True, help_text='Lower-cased city for filtering', max_length=100)),
+                ('state_key', models.CharField(blank=True, help_text='Lower-cased state for filtering', max_length=100)),
+                ('pincode', models.CharField(blank=True, max_length=10)),
+                ('profile_image', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['specialization', 'state_key', 'city_key'], name='doctorlisting_facets'), models.Index(fields=['specialization', 'consultation_fee'], name='doctorlisting_spec_fee'), models.Index(fields=['specialization', 'years_of_experience'], name='doctorlisting_spec_exp'), models.Index(fields=['city_key', 'specialization', 'consultation_fee'], name='doctorlisting_city_spec_fee'), models.Index(fields=['state_key', 'specialization', 'consultation_fee'], name='doctorlisting_state_spec_fee'), models.Index(fields=['consultation_fee'], name='doctorlisting_fee'), models.Index(fields=['years_of_experience'], name='doctorlisting_exp'), models.Index(fields=['name'], name='doctorlisting_name')],
+            },
+        ),
+        migrations.RunPython(backfill_listings, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from core.images import ContentAddressedImageField
 from .managers import CustomUserManager
 
 
@@ -15,7 +16,7 @@ class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES)
     phone = models.CharField(max_length=15, blank=True)
-    profile_image = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    profile_image = ContentAddressedImageField(upload_to='profiles/', blank=True, null=True)
     address_line = models.CharField(max_length=255, blank=True)
     city = models.CharField(max_length=100, blank=True)
     state = models.CharField(max_length=100, blank=True)
@@ -26,12 +27,26 @@ class CustomUser(AbstractUser):
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset order for incremental exports (core/exports.py).
+            models.Index(fields=['date_joined', 'id'], name='customuser_joined'),
+        ]
+
     def __str__(self):
         return self.email
 
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip() or self.email
 
+    def get_session_auth_hash(self):
+        # Users from accounts.usercache leave the password deferred and carry
+        # the hash computed when they were cached; set_password() loads the
+        # field again, so a changed password is always hashed afresh.
+        if 'password' not in self.__dict__ and hasattr(self, '_session_auth_hash'):
+            return self._session_auth_hash
+        return super().get_session_auth_hash()
+
 
 class PatientProfile(models.Model):
     """Patient-specific information"""
@@ -76,3 +91,62 @@ class DoctorProfile(models.Model):
 
     def __str__(self):
         return f"Dr. {self.user.get_full_name()} - {self.get_specialization_display()}"
+
+
+class Pincode(models.Model):
+    """Reference coordinates for a postal code, loaded by ``manage.py load_pincodes``."""
+
+    code = models.CharField(max_length=10, primary_key=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    district = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        return self.code
+
+
+class DoctorListing(models.Model):
+    """Denormalized doctor directory row.
+
+    Joins the doctor's user and profile columns into one table so directory
+    filters, sorts and facet counts hit composite indexes on a single table.
+    Kept in sync by ``accounts.signals``; only active doctors have a row.
+    """
+
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='listing')
+    name = models.CharField(max_length=255)
+    specialization = models.CharField(max_length=20, choices=DoctorProfile.SPECIALIZATION_CHOICES)
+    qualification = models.CharField(max_length=255, blank=True)
+    years_of_experience = models.PositiveIntegerField(default=0)
+    consultation_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    city = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=100, blank=True)
+    city_key = models.CharField(max_length=100, blank=True, help_text='Lower-cased city for filtering')
+    state_key = models.CharField(max_length=100, blank=True, help_text='Lower-cased state for filtering')
+    pincode = models.CharField(max_length=10, blank=True)
+    profile_image = models.CharField(max_length=255, blank=True)
+    # Coordinates of the pincode and its cell in the grid of accounts.geo;
+    # null when the pincode is not in the Pincode table.
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    grid_row = models.IntegerField(null=True, blank=True)
+    grid_col = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['specialization', 'state_key', 'city_key'], name='doctorlisting_facets'),
+            models.Index(fields=['specialization', 'consultation_fee'], name='doctorlisting_spec_fee'),
+            models.Index(fields=['specialization', 'years_of_experience'], name='doctorlisting_spec_exp'),
+            models.Index(fields=['city_key', 'specialization', 'consultation_fee'], name='doctorlisting_city_spec_fee'),
+            models.Index(fields=['state_key', 'specialization', 'consultation_fee'],
+                         name='doctorlisting_state_spec_fee'),
+            models.Index(fields=['consultation_fee'], name='doctorlisting_fee'),
+            models.Index(fields=['years_of_experience'], name='doctorlisting_exp'),
+            models.Index(fields=['name'], name='doctorlisting_name'),
+            models.Index(fields=['grid_row', 'grid_col'], name='doctorlisting_grid'),
+        ]
+
+    def __str__(self):
+        return f"Dr. {self.name}"
@@ -0,0 +1,209 @@
+"""Bulk onboarding of doctors and patients from CSV or JSONL files.
+
+Records are streamed and handled ``chunk_size`` at a time, so memory use does
+not grow with the input. Each record is validated with the same rules as
+``SignUpForm`` and the patient/doctor profile forms. Uniqueness of emails and
+medical licences is checked once per chunk instead of once per row. Passwords
+are hashed in a process pool, and each chunk's users and profiles are
+inserted with ``bulk_create`` in one transaction.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from core.pagecache import bump_page_version
+from .directory import build_listing
+from .geo import locations_for
+from .forms import SignUpForm, PatientProfileForm, DoctorProfileForm
+from .models import CustomUser, PatientProfile, DoctorProfile, DoctorListing
+
+USER_FIELDS = ('email', 'first_name', 'last_name', 'user_type', 'phone', 'address_line', 'city', 'state',
+               'pincode')
+
+
+class OnboardingSignUpForm(SignUpForm):
+    class Meta(SignUpForm.Meta):
+        fields = SignUpForm.Meta.fields + ('phone', 'address_line', 'city', 'state', 'pincode')
+
+    def validate_unique(self):
+        # Emails are checked per chunk by Onboarder.
+        pass
+
+
+class OnboardingPatientForm(PatientProfileForm):
+    pass
+
+
+class OnboardingDoctorForm(DoctorProfileForm):
+    def validate_unique(self):
+        # Licences are checked per chunk by Onboarder.
+        pass
+
+
+PROFILE_FORMS = {'patient': OnboardingPatientForm, 'doctor': OnboardingDoctorForm}
+PROFILE_MODELS = {'patient': PatientProfile, 'doctor': DoctorProfile}
+
+
+def read_records(path, fmt=None):
+    """Yield ``(number, record)`` pairs; a malformed JSONL line yields its error message as the record."""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            for number, row in enumerate(csv.DictReader(f), start=1):
+                yield number, {k.strip(): (v or '').strip() for k, v in row.items() if k}
+        else:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield number, f'Invalid JSON: {e}'
+                    continue
+                if not isinstance(record, dict):
+                    yield number, 'Invalid JSON: expected an object'
+                    continue
+                yield number, {k: '' if v is None else str(v) for k, v in record.items()}
+
+
+def _with_model_defaults(form_class, data):
+    # The web forms render model defaults as initial values; a file simply
+    # omits those columns.
+    data = dict(data)
+    for field in form_class._meta.model._meta.concrete_fields:
+        if field.name in form_class.base_fields and not data.get(field.name) and field.has_default():
+            data[field.name] = field.get_default()
+    return data
+
+
+def validate_record(record):
+    """Return ``(user_fields, profile_fields, password, errors)`` for one record."""
+    if isinstance(record, str):
+        return None, None, None, {'__all__': [record]}
+    data = dict(record, password1=record.get('password', ''), password2=record.get('password', ''))
+    user_form = OnboardingSignUpForm(data)
+    errors = {}
+    if not user_form.is_valid():
+        errors.update(user_form.errors.get_json_data())
+    profile_form = PROFILE_FORMS.get(data.get('user_type'))
+    profile_fields = None
+    if profile_form is not None:
+        profile_form = profile_form(_with_model_defaults(profile_form, data))
+        if profile_form.is_valid():
+            profile_fields = profile_form.cleaned_data
+        else:
+            errors.update(profile_form.errors.get_json_data())
+    if errors:
+        return None, None, None, {field: [e['message'] for e in errs] for field, errs in errors.items()}
+    user_fields = {f: user_form.cleaned_data.get(f, '') for f in USER_FIELDS}
+    user_fields['email'] = CustomUser.objects.normalize_email(user_fields['email'])
+    return user_fields, profile_fields, user_form.cleaned_data['password1'], None
+
+
+def _init_worker():
+    # Spawned (non-forked) workers start without the app registry.
+    django.setup()
+
+
+class Onboarder:
+    def __init__(self, chunk_size=500, workers=None, on_error=None):
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.on_error = on_error or (lambda number, email, errors: None)
+        self.created = 0
+        self.failed = 0
+
+    def run(self, records, on_chunk=None):
+        """Onboard ``(number, record)`` pairs; ``on_chunk(last_number)`` runs after each commit."""
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            chunk = []
+            for number, record in records:
+                chunk.append((number, record))
+                if len(chunk) >= self.chunk_size:
+                    self._process(chunk, pool)
+                    if on_chunk:
+                        on_chunk(chunk[-1][0])
+                    chunk = []
+            if chunk:
+                self._process(chunk, pool)
+                if on_chunk:
+                    on_chunk(chunk[-1][0])
+
+    def _fail(self, number, email, errors):
+        self.failed += 1
+        self.on_error(number, email, errors)
+
+    def _process(self, chunk, pool):
+        valid = []
+        for number, record in chunk:
+            user_fields, profile_fields, password, errors = validate_record(record)
+            if errors:
+                self._fail(number, record.get('email', '') if isinstance(record, dict) else '', errors)
+            else:
+                valid.append((number, user_fields, profile_fields, password))
+        valid = self._drop_duplicates(valid)
+
+        hashes = pool.map(make_password, [password for *_, password in valid],
+                          chunksize=max(1, len(valid) // (self.workers * 4)))
+        rows = [(number, user_fields, profile_fields, password_hash)
+                for (number, user_fields, profile_fields, _), password_hash in zip(valid, hashes)]
+        try:
+            with transaction.atomic():
+                self._insert(rows)
+            self.created += len(rows)
+        except IntegrityError:
+            # Something else took an email or licence since the chunk was
+            # checked; fall back to one transaction per row.
+            for row in rows:
+                try:
+                    with transaction.atomic():
+                        self._insert([row])
+                    self.created += 1
+                except IntegrityError as e:
+                    self._fail(row[0], row[1]['email'], {'__all__': [str(e)]})
+
+    def _drop_duplicates(self, valid):
+        emails = [user_fields['email'] for _, user_fields, _, _ in valid]
+        licenses = [profile_fields['medical_license'] for _, user_fields, profile_fields, _ in valid
+                    if user_fields['user_type'] == 'doctor']
+        taken_emails = set(CustomUser.objects.filter(email__in=emails).values_list('email', flat=True))
+        taken_licenses = set(DoctorProfile.objects.filter(medical_license__in=licenses)
+                             .values_list('medical_license', flat=True))
+        kept = []
+        for row in valid:
+            number, user_fields, profile_fields, _ = row
+            license = profile_fields.get('medical_license') if user_fields['user_type'] == 'doctor' else None
+            if user_fields['email'] in taken_emails:
+                self._fail(number, user_fields['email'], {'email': ['Custom user with this Email already exists.']})
+            elif license in taken_licenses:
+                self._fail(number, user_fields['email'],
+                           {'medical_license': ['Doctor profile with this Medical license already exists.']})
+            else:
+                taken_emails.add(user_fields['email'])
+                if license:
+                    taken_licenses.add(license)
+                kept.append(row)
+        return kept
+
+    def _insert(self, rows):
+        users = [CustomUser(password=password_hash, **user_fields) for _, user_fields, _, password_hash in rows]
+        CustomUser.objects.bulk_create(users)
+        # MySQL does not return primary keys from bulk inserts, so read them back.
+        ids = dict(CustomUser.objects.filter(email__in=[u.email for u in users]).values_list('email', 'id'))
+        profiles = {'patient': [], 'doctor': []}
+        for user, (_, user_fields, profile_fields, _) in zip(users, rows):
+            user.pk = ids[user.email]
+            profiles[user_fields['user_type']].append((user, PROFILE_MODELS[user_fields['user_type']](
+                user_id=user.pk, **profile_fields)))
+        for user_type, model in PROFILE_MODELS.items():
+            model.objects.bulk_create([profile for _, profile in profiles[user_type]])
+        # bulk_create sends no signals, so add the directory rows here.
+        locations = locations_for(user.pincode for user, _ in profiles['doctor'])
+        DoctorListing.objects.bulk_create([build_listing(user, profile, locations.get(user.pincode.strip()))
+                                           for user, profile in profiles['doctor']])
+        bump_page_version('directory')
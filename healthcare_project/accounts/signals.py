@@ -0,0 +1,53 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.images import schedule_derivatives
+from .directory import sync_listing
+from .models import CustomUser, PatientProfile, DoctorProfile, DoctorListing
+from .usercache import invalidate_user
+
+LISTING_USER_FIELDS = {'first_name', 'last_name', 'email', 'city', 'state', 'pincode', 'profile_image',
+                       'is_active', 'user_type'}
+
+
+@receiver(post_save, sender=CustomUser)
+def generate_profile_image_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'profile_image' not in update_fields):
+        return
+    schedule_derivatives(instance.profile_image)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def evict_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=PatientProfile)
+@receiver(post_delete, sender=PatientProfile)
+@receiver(post_save, sender=DoctorProfile)
+@receiver(post_delete, sender=DoctorProfile)
+def evict_cached_profile_user(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def update_doctor_listing(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    # New doctors get their row when the profile is created.
+    if raw or created or instance.user_type != 'doctor':
+        return
+    if update_fields is not None and not LISTING_USER_FIELDS.intersection(update_fields):
+        return
+    sync_listing(instance)
+
+
+@receiver(post_save, sender=DoctorProfile)
+def update_doctor_listing_from_profile(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync_listing(instance.user, instance)
+
+
+@receiver(post_delete, sender=DoctorProfile)
+def remove_doctor_listing(sender, instance, **kwargs):
+    DoctorListing.objects.filter(user_id=instance.user_id).delete()
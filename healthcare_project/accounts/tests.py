@@ -0,0 +1,142 @@
+import pickle
+
+from django.test import TestCase
+from django.urls import reverse
+
+from . import usercache
+from .models import CustomUser, DoctorProfile, PatientProfile
+
+
+class DoctorApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = []
+        for i, (specialization, fee) in enumerate([('cardiology', 900), ('cardiology', 500),
+                                                   ('neurology', 700), ('cardiology', 1200)]):
+            user = CustomUser.objects.create_user(
+                f'doctor{i}@example.com', 'pass-12345', user_type='doctor',
+                first_name='Doctor', last_name=chr(ord('A') + i), city='Pune', state='Maharashtra')
+            DoctorProfile.objects.create(user=user, specialization=specialization, medical_license=f'LIC-{i}',
+                                         consultation_fee=fee, years_of_experience=i * 5,
+                                         professional_bio=f'Bio {i}')
+            cls.doctors.append(user)
+        CustomUser.objects.create_user('patient@example.com', 'pass-12345', user_type='patient')
+
+    def test_doctor_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:doctor_list'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([doctor['name'] for doctor in data['results']],
+                         ['Doctor A', 'Doctor B', 'Doctor C', 'Doctor D'])
+        self.assertEqual(data['results'][0]['specialization_display'], 'Cardiology')
+        self.assertNotIn('profile_image', data['results'][0])
+
+    def test_doctor_list_filters(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:doctor_list'),
+                                       {'specialization': 'cardiology', 'sort': 'fee', 'fields': 'name'})
+        self.assertEqual(response.json()['results'], [{'name': 'Doctor B'}, {'name': 'Doctor A'},
+                                                      {'name': 'Doctor D'}])
+
+    def test_doctor_list_invalid_filter(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('api:doctor_list'), {'specialization': 'astrology'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('specialization', response.json()['errors'])
+
+    def test_doctor_list_cursor_paging(self):
+        url = reverse('api:doctor_list')
+        query = {'sort': '-fee', 'fields': 'name,consultation_fee', 'limit': 3}
+        with self.assertNumQueries(1):
+            first = self.client.get(url, query).json()
+        self.assertEqual([doctor['name'] for doctor in first['results']], ['Doctor D', 'Doctor A', 'Doctor C'])
+        with self.assertNumQueries(1):
+            second = self.client.get(url + first['next']).json()
+        self.assertEqual([doctor['name'] for doctor in second['results']], ['Doctor B'])
+        self.assertIsNone(second['next'])
+        with self.assertNumQueries(1):
+            back = self.client.get(url + second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_doctor_list_not_modified(self):
+        url = reverse('api:doctor_list')
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_doctor_detail(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:doctor_detail', args=[self.doctors[2].pk]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['name'], 'Doctor C')
+        self.assertEqual(data['specialization'], 'neurology')
+        self.assertEqual(data['bio'], 'Bio 2')
+
+    def test_doctor_detail_fields(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:doctor_detail', args=[self.doctors[0].pk]),
+                                       {'fields': 'name,bio'})
+        self.assertEqual(response.json(), {'name': 'Doctor A', 'bio': 'Bio 0'})
+
+    def test_doctor_detail_not_modified(self):
+        url = reverse('api:doctor_detail', args=[self.doctors[0].pk])
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_doctor_detail_not_found(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:doctor_detail', args=[self.doctors[-1].pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+
+class UserCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('patient@example.com', 'pass-12345', user_type='patient',
+                                                  first_name='Meera')
+        PatientProfile.objects.create(user=cls.user)
+
+    def setUp(self):
+        usercache.get_cache().clear()
+        self.client.login(email='patient@example.com', password='pass-12345')
+
+    def test_cached_entry_has_no_password_hash(self):
+        self.assertEqual(self.client.get(reverse('accounts:dashboard')).status_code, 200)
+        entry = usercache.get_cache().get(f'authuser:{self.user.pk}')
+        self.assertIsNotNone(entry)
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(entry))
+        self.assertEqual(entry[0].get_deferred_fields(), {'password'})
+
+    def test_cached_user_keeps_session(self):
+        self.client.get(reverse('accounts:dashboard'))
+        with self.assertNumQueries(1):  # the session; the user comes from the cache
+            response = self.client.get(reverse('accounts:dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(reverse('accounts:dashboard'))
+        self.user.set_password('new-pass-12345')
+        self.user.save()
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertRedirects(response, f"{reverse('accounts:login')}?next={reverse('accounts:dashboard')}",
+                             fetch_redirect_response=False)
+
+    def test_saving_cached_user_keeps_password(self):
+        self.client.get(reverse('accounts:dashboard'))
+        response = self.client.post(reverse('accounts:profile_update'), {'first_name': 'Mira', 'blood_group': 'O+'})
+        self.assertEqual(response.status_code, 302)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Mira')
+        self.assertTrue(self.user.check_password('pass-12345'))
+
+    def test_set_password_rehashes_cached_user(self):
+        self.client.get(reverse('accounts:dashboard'))
+        user = usercache.get_user(self.user.pk)
+        old_hash = user.get_session_auth_hash()
+        user.set_password('new-pass-12345')
+        self.assertNotEqual(user.get_session_auth_hash(), old_hash)
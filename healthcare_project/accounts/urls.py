@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
 
 app_name = 'accounts'
 
@@ -7,6 +8,9 @@ urlpatterns = [
     path('signup/', views.signup_view, name='signup'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
-    path('dashboard/', views.dashboard_view, name='dashboard'),
+    path('dashboard/', async_views.dashboard_view if settings.ASYNC_VIEWS else views.dashboard_view,
+         name='dashboard'),
+    path('doctors/', views.doctor_directory_view, name='doctor_directory'),
+    path('doctors.json', views.doctor_directory_api_view, name='doctor_directory_api'),
     path('profile/update/', views.profile_update_view, name='profile_update'),
 ]
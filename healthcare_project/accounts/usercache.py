@@ -0,0 +1,87 @@
+"""Cross-request cache of the logged-in user, their role profile and post counts.
+
+``CachedModelBackend.get_user()`` (called by ``AuthenticationMiddleware``)
+reads the user from ``USER_CACHE_ALIAS`` with the patient or doctor profile
+already attached, so ``user.patient_profile`` / ``user.doctor_profile`` cost
+no query. Within a request the middleware's lazy ``request.user`` keeps the
+same instance.
+
+The password hash is never cached. The entry holds the user with
+``password`` deferred (reading it costs a query, and ``save()`` leaves the
+column alone) next to the session auth hash, an HMAC of the password that
+Django's per-request session check compares against; a password change
+saves the user, which evicts the entry before the next request.
+
+Entries are evicted after commit whenever the user or a profile is saved or
+deleted (see ``accounts.signals``). The cache must be shared by all worker
+processes for that eviction to be seen everywhere; with a per-process
+cache, ``USER_CACHE_TIMEOUT`` bounds staleness.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from blog.counters import author_totals
+from .models import CustomUser
+
+
+def get_cache():
+    return caches[getattr(settings, 'USER_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+
+
+def _user_key(user_id):
+    return f'authuser:{user_id}'
+
+
+def _counts_key(user_id):
+    return f'authuser:{user_id}:post_counts'
+
+
+def load_user(user_id):
+    """``(user, session_auth_hash)``, with the password unloaded from ``user``, or None."""
+    user = (CustomUser.objects.select_related('patient_profile', 'doctor_profile')
+            .filter(pk=user_id).first())
+    if user is None:
+        return None
+    session_auth_hash = user.get_session_auth_hash()
+    del user.password  # deferred from here on
+    return user, session_auth_hash
+
+
+def get_user(user_id):
+    cache = get_cache()
+    entry = cache.get(_user_key(user_id))
+    if entry is None:
+        entry = load_user(user_id)
+        if entry is None:
+            return None
+        cache.set(_user_key(user_id), entry, _timeout())
+    user, session_auth_hash = entry
+    user._session_auth_hash = session_auth_hash
+    return user
+
+
+def get_post_counts(user):
+    """``{'total_posts': n, 'published_posts': m}`` for a doctor's dashboard."""
+    cache = get_cache()
+    counts = cache.get(_counts_key(user.pk))
+    if counts is None:
+        counts = author_totals(user.pk)
+        cache.set(_counts_key(user.pk), counts, _timeout())
+    return counts
+
+
+def invalidate_user(user_id):
+    # Deleting again after commit stops a concurrent request from re-caching
+    # the pre-commit row.
+    get_cache().delete(_user_key(user_id))
+    transaction.on_commit(lambda: get_cache().delete(_user_key(user_id)))
+
+
+def invalidate_post_counts(user_id):
+    get_cache().delete(_counts_key(user_id))
+    transaction.on_commit(lambda: get_cache().delete(_counts_key(user_id)))
@@ -3,12 +3,29 @@ from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
+from django.http import Http404, JsonResponse
+from blog.pagination import InvalidCursor
+from core.throttling import get_throttle
 from .models import CustomUser, PatientProfile, DoctorProfile
-from .forms import SignUpForm, LoginForm, PatientProfileForm, DoctorProfileForm
+from .usercache import get_post_counts
+from .directory import facet_counts, nearby_listings, search_listings
+from .forms import SignUpForm, LoginForm, PatientProfileForm, DoctorProfileForm, DoctorDirectoryForm
+
+
+def _throttled(request, decision, template, form):
+    minutes = max(1, decision.retry_after // 60)
+    messages.error(request, f'Too many attempts. Please try again in {minutes} minute(s).')
+    response = render(request, template, {'form': form}, status=429)
+    response['Retry-After'] = str(decision.retry_after)
+    return response
 
 
 def signup_view(request):
     if request.method == 'POST':
+        # Checked before the form runs: saving it hashes the password.
+        decision = get_throttle('signup').check(request)
+        if not decision.allowed:
+            return _throttled(request, decision, 'accounts/signup.html', SignUpForm())
         form = SignUpForm(request.POST)
         if form.is_valid():
             try:
@@ -33,12 +50,18 @@ def login_view(request):
         return redirect('accounts:dashboard')
 
     if request.method == 'POST':
+        throttle = get_throttle('login')
+        decision = throttle.check(request, request.POST.get('email'))
+        if not decision.allowed:
+            return _throttled(request, decision, 'accounts/login.html',
+                              LoginForm(initial={'email': request.POST.get('email', '')}))
         form = LoginForm(request.POST)
         if form.is_valid():
             email = form.cleaned_data['email']
             password = form.cleaned_data['password']
             user = authenticate(request, username=email, password=password)
             if user:
+                throttle.reset(request, email)
                 login(request, user)
                 messages.success(request, 'Logged in successfully!')
                 return redirect('accounts:dashboard')
@@ -72,8 +95,7 @@ def dashboard_view(request):
     elif user.user_type == 'doctor':
         try:
             context['profile'] = user.doctor_profile
-            context['total_posts'] = user.blog_posts.count()
-            context['published_posts'] = user.blog_posts.filter(status='published').count()
+            context.update(get_post_counts(user))
         except DoctorProfile.DoesNotExist:
             DoctorProfile.objects.create(user=user)
             context['profile'] = user.doctor_profile
@@ -117,3 +139,83 @@ def profile_update_view(request):
         form = FormClass(instance=profile)
 
     return render(request, template, {'form': form, 'user': user})
+
+
+def _directory_filters(request):
+    form = DoctorDirectoryForm(request.GET)
+    form.is_valid()
+    # Invalid fields are dropped from cleaned_data and simply not applied.
+    return form, form.cleaned_data
+
+
+def _directory_page(request, filters):
+    # Raises InvalidCursor for a malformed cursor.
+    if filters.get('origin'):
+        return nearby_listings(filters, filters['origin'])
+    return search_listings(filters, after=request.GET.get('after'), before=request.GET.get('before'))
+
+
+def _page_url(request, **cursor):
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params.update(cursor)
+    return '?' + params.urlencode()
+
+
+def _facet_url(request, facet, value):
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params[facet] = value
+    return '?' + params.urlencode()
+
+
+def doctor_directory_view(request):
+    form, filters = _directory_filters(request)
+    try:
+        page = _directory_page(request, filters)
+    except InvalidCursor:
+        raise Http404('Invalid page cursor.')
+    if page.has_next():
+        page.next_url = _page_url(request, after=page.next_cursor)
+    if page.has_previous():
+        page.previous_url = _page_url(request, before=page.previous_cursor)
+    facets = {
+        facet: [(label, n, _facet_url(request, facet, value)) for value, label, n in values]
+        for facet, values in facet_counts(filters).items()
+    }
+    return render(request, 'accounts/doctor_directory.html', {
+        'form': form, 'doctors': page, 'page': page, 'facets': facets,
+    })
+
+
+def doctor_directory_api_view(request):
+    form, filters = _directory_filters(request)
+    if form.errors:
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+    try:
+        page = _directory_page(request, filters)
+    except InvalidCursor as e:
+        return JsonResponse({'errors': {'cursor': [{'message': str(e)}]}}, status=400)
+    return JsonResponse({
+        'results': [{
+            'id': doctor.user_id,
+            'name': doctor.name,
+            'specialization': doctor.specialization,
+            'specialization_display': doctor.get_specialization_display(),
+            'qualification': doctor.qualification,
+            'years_of_experience': doctor.years_of_experience,
+            'consultation_fee': str(doctor.consultation_fee),
+            'city': doctor.city,
+            'state': doctor.state,
+            'pincode': doctor.pincode,
+            'distance_km': getattr(doctor, 'distance_km', None),
+        } for doctor in page],
+        'next': _page_url(request, after=page.next_cursor) if page.has_next() else None,
+        'previous': _page_url(request, before=page.previous_cursor) if page.has_previous() else None,
+        'facets': {
+            facet: [{'value': value, 'label': label, 'count': n} for value, label, n in values]
+            for facet, values in facet_counts(filters).items()
+        },
+    })
@@ -1,5 +1,8 @@
 from django.contrib import admin
+
+from core.scalable_admin import ScalableAdminMixin
 from .models import BlogCategory, BlogPost
+from .search import contains_terms, search_post_ids, tokenize
 
 
 @admin.register(BlogCategory)
@@ -9,8 +12,25 @@ class BlogCategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(BlogPost)
-class BlogPostAdmin(admin.ModelAdmin):
+class BlogPostAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'author', 'category', 'status', 'created_at']
     list_filter = ['status', 'category', 'created_at']
+    list_select_related = ['author', 'category']
+    deferred_fields = ['content']
+    # Title, summary and content through the site's full-text index; the
+    # fields listed here only switch the admin search box on.
+    search_mode = 'fulltext'
     search_fields = ['title', 'summary', 'content']
+    fulltext_limit = 1000
+    # The primary key follows creation order and needs no sort.
+    ordering = ['-pk']
     prepopulated_fields = {'slug': ('title',)}
+
+    def fulltext_search_ids(self, search_term):
+        terms = tokenize(search_term)
+        if not terms:
+            return []
+        ids = search_post_ids(search_term, limit=self.fulltext_limit)
+        # The index only holds published posts; drafts are few enough to scan.
+        drafts = contains_terms(BlogPost.objects.exclude(status='published'), terms)
+        return ids + list(drafts.values_list('pk', flat=True)[:self.fulltext_limit])
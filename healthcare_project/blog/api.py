@@ -0,0 +1,67 @@
+"""JSON API for published posts and categories (see ``core.api``)."""
+from core.api import FieldSet, api_view, detail, media_url, paginate
+from .models import BlogCategory, BlogPost, PostCard
+from .popularity import count_post_views
+
+# Lists read the denormalized PostCard table only.
+POST_LIST_FIELDS = FieldSet({
+    'id': 'pk',
+    'title': 'title',
+    'slug': 'slug',
+    'summary': 'summary_preview',
+    'author': 'author_name',
+    'author_id': 'author_id',
+    'category': 'category_slug',
+    'category_name': 'category_name',
+    'thumbnail_url': 'thumbnail_url',
+    'created_at': 'created_at',
+}, default=('id', 'title', 'slug', 'summary', 'author', 'category', 'created_at'))
+
+# Related columns are joined only when their field is requested.
+POST_DETAIL_FIELDS = FieldSet({
+    'id': 'pk',
+    'title': 'title',
+    'slug': 'slug',
+    'summary': 'summary',
+    'content': 'content',
+    'author': 'card__author_name',
+    'author_id': 'author_id',
+    'category': 'category__slug',
+    'category_name': 'category__name',
+    'featured_image': 'featured_image',
+    'views': 'stats__views',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}, convert={
+    'featured_image': media_url,
+    'views': lambda views: views or 0,
+}, default=('id', 'title', 'slug', 'summary', 'content', 'author', 'category', 'featured_image',
+            'created_at', 'updated_at'))
+
+CATEGORY_FIELDS = FieldSet({
+    'id': 'pk',
+    'name': 'name',
+    'slug': 'slug',
+    'description': 'description',
+})
+
+
+@api_view
+def post_list_view(request):
+    """Published posts, newest first; ``?category=<slug>`` narrows to one category."""
+    posts = PostCard.objects.filter(status='published')
+    category_slug = request.GET.get('category')
+    if category_slug:
+        posts = posts.filter(category__in=BlogCategory.objects.filter(slug=category_slug).values('pk'))
+    return paginate(request, posts, POST_LIST_FIELDS, 'created_at')
+
+
+@count_post_views
+@api_view
+def post_detail_view(request, slug):
+    return detail(request, BlogPost.objects.filter(slug=slug, status='published'), POST_DETAIL_FIELDS)
+
+
+@api_view
+def category_list_view(request):
+    return paginate(request, BlogCategory.objects.all(), CATEGORY_FIELDS, 'name', descending=False)
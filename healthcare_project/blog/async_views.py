@@ -0,0 +1,96 @@
+"""Async read views for ASGI deployments.
+
+These mirror ``blog.views.blog_list_view`` and ``blog_detail_view`` and are
+wired up by ``blog.urls`` when ``settings.ASYNC_VIEWS`` is on (the default
+under ``asgi.py``). WSGI deployments keep using the sync views. Queries and
+rendering go through ``core.aio`` so they reuse pooled connections.
+"""
+from django.db.models import Count, Max
+from django.http import Http404
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.aio import gather_independent, independent
+from core.pagecache import cache_anonymous_page, get_page_version
+from .models import BlogPost, BlogCategory
+from .pagination import KeysetPaginator, InvalidCursor
+from .popularity import count_post_views, popular_posts
+from .views import POSTS_PER_PAGE, _viewer_key, link_list_page, list_cards
+
+
+def _not_modified(request, etag, last_modified):
+    # Same validators as the condition() decorators on the sync views.
+    return get_conditional_response(
+        request, etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None)
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = quote_etag(etag)
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+@cache_anonymous_page('blog', query_params=('category', 'after', 'before'))
+async def blog_list_view(request):
+    category_slug = request.GET.get('category')
+    posts = BlogPost.objects.filter(status='published')
+    if category_slug:
+        posts = posts.filter(category__slug=category_slug)
+
+    # One aggregate plus lookups the page cache has usually just warmed: not
+    # worth three hops.
+    stats, version, viewer = await independent(lambda: (
+        posts.aggregate(count=Count('id'), last_modified=Max('updated_at')),
+        get_page_version('blog'),
+        _viewer_key(request),
+    ))
+    stamp = stats['last_modified'].timestamp() if stats['last_modified'] else 0
+    etag = f"list-{viewer}-{stats['count']}-{stamp}-v{version}"
+    not_modified = _not_modified(request, etag, stats['last_modified'])
+    if not_modified is not None:
+        return not_modified
+
+    def categories_and_page():
+        # The page query needs the category's id, as in the sync view.
+        categories = list(BlogCategory.objects.all())
+        paginator = KeysetPaginator(list_cards(categories, category_slug), per_page=POSTS_PER_PAGE)
+        return categories, paginator.get_page(after=request.GET.get('after'), before=request.GET.get('before'))
+
+    try:
+        (categories, page), popular = await gather_independent(
+            categories_and_page,
+            lambda: popular_posts(category_slug),
+        )
+    except InvalidCursor:
+        raise Http404('Invalid page cursor.')
+    link_list_page(page, categories, category_slug)
+    response = await independent(lambda: render(request, 'blog/blog_list.html', {
+        'posts': page, 'page': page, 'categories': categories, 'selected_category': category_slug,
+        'trending': popular['trending'], 'most_read': popular['most_read'],
+    }))
+    return _set_validators(response, etag, stats['last_modified'])
+
+
+@count_post_views
+@cache_anonymous_page('blog', query_params=())
+async def blog_detail_view(request, slug):
+    try:
+        post, version, viewer = await independent(lambda: (
+            BlogPost.objects.select_related('author', 'category', 'author__doctor_profile')
+            .get(slug=slug, status='published'),
+            get_page_version('blog'),
+            _viewer_key(request),
+        ))
+    except BlogPost.DoesNotExist:
+        raise Http404('No BlogPost matches the given query.')
+
+    etag = f"post-{viewer}-{post.updated_at.timestamp()}-v{version}"
+    not_modified = _not_modified(request, etag, post.updated_at)
+    if not_modified is not None:
+        return not_modified
+
+    response = await independent(lambda: render(request, 'blog/blog_detail.html', {'post': post}))
+    return _set_validators(response, etag, post.updated_at)
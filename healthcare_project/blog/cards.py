@@ -0,0 +1,77 @@
+"""Maintenance of the ``PostCard`` listing read model."""
+from core.images import variant_url
+from .models import BlogPost, PostCard
+
+CARD_SOURCE_FIELDS = (
+    'id', 'title', 'slug', 'summary', 'status', 'featured_image', 'created_at',
+    'author_id', 'author__email', 'author__first_name', 'author__last_name',
+    'category_id', 'category__name', 'category__slug',
+)
+CARD_UPDATE_FIELDS = [f.name for f in PostCard._meta.concrete_fields if not f.primary_key]
+
+
+def build_card(post):
+    category = post.category
+    return PostCard(
+        post_id=post.pk,
+        author_id=post.author_id,
+        category_id=post.category_id,
+        status=post.status,
+        title=post.title,
+        slug=post.slug,
+        summary_preview=post.get_summary_preview(),
+        author_name=post.author.get_full_name(),
+        category_name=category.name if category else '',
+        category_slug=category.slug if category else '',
+        # The card-size variant, never the original upload.
+        thumbnail_url=variant_url(post.featured_image, 'card'),
+        featured_image=post.featured_image.name or '',
+        created_at=post.created_at,
+    )
+
+
+def card_source_queryset():
+    return BlogPost.objects.select_related('author', 'category').only(*CARD_SOURCE_FIELDS)
+
+
+def refresh_post_card(post):
+    # Saving with an explicit pk issues an UPDATE and falls back to INSERT.
+    build_card(post).save()
+
+
+def refresh_category_cards(category):
+    PostCard.objects.filter(category_id=category.pk).update(
+        category_name=category.name, category_slug=category.slug)
+
+
+def clear_category_cards(category):
+    PostCard.objects.filter(category_id=category.pk).update(category_name='', category_slug='')
+
+
+def refresh_author_cards(user):
+    PostCard.objects.filter(author_id=user.pk).update(author_name=user.get_full_name())
+
+
+def _write_cards(cards):
+    PostCard.objects.bulk_create(cards, update_conflicts=True, unique_fields=['post'],
+                                 update_fields=CARD_UPDATE_FIELDS)
+
+
+def rebuild_cards(chunk_size=1000):
+    """Rewrite every card from its post; returns the number of rows written.
+
+    Cards are upserted rather than deleted and recreated: ``PopularPost``
+    rows cascade from their card, and the rankings must survive a rebuild.
+    """
+    batch, total = [], 0
+    for post in card_source_queryset().order_by('pk').iterator(chunk_size=chunk_size):
+        batch.append(build_card(post))
+        if len(batch) >= chunk_size:
+            _write_cards(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        _write_cards(batch)
+        total += len(batch)
+    PostCard.objects.exclude(post_id__in=BlogPost.objects.values('pk')).delete()
+    return total
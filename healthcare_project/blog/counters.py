@@ -0,0 +1,110 @@
+"""Maintenance of the ``AuthorPostCount`` table.
+
+Receivers in ``blog.signals`` call ``record_save`` / ``record_delete``; both
+run inside the transaction that writes the post, so counts commit or roll
+back with it. Writes that bypass signals (``bulk_create``, queryset
+``update()``, fixtures) leave drift behind, which ``reconcile_counts()`` (the
+``reconcile_post_counts`` command) finds and repairs.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import AuthorPostCount, BlogPost
+
+
+def _rows(key):
+    author_id, category_key, status = key
+    return AuthorPostCount.objects.filter(author_id=author_id, category_key=category_key, status=status)
+
+
+def apply_delta(key, delta):
+    if _rows(key).update(count=F('count') + delta) or delta < 0:
+        return
+    author_id, category_key, status = key
+    try:
+        with transaction.atomic():
+            AuthorPostCount.objects.create(author_id=author_id, category_key=category_key,
+                                           status=status, count=delta)
+    except IntegrityError:
+        # Another transaction created the row first.
+        _rows(key).update(count=F('count') + delta)
+
+
+def recount_author(author_id):
+    rows = (BlogPost.objects.filter(author_id=author_id)
+            .values_list('category_id', 'status').annotate(n=Count('id')).order_by())
+    AuthorPostCount.objects.filter(author_id=author_id).delete()
+    AuthorPostCount.objects.bulk_create([
+        AuthorPostCount(author_id=author_id, category_key=category_id or 0, status=status, count=n)
+        for category_id, status, n in rows
+    ])
+
+
+def record_save(post, created):
+    new = post.counter_key()
+    if created:
+        apply_delta(new, 1)
+    elif not hasattr(post, '_counted_as'):
+        # Not loaded from the database with the counted fields, so the
+        # previous key is unknown; recount this author.
+        recount_author(post.author_id)
+    elif post._counted_as != new:
+        apply_delta(post._counted_as, -1)
+        apply_delta(new, 1)
+    post._counted_as = new
+
+
+def record_delete(post):
+    apply_delta(getattr(post, '_counted_as', post.counter_key()), -1)
+
+
+def fold_category(category_pk):
+    """Move a deleted category's counts to the uncategorized rows."""
+    with transaction.atomic():
+        for row in AuthorPostCount.objects.filter(category_key=category_pk):
+            apply_delta((row.author_id, 0, row.status), row.count)
+            row.delete()
+
+
+def author_totals(author_id):
+    totals = dict(AuthorPostCount.objects.filter(author_id=author_id)
+                  .values_list('status').annotate(n=Sum('count')))
+    return {'total_posts': sum(totals.values()), 'published_posts': totals.get('published', 0)}
+
+
+def author_breakdown(author_id):
+    """``[(category_key, {'draft': n, 'published': m}), ...]`` ordered by category key."""
+    breakdown = {}
+    for category_key, status, count in (AuthorPostCount.objects.filter(author_id=author_id, count__gt=0)
+                                        .values_list('category_key', 'status', 'count')):
+        breakdown.setdefault(category_key, Counter())[status] += count
+    return sorted(breakdown.items())
+
+
+def reconcile_counts(fix=True):
+    """Compare the table with a full recount; returns ``[(key, stored, actual), ...]``."""
+    actual = {
+        (author_id, category_id or 0, status): n
+        for author_id, category_id, status, n in BlogPost.objects
+        .values_list('author_id', 'category_id', 'status').annotate(n=Count('id')).order_by()
+    }
+    stored = {
+        (author_id, category_key, status): n
+        for author_id, category_key, status, n in AuthorPostCount.objects
+        .values_list('author_id', 'category_key', 'status', 'count')
+    }
+    drift = sorted(
+        (key, stored.get(key, 0), actual.get(key, 0))
+        for key in set(actual) | set(stored) if stored.get(key, 0) != actual.get(key, 0)
+    )
+    if fix and drift:
+        with transaction.atomic():
+            for key, _, n in drift:
+                _rows(key).delete()
+                if n:
+                    author_id, category_key, status = key
+                    AuthorPostCount.objects.create(author_id=author_id, category_key=category_key,
+                                                   status=status, count=n)
+    return drift
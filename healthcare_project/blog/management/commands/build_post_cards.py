@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blog.cards import rebuild_cards
+
+
+class Command(BaseCommand):
+    help = 'Backfill the PostCard listing table from existing blog posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_cards(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Built {total} post cards'))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from blog.static_export import StaticExporter
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the public blog to static HTML, rebuilding only changed pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.STATIC_EXPORT_ROOT),
+                            help='Directory to write the exported site into')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render every page, e.g. after a template change')
+
+    def handle(self, *args, **options):
+        stats = StaticExporter(options['output'], force=options['force']).run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported blog to {options['output']}: {stats['written']} written, "
+            f"{stats['unchanged']} unchanged, {stats['deleted']} deleted"
+        ))
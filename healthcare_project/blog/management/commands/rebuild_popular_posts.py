@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from blog.popularity import rebuild_popular
+
+
+class Command(BaseCommand):
+    help = 'Recompute the trending and most-read rankings shown on the blog list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, help='Posts per ranking (default POPULAR_POSTS_PER_BOARD)')
+
+    def handle(self, *args, **options):
+        changed = rebuild_popular(options['size'])
+        self.stdout.write(self.style.SUCCESS('Rankings updated' if changed else 'Rankings unchanged'))
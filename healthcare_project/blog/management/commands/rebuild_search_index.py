@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blog.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the blog full-text search index from published posts'
+
+    def handle(self, *args, **kwargs):
+        backend = get_backend()
+        with transaction.atomic():
+            indexed = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} published posts'))
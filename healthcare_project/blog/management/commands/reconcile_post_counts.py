@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from accounts.usercache import invalidate_post_counts
+from blog.counters import reconcile_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount posts per author, category and status, reporting and repairing drift in AuthorPostCount'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without repairing it')
+
+    def handle(self, *args, **options):
+        drift = reconcile_counts(fix=not options['dry_run'])
+        for (author_id, category_key, status), stored, actual in drift:
+            self.stdout.write(f'author={author_id} category={category_key or "-"} status={status}: '
+                              f'stored {stored}, actual {actual}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Post counts are in sync'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} count(s) drifted; re-run without --dry-run to repair'))
+        else:
+            for author_id in {key[0] for key, _, _ in drift}:
+                invalidate_post_counts(author_id)
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} drifted count(s)'))
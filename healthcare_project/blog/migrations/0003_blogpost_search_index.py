@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS blog_blogpost_fts "
+            "USING fts5(title, summary, content, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO blog_blogpost_fts (rowid, title, summary, content) "
+            "SELECT id, title, summary, content FROM blog_blogpost WHERE status = 'published'"
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            "ALTER TABLE blog_blogpost ADD FULLTEXT INDEX blogpost_fulltext (title, summary, content)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS blog_blogpost_fts")
+    elif vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE blog_blogpost DROP INDEX blogpost_fulltext")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_blogpost_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0003_blogpost_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCard',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='blog.blogpost')),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('published', 'Published')], max_length=10)),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField(max_length=200)),
+                ('summary_preview', models.CharField(max_length=200)),
+                ('author_name', models.CharField(max_length=255)),
+                ('category_name', models.CharField(blank=True, max_length=100)),
+                ('category_slug', models.SlugField(blank=True, max_length=100)),
+                ('thumbnail_url', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.blogcategory')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'category', 'created_at'], name='postcard_status_cat_created'), models.Index(fields=['status', 'created_at'], name='postcard_status_created'), models.Index(fields=['author', 'created_at'], name='postcard_author_created')],
+            },
+        ),
+    ]
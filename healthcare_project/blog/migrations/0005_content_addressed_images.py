@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:00
+
+import core.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_postcard'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blogpost',
+            name='featured_image',
+            field=core.images.ContentAddressedImageField(blank=True, null=True, upload_to='blog_images/'),
+        ),
+    ]
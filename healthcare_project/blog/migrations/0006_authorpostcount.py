@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:11
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_counts(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    AuthorPostCount = apps.get_model('blog', 'AuthorPostCount')
+    rows = BlogPost.objects.values_list('author_id', 'category_id', 'status').annotate(n=Count('id')).order_by()
+    AuthorPostCount.objects.bulk_create([
+        AuthorPostCount(author_id=author_id, category_key=category_id or 0, status=status, count=n)
+        for author_id, category_id, status, n in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0005_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorPostCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_key', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('published', 'Published')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='authorpostcount',
+            constraint=models.UniqueConstraint(fields=('author', 'category_key', 'status'), name='authorpostcount_unique'),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
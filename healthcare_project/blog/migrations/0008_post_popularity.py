@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_blogpost_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.blogpost')),
+                ('views', models.PositiveBigIntegerField(default=0)),
+                ('score', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['score'], name='poststats_score'), models.Index(fields=['views'], name='poststats_views')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PopularPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_key', models.PositiveIntegerField(default=0)),
+                ('board', models.CharField(choices=[('trending', 'Trending'), ('most_read', 'Most read')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('views', models.PositiveBigIntegerField(default=0)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.postcard')),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='popularpost',
+            constraint=models.UniqueConstraint(fields=('category_key', 'board', 'rank'), name='popularpost_unique'),
+        ),
+    ]
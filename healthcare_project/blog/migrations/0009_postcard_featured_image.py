@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:37
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_images(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    PostCard = apps.get_model('blog', 'PostCard')
+    image = BlogPost.objects.filter(pk=OuterRef('post_id')).exclude(featured_image=None).values('featured_image')
+    PostCard.objects.filter(post__featured_image__gt='').update(featured_image=Subquery(image[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcard',
+            name='featured_image',
+            field=models.ImageField(blank=True, upload_to='blog_images/'),
+        ),
+        migrations.RunPython(backfill_images, migrations.RunPython.noop),
+    ]
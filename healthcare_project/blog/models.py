@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from accounts.models import CustomUser
+from core.images import ContentAddressedImageField
 
 
 class BlogCategory(models.Model):
@@ -33,7 +34,7 @@ class BlogPost(models.Model):
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='blog_posts',
                                limit_choices_to={'user_type': 'doctor'})
     category = models.ForeignKey(BlogCategory, on_delete=models.SET_NULL, null=True, related_name='posts')
-    featured_image = models.ImageField(upload_to='blog_images/', blank=True, null=True)
+    featured_image = ContentAddressedImageField(upload_to='blog_images/', blank=True, null=True)
     summary = models.CharField(max_length=150, help_text='Max 15 words')
     content = models.TextField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
@@ -42,15 +43,143 @@ class BlogPost(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'category', 'created_at'], name='blogpost_status_cat_created'),
+            models.Index(fields=['status', 'created_at'], name='blogpost_status_created'),
+            # Keyset order for incremental exports (core/exports.py).
+            models.Index(fields=['updated_at', 'id'], name='blogpost_updated'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the row was counted under so a save can move it
+        # between AuthorPostCount rows (see blog.counters).
+        if all(f in instance.__dict__ for f in ('author_id', 'category_id', 'status')):
+            instance._counted_as = instance.counter_key()
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        # post_save receivers update AuthorPostCount inside this transaction.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
+    def counter_key(self):
+        return (self.author_id, self.category_id or 0, self.status)
+
     def get_summary_preview(self):
-        words = self.summary.split()[:15]
-        return ' '.join(words) + ('...' if len(self.summary.split()) > 15 else '')
+        words = self.summary.split()
+        return ' '.join(words[:15]) + ('...' if len(words) > 15 else '')
+
+
+class PostCard(models.Model):
+    """Denormalized listing row for a blog post.
+
+    Kept in sync by ``blog.signals`` so list pages read one narrow table
+    instead of joining posts, categories and authors per card.
+    """
+
+    post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey(BlogCategory, on_delete=models.SET_NULL, null=True, related_name='+')
+    status = models.CharField(max_length=10, choices=BlogPost.STATUS_CHOICES)
+    title = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=200)
+    summary_preview = models.CharField(max_length=200)
+    author_name = models.CharField(max_length=255)
+    category_name = models.CharField(max_length=100, blank=True)
+    category_slug = models.SlugField(max_length=100, blank=True)
+    thumbnail_url = models.CharField(max_length=255, blank=True)
+    # The post's original image: the list renders it through responsive_image,
+    # which falls back to the original until the variants have been built.
+    featured_image = models.ImageField(upload_to='blog_images/', blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'category', 'created_at'], name='postcard_status_cat_created'),
+            models.Index(fields=['status', 'created_at'], name='postcard_status_created'),
+            models.Index(fields=['author', 'created_at'], name='postcard_author_created'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class AuthorPostCount(models.Model):
+    """Number of an author's posts in one category and status.
+
+    Maintained by ``blog.signals`` so per-author totals are a handful of
+    rows regardless of how many posts the author has written.
+    ``category_key`` is the category pk, or 0 for uncategorized posts; a
+    plain integer keeps the unique constraint effective for those rows,
+    which a nullable foreign key would not.
+    """
+
+    author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='post_counts')
+    category_key = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=BlogPost.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'category_key', 'status'], name='authorpostcount_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id}/{self.category_key}/{self.status}: {self.count}"
+
+
+class PostStats(models.Model):
+    """View count and decayed popularity of a post.
+
+    Written in batches by ``blog.popularity``; ``score`` is a log-scale
+    popularity that can be ordered on directly (see that module).
+    """
+
+    post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    views = models.PositiveBigIntegerField(default=0)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['score'], name='poststats_score'),
+            models.Index(fields=['views'], name='poststats_views'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id}: {self.views} views"
+
+
+class PopularPost(models.Model):
+    """Precomputed trending and most-read rankings for the blog list.
+
+    Rebuilt by ``blog.popularity.rebuild_popular``. ``category_key`` is the
+    category pk, or 0 for the site-wide ranking.
+    """
+
+    BOARD_CHOICES = (
+        ('trending', 'Trending'),
+        ('most_read', 'Most read'),
+    )
+
+    category_key = models.PositiveIntegerField(default=0)
+    board = models.CharField(max_length=10, choices=BOARD_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    card = models.ForeignKey(PostCard, on_delete=models.CASCADE, related_name='+')
+    views = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['rank']
+        constraints = [
+            models.UniqueConstraint(fields=['category_key', 'board', 'rank'], name='popularpost_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.board}/{self.category_key} #{self.rank}: {self.card_id}"
@@ -0,0 +1,111 @@
+import base64
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+# Primary keys are signed 64-bit at most; larger values overflow the
+# database driver rather than matching nothing.
+MAX_PK = 2 ** 63 - 1
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value, pk):
+    value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    raw = f"{value}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse=datetime.fromisoformat):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = base64.urlsafe_b64decode(padded.encode()).decode().rsplit('|', 1)
+        value, pk = parse(value), int(pk)
+    except (ValueError, TypeError, OverflowError, UnicodeDecodeError, ValidationError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}') from e
+    if not -MAX_PK - 1 <= pk <= MAX_PK:
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}')
+    return value, pk
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        # Filled in by the caller, which knows how pages are addressed.
+        self.next_url = None
+        self.previous_url = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """Cursor pagination over (``field``, id), newest first by default.
+
+    Each page is a single range scan on the index, so deep pages cost the
+    same as the first one (unlike OFFSET, which reads and discards rows).
+    ``field`` must be non-null; ties are broken by primary key. The queryset
+    may be a ``values()`` one that selects ``field`` and ``pk``.
+    """
+
+    def __init__(self, queryset, per_page=12, field='created_at', descending=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.descending = descending
+        self._parse = queryset.model._meta.get_field(field).to_python
+
+    def _after(self, value, pk, forward):
+        op = 'lt' if forward == self.descending else 'gt'
+        return Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'pk__{op}': pk})
+
+    def _ordering(self, forward):
+        prefix = '-' if forward == self.descending else ''
+        return f'{prefix}{self.field}', f'{prefix}pk'
+
+    def get_page(self, after=None, before=None):
+        qs = self.queryset
+        if before:
+            value, pk = decode_cursor(before, self._parse)
+            rows = list(qs.filter(self._after(value, pk, forward=False))
+                        .order_by(*self._ordering(forward=False))[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(
+                rows,
+                next_cursor=self._cursor(rows[-1]) if rows else None,
+                previous_cursor=self._cursor(rows[0]) if has_more else None,
+            )
+
+        if after:
+            value, pk = decode_cursor(after, self._parse)
+            qs = qs.filter(self._after(value, pk, forward=True))
+        rows = list(qs.order_by(*self._ordering(forward=True))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            next_cursor=self._cursor(rows[-1]) if has_more else None,
+            previous_cursor=self._cursor(rows[0]) if after and rows else None,
+        )
+
+    def _cursor(self, obj):
+        if isinstance(obj, dict):
+            # A values() row; it must include the field and 'pk'.
+            return encode_cursor(obj[self.field], obj['pk'])
+        return encode_cursor(getattr(obj, self.field), obj.pk)
@@ -0,0 +1,225 @@
+"""Write-behind view counting and the precomputed popularity rankings.
+
+``count_post_views`` wraps the detail view (outside the page cache, so cached
+hits count too) and only adds to ``view_counter``, an in-process tally keyed
+by slug. A daemon thread flushes the tally every ``VIEW_COUNT_FLUSH_INTERVAL``
+seconds, or as soon as ``VIEW_COUNT_FLUSH_THRESHOLD`` hits are pending,
+writing one UPDATE per post rather than one per hit. Hits not yet flushed are
+lost if the process dies.
+
+Popularity decays with a half-life of ``POPULARITY_HALF_LIFE_HOURS``.
+``PostStats.score`` holds ``log(sum(views * 2 ** ((viewed_at - EPOCH) / half_life)))``:
+adding hits needs only the time they were counted, and ordering by ``score``
+ranks posts by their popularity *now* without rewriting every row as time
+passes. ``rebuild_popular()`` copies the top posts per category into
+``PopularPost``, which the blog list reads in one query. Web processes never
+run it themselves: after writing counts the flush thread queues it on the
+task queue (``core.tasks``) to run ``POPULAR_REBUILD_INTERVAL`` seconds
+later, unless a rebuild is already waiting, so one worker rebuilds per
+interval however many web processes count views.
+"""
+import atexit
+import datetime
+import logging
+import math
+import threading
+from collections import Counter
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+
+from core.models import Task
+from core.pagecache import bump_page_version
+from core.tasks import enqueue, task_name
+from .models import BlogCategory, BlogPost, PopularPost, PostStats
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+BOARDS = {'trending': '-score', 'most_read': '-views'}
+COUNTED_STATUSES = (200, 304)
+
+
+def _decay_rate():
+    return math.log(2) / (getattr(settings, 'POPULARITY_HALF_LIFE_HOURS', 24) * 3600)
+
+
+def score_increment(views, when):
+    """Log-scale score contributed by ``views`` hits at ``when``."""
+    return math.log(views) + (when - EPOCH).total_seconds() * _decay_rate()
+
+
+def decayed_views(score, when):
+    """The decayed view count a ``score`` stands for at ``when``."""
+    return math.exp(score - (when - EPOCH).total_seconds() * _decay_rate())
+
+
+def _add_score(increment):
+    # log(exp(score) + exp(increment)), computed without overflow.
+    return Greatest(F('score'), Value(increment)) + Ln(1 + Exp(-Abs(F('score') - Value(increment))))
+
+
+def flush_views(counts, when=None):
+    """Add ``{slug: hits}`` to ``PostStats``; returns the number of posts updated."""
+    when = when or datetime.datetime.now(datetime.timezone.utc)
+    ids = dict(BlogPost.objects.filter(slug__in=counts).values_list('slug', 'pk'))
+    # A fixed order keeps concurrent flushes from other workers deadlock-free.
+    for slug, post_id in sorted(ids.items(), key=lambda item: item[1]):
+        hits = counts[slug]
+        increment = score_increment(hits, when)
+        rows = PostStats.objects.filter(post_id=post_id)
+        if rows.update(views=F('views') + hits, score=_add_score(increment)):
+            continue
+        try:
+            with transaction.atomic():
+                PostStats.objects.create(post_id=post_id, views=hits, score=increment)
+        except IntegrityError:
+            # Another worker created the row first.
+            rows.update(views=F('views') + hits, score=_add_score(increment))
+    return len(ids)
+
+
+def _ranking(rows):
+    return {(row.category_key, row.board, row.rank, row.card_id) for row in rows}
+
+
+def rebuild_popular(size=None):
+    """Recompute ``PopularPost``; returns True if any ranking changed."""
+    size = size or getattr(settings, 'POPULAR_POSTS_PER_BOARD', 5)
+    published = PostStats.objects.filter(post__card__status='published')
+    rows = []
+    for category_key in [0, *BlogCategory.objects.values_list('pk', flat=True)]:
+        posts = published.filter(post__card__category_id=category_key) if category_key else published
+        for board, order in BOARDS.items():
+            ranked = posts.order_by(order, 'pk').values_list('post_id', 'views')[:size]
+            rows += [PopularPost(category_key=category_key, board=board, rank=rank, card_id=post_id, views=views)
+                     for rank, (post_id, views) in enumerate(ranked, start=1)]
+    # One transaction, so readers see the old rankings or the new ones.
+    with transaction.atomic():
+        changed = _ranking(rows) != _ranking(PopularPost.objects.only('category_key', 'board', 'rank', 'card_id'))
+        PopularPost.objects.all().delete()
+        PopularPost.objects.bulk_create(rows)
+    if changed:
+        # The list pages embed the rankings; view counts alone are allowed
+        # to lag until the order changes.
+        bump_page_version('blog')
+    return changed
+
+
+def schedule_rebuild():
+    """Queue ``rebuild_popular`` unless a rebuild is already waiting; returns True if queued."""
+    if Task.objects.filter(name=task_name(rebuild_popular), status=Task.QUEUED).exists():
+        return False
+    enqueue(rebuild_popular, delay=getattr(settings, 'POPULAR_REBUILD_INTERVAL', 60))
+    return True
+
+
+def popular_posts(category_slug=None):
+    """``{board: [PostCard, ...]}`` for a category (or site-wide), with ``views`` set on each card."""
+    rows = PopularPost.objects.filter(card__status='published').select_related('card')
+    if category_slug:
+        rows = rows.filter(category_key__in=BlogCategory.objects.filter(slug=category_slug).values('pk'))
+    else:
+        rows = rows.filter(category_key=0)
+    boards = {board: [] for board in BOARDS}
+    for row in rows:
+        row.card.views = row.views
+        boards[row.board].append(row.card)
+    return boards
+
+
+class ViewCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_hits = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {'hits': 0, 'flushes': 0, 'posts_flushed': 0, 'errors': 0, 'rebuilds_queued': 0}
+
+    def incr(self, slug):
+        with self._lock:
+            self._pending[slug] += 1
+            self._pending_hits += 1
+            self.counts['hits'] += 1
+            pending = self._pending_hits
+            if self._thread is None:
+                self._start()
+        if pending >= getattr(settings, 'VIEW_COUNT_FLUSH_THRESHOLD', 1000):
+            self._wake.set()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 5))
+            self._wake.clear()
+            try:
+                if self.flush() and schedule_rebuild():
+                    with self._lock:
+                        self.counts['rebuilds_queued'] += 1
+            except Exception:
+                # Whatever went wrong, the thread must live on to flush later
+                # hits, or they pile up in memory and are never written.
+                logger.exception('View counter flush or rebuild failed')
+            finally:
+                # This thread's connection would otherwise outlive CONN_MAX_AGE.
+                connections.close_all()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._pending_hits = 0
+        if not pending:
+            return 0
+        try:
+            flushed = flush_views(pending)
+        except DatabaseError:
+            logger.exception('Flushing %d view counts failed', len(pending))
+            with self._lock:
+                self._pending.update(pending)
+                self._pending_hits += sum(pending.values())
+                self.counts['errors'] += 1
+            return 0
+        with self._lock:
+            self.counts['flushes'] += 1
+            self.counts['posts_flushed'] += flushed
+        return flushed
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts, pending=self._pending_hits)
+
+
+view_counter = ViewCounter()
+
+
+def count_post_views(view_func):
+    """Count successful GETs of a post detail view, including page-cache hits."""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped(request, slug, *args, **kwargs):
+            response = await view_func(request, slug, *args, **kwargs)
+            if request.method == 'GET' and response.status_code in COUNTED_STATUSES:
+                view_counter.incr(slug)
+            return response
+        return _wrapped
+
+    @wraps(view_func)
+    def _wrapped(request, slug, *args, **kwargs):
+        response = view_func(request, slug, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in COUNTED_STATUSES:
+            view_counter.incr(slug)
+        return response
+    return _wrapped
@@ -0,0 +1,194 @@
+"""Full-text search over published blog posts.
+
+SQLite keeps an FTS5 shadow table (``blog_blogpost_fts``) whose rowid is the
+post id; it is updated from the post_save/post_delete receivers in
+``blog.signals``. MySQL uses an InnoDB FULLTEXT index on ``blog_blogpost``,
+which the server maintains itself. Other backends fall back to ``icontains``.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import BlogPost
+
+FTS_TABLE = 'blog_blogpost_fts'
+MYSQL_FULLTEXT_INDEX = 'blogpost_fulltext'
+
+# Column weights for bm25(): title, summary, content.
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+SNIPPET_WORDS = 24
+_HL_START, _HL_END = '\x02', '\x03'
+
+SearchHit = namedtuple('SearchHit', ['post_id', 'rank', 'snippet'])
+
+_token_re = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    return _token_re.findall(query.lower())[:16]
+
+
+def _highlight(raw):
+    # Escape the user's text, then turn the sentinel markers into <mark> tags.
+    html = escape(raw).replace(_HL_START, '<mark>').replace(_HL_END, '</mark>')
+    return mark_safe(html)
+
+
+def _python_snippet(text, terms):
+    words = text.split()
+    if not words:
+        return ''
+    start = 0
+    for i, word in enumerate(words):
+        if any(word.lower().startswith(t) for t in terms):
+            start = max(0, i - SNIPPET_WORDS // 4)
+            break
+    chunk = words[start:start + SNIPPET_WORDS]
+    marked = [
+        f'{_HL_START}{w}{_HL_END}' if any(w.lower().startswith(t) for t in terms) else w
+        for w in chunk
+    ]
+    prefix = '…' if start else ''
+    suffix = '…' if start + SNIPPET_WORDS < len(words) else ''
+    return _highlight(prefix + ' '.join(marked) + suffix)
+
+
+def contains_terms(posts, terms):
+    """Unindexed ``icontains`` match of every term against title, summary or content."""
+    for term in terms:
+        posts = posts.filter(Q(title__icontains=term) | Q(summary__icontains=term) | Q(content__icontains=term))
+    return posts
+
+
+class SQLiteFTSBackend:
+    vendor = 'sqlite'
+
+    def search(self, terms, limit, offset=0):
+        match = ' '.join(f'"{t}"*' for t in terms)
+        sql = (
+            f"SELECT rowid, bm25({FTS_TABLE}, %s, %s, %s) AS rank, "
+            f"snippet({FTS_TABLE}, 2, %s, %s, '…', %s) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY rank LIMIT %s OFFSET %s"
+        )
+        params = [*FTS_WEIGHTS, _HL_START, _HL_END, SNIPPET_WORDS, match, limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [SearchHit(pk, rank, _highlight(snip)) for pk, rank, snip in cursor.fetchall()]
+
+    def search_ids(self, terms, limit):
+        sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s"
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [' '.join(f'"{t}"*' for t in terms), limit])
+            return [pk for pk, in cursor.fetchall()]
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+            if post.status == 'published':
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, title, summary, content) VALUES (%s, %s, %s, %s)",
+                    [post.pk, post.title, post.summary, post.content],
+                )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, summary, content) "
+                f"SELECT id, title, summary, content FROM blog_blogpost WHERE status = 'published'"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+            return cursor.fetchone()[0]
+
+
+class MySQLFullTextBackend:
+    vendor = 'mysql'
+
+    def _matches(self, terms):
+        against = ' '.join(f'+{t}*' for t in terms)
+        match = RawSQL("MATCH (title, summary, content) AGAINST (%s IN BOOLEAN MODE)", [against])
+        return (BlogPost.objects.filter(status='published')
+                .annotate(rank=match).filter(rank__gt=0)
+                .order_by('-rank'))
+
+    def search(self, terms, limit, offset=0):
+        rows = self._matches(terms).values_list('id', 'rank', 'content')[offset:offset + limit]
+        return [SearchHit(pk, rank, _python_snippet(content, terms)) for pk, rank, content in rows]
+
+    def search_ids(self, terms, limit):
+        return list(self._matches(terms).values_list('id', flat=True)[:limit])
+
+    def index_post(self, post):
+        # InnoDB maintains FULLTEXT indexes as part of the row write.
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE blog_blogpost DROP INDEX {MYSQL_FULLTEXT_INDEX}")
+            cursor.execute(
+                f"ALTER TABLE blog_blogpost ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} (title, summary, content)"
+            )
+        return BlogPost.objects.filter(status='published').count()
+
+
+class BasicSearchBackend:
+    """Unindexed fallback for databases without a supported full-text engine."""
+    vendor = None
+
+    def search(self, terms, limit, offset=0):
+        rows = contains_terms(BlogPost.objects.filter(status='published'), terms)
+        rows = rows.values_list('id', 'content')[offset:offset + limit]
+        return [SearchHit(pk, 0, _python_snippet(content, terms)) for pk, content in rows]
+
+    def search_ids(self, terms, limit):
+        return list(contains_terms(BlogPost.objects.filter(status='published'), terms)
+                    .values_list('id', flat=True)[:limit])
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        return BlogPost.objects.filter(status='published').count()
+
+
+_backends = {
+    'sqlite': SQLiteFTSBackend,
+    'mysql': MySQLFullTextBackend,
+}
+
+
+def get_backend():
+    return _backends.get(connection.vendor, BasicSearchBackend)()
+
+
+def search_posts(query, limit=20, offset=0):
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().search(terms, limit, offset)
+
+
+def search_post_ids(query, limit=1000):
+    """Ids of published posts matching ``query``, best first, without snippets."""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().search_ids(terms, limit)
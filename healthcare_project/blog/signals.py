@@ -0,0 +1,91 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import CustomUser, DoctorProfile
+from accounts.usercache import invalidate_post_counts
+from core.images import schedule_derivatives
+from core.pagecache import bump_page_version
+from .counters import record_save, record_delete, fold_category
+from .cards import refresh_post_card, refresh_category_cards, clear_category_cards, refresh_author_cards
+from .models import BlogPost, BlogCategory
+from .search import get_backend
+from . import syndication
+
+AUTHOR_NAME_FIELDS = {'first_name', 'last_name', 'email'}
+# Everything about the author that post pages render.
+AUTHOR_PAGE_FIELDS = AUTHOR_NAME_FIELDS | {'profile_image'}
+
+
+def _is_or_was_published(post, created=False):
+    if post.status == 'published':
+        return True
+    if created:
+        return False
+    # _counted_as holds the loaded (author, category, status); without it the
+    # previous status is unknown, so assume the post was public.
+    return getattr(post, '_counted_as', (None, None, 'published'))[2] == 'published'
+
+
+@receiver(post_save, sender=BlogPost)
+def index_blog_post(sender, instance, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    # Checked before record_save() replaces the loaded status.
+    if _is_or_was_published(instance, created):
+        syndication.invalidate()
+    record_save(instance, created)
+    get_backend().index_post(instance)
+    refresh_post_card(instance)
+    schedule_derivatives(instance.featured_image)
+    invalidate_post_counts(instance.author_id)
+    bump_page_version('blog')
+
+
+@receiver(post_delete, sender=BlogPost)
+def unindex_blog_post(sender, instance, **kwargs):
+    if _is_or_was_published(instance):
+        syndication.invalidate()
+    get_backend().remove_post(instance.pk)
+    record_delete(instance)
+    invalidate_post_counts(instance.author_id)
+    bump_page_version('blog')
+
+
+@receiver(post_save, sender=BlogCategory)
+def update_category_cards(sender, instance, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    if not created:
+        refresh_category_cards(instance)
+    bump_page_version('blog')
+    syndication.invalidate()
+
+
+@receiver(pre_delete, sender=BlogCategory)
+def clear_deleted_category_cards(sender, instance, **kwargs):
+    # Posts are detached with a queryset UPDATE (SET_NULL), which sends no
+    # post_save, so clear the denormalized name here.
+    clear_category_cards(instance)
+    fold_category(instance.pk)
+    bump_page_version('blog')
+    syndication.invalidate()
+
+
+@receiver(post_save, sender=CustomUser)
+def update_author_cards(sender, instance, raw=False, created=False, update_fields=None, **kwargs):
+    if raw or created or instance.user_type != 'doctor':
+        return
+    if update_fields is not None and not AUTHOR_PAGE_FIELDS.intersection(update_fields):
+        return
+    if update_fields is None or AUTHOR_NAME_FIELDS.intersection(update_fields):
+        refresh_author_cards(instance)
+        syndication.invalidate()
+    bump_page_version('blog')
+
+
+@receiver(post_save, sender=DoctorProfile)
+@receiver(post_delete, sender=DoctorProfile)
+def expire_author_pages(sender, instance, raw=False, **kwargs):
+    # Post pages show the author's specialization and experience.
+    if not raw:
+        bump_page_version('blog')
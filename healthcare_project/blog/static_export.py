@@ -0,0 +1,164 @@
+"""Incremental static export of the public blog.
+
+Pages are written to ``<output>/<url path>/index.html`` so the directory can be
+served as-is by nginx or a CDN. Every page has an input hash built from the
+rows it renders (post, author, category and card columns); the hashes are kept
+in ``.export-manifest.json`` and a later run only re-renders pages whose hash
+changed. Files are written to a temporary name and renamed into place, so a
+reader never sees a half-written page.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import AnonymousUser
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import reverse
+
+from .models import BlogCategory, BlogPost, PostCard
+from .pagination import KeysetPage
+from .views import POSTS_PER_PAGE
+
+MANIFEST_NAME = '.export-manifest.json'
+
+CARD_COLUMNS = ('post_id', 'author_id', 'category_id', 'status', 'title', 'slug', 'summary_preview',
+                'author_name', 'category_name', 'category_slug', 'thumbnail_url', 'featured_image', 'created_at')
+DETAIL_COLUMNS = ('id', 'slug', 'updated_at', 'featured_image', 'category__name', 'category__slug',
+                  'author__first_name', 'author__last_name', 'author__email', 'author__profile_image',
+                  'author__doctor_profile__specialization', 'author__doctor_profile__years_of_experience')
+
+
+def _digest(*parts):
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class StaticExporter:
+    def __init__(self, output_dir, force=False):
+        self.output_dir = Path(output_dir)
+        self.force = force
+        self.stats = {'written': 0, 'unchanged': 0, 'deleted': 0}
+        self.list_url = reverse('blog:blog_list')
+        self._request = RequestFactory().get(self.list_url)
+        self._request.user = AnonymousUser()
+
+    def run(self):
+        manifest_path = self.output_dir / MANIFEST_NAME
+        try:
+            old_manifest = json.loads(manifest_path.read_text())
+        except (FileNotFoundError, ValueError):
+            old_manifest = {}
+        self.old_manifest = old_manifest
+        self.manifest = {}
+
+        categories = list(BlogCategory.objects.all())
+        self._export_list(categories, None)
+        for category in categories:
+            self._export_list(categories, category)
+        self._export_details()
+
+        for url_path in set(old_manifest) - set(self.manifest):
+            try:
+                self._file_for(url_path).unlink()
+                self.stats['deleted'] += 1
+            except FileNotFoundError:
+                pass
+        write_atomic(manifest_path, json.dumps(self.manifest, indent=0, sort_keys=True).encode())
+        return self.stats
+
+    def _file_for(self, url_path):
+        return self.output_dir / url_path.lstrip('/') / 'index.html'
+
+    def _needs_render(self, url_path, digest):
+        self.manifest[url_path] = digest
+        if (not self.force and self.old_manifest.get(url_path) == digest
+                and self._file_for(url_path).exists()):
+            self.stats['unchanged'] += 1
+            return False
+        return True
+
+    def _write(self, url_path, html):
+        write_atomic(self._file_for(url_path), html.encode())
+        self.stats['written'] += 1
+
+    def _list_page_url(self, category, number):
+        url = self.list_url
+        if category is not None:
+            url += f'category/{category.slug}/'
+        if number > 1:
+            url += f'page/{number}/'
+        return url
+
+    def _export_list(self, categories, category):
+        cards = PostCard.objects.filter(status='published')
+        if category is not None:
+            cards = cards.filter(category=category)
+        category_sig = [(c.pk, c.name, c.slug) for c in categories]
+
+        rows = cards.order_by('-created_at', '-pk').values_list(*CARD_COLUMNS).iterator(chunk_size=2000)
+        # One page of lookahead tells each page whether an older one exists.
+        number, previous = 0, None
+        for chunk in _chunked(rows, POSTS_PER_PAGE):
+            if previous is not None:
+                self._export_list_page(categories, category, category_sig, number, previous, has_next=True)
+            number, previous = number + 1, chunk
+        self._export_list_page(categories, category, category_sig, max(number, 1), previous or [],
+                               has_next=False)
+
+    def _export_list_page(self, categories, category, category_sig, number, rows, has_next):
+        url_path = self._list_page_url(category, number)
+        if not self._needs_render(url_path, _digest(category_sig, rows, has_next)):
+            return
+        page = KeysetPage([PostCard(**dict(zip(CARD_COLUMNS, row))) for row in rows])
+        # has_previous()/has_next() test the cursors, so reuse the static URLs.
+        if number > 1:
+            page.previous_cursor = page.previous_url = self._list_page_url(category, number - 1)
+        if has_next:
+            page.next_cursor = page.next_url = self._list_page_url(category, number + 1)
+        for c in categories:
+            c.list_url = self._list_page_url(c, 1)
+        html = render_to_string('blog/blog_list.html', {
+            'posts': page, 'page': page, 'categories': categories,
+            'selected_category': category.slug if category else None,
+        }, request=self._request)
+        self._write(url_path, html)
+
+    def _export_details(self):
+        changed = []
+        for row in BlogPost.objects.filter(status='published').values_list(*DETAIL_COLUMNS).iterator(chunk_size=2000):
+            url_path = reverse('blog:blog_detail', args=[row[1]])
+            if self._needs_render(url_path, _digest(row)):
+                changed.append((row[0], url_path))
+
+        posts = BlogPost.objects.select_related('author', 'category', 'author__doctor_profile')
+        for offset in range(0, len(changed), 500):
+            batch = dict(changed[offset:offset + 500])
+            for post in posts.filter(pk__in=batch):
+                html = render_to_string('blog/blog_detail.html', {'post': post}, request=self._request)
+                self._write(batch[post.pk], html)
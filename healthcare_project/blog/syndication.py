@@ -0,0 +1,280 @@
+"""Atom, RSS and JSON feeds and a segmented sitemap for the public blog.
+
+Documents are generated on the first request after a change and written to
+``SYNDICATION_ROOT``; later requests are answered from that file with an ETag
+and Last-Modified taken from its size and write time, so polling crawlers and
+feed readers cost a ``stat()`` and an ``open()``. File names carry a random
+token kept in the page cache, which ``blog.signals`` replaces (``invalidate()``)
+only when a published post, a category or an author's name changes; drafts
+and view counts leave the files alone. A token lost with the cache (a restart
+under locmem, a culled entry) just means one regeneration. As with the page
+cache, several worker processes need a shared ``PAGE_CACHE_ALIAS`` cache to
+agree on the token. The token also expires after
+``SYNDICATION_TOKEN_TIMEOUT``, so a process that never saw an invalidation
+(a per-process cache) regenerates within that time instead of serving old
+documents forever. With the dummy backend (page caching off) documents are
+streamed straight to the client on every request.
+
+Documents are written as they are generated. A sitemap segment reads its posts
+in keyset batches, so the largest one never sits in memory. Segment ``n``
+holds published posts with ids in ``[n * size, (n + 1) * size)`` for
+``SITEMAP_SEGMENT_SIZE`` (at most the protocol's 50,000 URLs), which keeps
+every segment within the limit and lets the index list them with one GROUP BY.
+"""
+import hashlib
+import io
+import itertools
+import json
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import F, Max
+from django.db.models.functions import Floor
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, urlencode
+
+from core.pagecache import get_cache
+from .models import BlogCategory, BlogPost
+from .pagination import MAX_PK
+
+TOKEN_KEY = 'syndication:token'
+FEED_FORMATS = {
+    'atom': 'application/atom+xml; charset=utf-8',
+    'rss': 'application/rss+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+FEED_GENERATORS = {'atom': feedgenerator.Atom1Feed, 'rss': feedgenerator.Rss201rev2Feed}
+XML_TYPE = 'application/xml; charset=utf-8'
+MAX_SEGMENT_SIZE = 50000
+BATCH_SIZE = 2000
+# Older documents are deleted once they cannot be in use any more.
+PRUNE_AFTER = 60
+SLUG_PLACEHOLDER = 'slug-placeholder'
+
+
+def _token_timeout():
+    return getattr(settings, 'SYNDICATION_TOKEN_TIMEOUT', 900)
+
+
+def _token():
+    cache = get_cache()
+    token = cache.get(TOKEN_KEY)
+    if token is None:
+        cache.add(TOKEN_KEY, uuid.uuid4().hex, timeout=_token_timeout())
+        token = cache.get(TOKEN_KEY)
+    return token
+
+
+def invalidate():
+    """Mark every feed and sitemap out of date."""
+    get_cache().set(TOKEN_KEY, uuid.uuid4().hex, timeout=_token_timeout())
+
+
+def segment_size():
+    return min(getattr(settings, 'SITEMAP_SEGMENT_SIZE', MAX_SEGMENT_SIZE), MAX_SEGMENT_SIZE)
+
+
+def site_url(request):
+    """Scheme and host that absolute URLs in feeds and sitemaps start with."""
+    return getattr(settings, 'SITE_URL', '') or request.build_absolute_uri('/').rstrip('/')
+
+
+def _published():
+    return BlogPost.objects.filter(status='published')
+
+
+def _list_url(base, category=None):
+    query = '?' + urlencode({'category': category.slug}) if category else ''
+    return base + reverse('blog:blog_list') + query
+
+
+def _detail_prefix(base):
+    # reverse() per URL is measurable across a 50,000-URL segment.
+    url = base + reverse('blog:blog_detail', args=[SLUG_PLACEHOLDER])
+    return url.split(SLUG_PLACEHOLDER)
+
+
+def _feed_posts(category):
+    posts = _published().select_related('author', 'category').only(
+        'title', 'slug', 'summary', 'created_at', 'updated_at',
+        'author__first_name', 'author__last_name', 'author__email', 'category__name')
+    if category is not None:
+        posts = posts.filter(category=category)
+    return list(posts.order_by('-created_at')[:getattr(settings, 'FEED_ITEMS', 20)])
+
+
+def generate_feed(fmt, base, feed_url, category=None):
+    """Yield the bytes of a feed of the newest published posts."""
+    posts = _feed_posts(category)
+    title = f'Health Blogs: {category.name}' if category else 'Health Blogs'
+    description = category.description if category and category.description else 'Health and medical articles'
+    link = _list_url(base, category)
+    before, after = _detail_prefix(base)
+
+    if fmt == 'json':
+        yield json.dumps({
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': title,
+            'home_page_url': link,
+            'feed_url': feed_url,
+            'description': description,
+            'items': [{
+                'id': before + post.slug + after,
+                'url': before + post.slug + after,
+                'title': post.title,
+                'summary': post.summary,
+                'content_text': post.summary,
+                'date_published': post.created_at.isoformat(),
+                'date_modified': post.updated_at.isoformat(),
+                'authors': [{'name': post.author.get_full_name() or post.author.email}],
+                'tags': [post.category.name] if post.category else [],
+            } for post in posts],
+        }, ensure_ascii=False).encode()
+    else:
+        feed = FEED_GENERATORS[fmt](title=title, link=link, description=description, language='en',
+                                    feed_url=feed_url)
+        for post in posts:
+            url = before + post.slug + after
+            feed.add_item(
+                title=post.title, link=url, unique_id=url, description=post.summary,
+                author_name=post.author.get_full_name() or post.author.email,
+                pubdate=post.created_at, updateddate=post.updated_at,
+                categories=[post.category.name] if post.category else None,
+            )
+        # At most FEED_ITEMS entries, so the document is built in memory.
+        buffer = io.StringIO()
+        feed.write(buffer, 'utf-8')
+        yield buffer.getvalue().encode()
+
+
+def _sitemap_entry(loc, lastmod=None, tag='url'):
+    lastmod = f'<lastmod>{lastmod.isoformat()}</lastmod>' if lastmod else ''
+    return f'<{tag}><loc>{escape(loc)}</loc>{lastmod}</{tag}>\n'
+
+
+def generate_sitemap_index(base):
+    """Yield ``sitemap.xml``: the pages sitemap and one entry per post segment."""
+    size = segment_size()
+    segments = list(_published().annotate(segment=Floor(F('pk') / size)).values('segment')
+                    .annotate(lastmod=Max('updated_at')).order_by('segment').values_list('segment', 'lastmod'))
+    newest = max((lastmod for _, lastmod in segments), default=None)
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    entries = [_sitemap_entry(base + reverse('sitemap_pages'), newest, 'sitemap')]
+    entries += [_sitemap_entry(base + reverse('sitemap_posts', args=[int(segment)]), lastmod, 'sitemap')
+                for segment, lastmod in segments]
+    yield ''.join(entries).encode()
+    yield b'</sitemapindex>\n'
+
+
+def generate_sitemap_pages(base):
+    """Yield the sitemap of the blog list and category pages."""
+    newest = _published().aggregate(newest=Max('updated_at'))['newest']
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    entries = [_sitemap_entry(_list_url(base), newest)]
+    entries += [_sitemap_entry(_list_url(base, category)) for category in BlogCategory.objects.order_by('pk')]
+    yield ''.join(entries).encode()
+    yield b'</urlset>\n'
+
+
+def generate_sitemap_segment(segment, base):
+    """Yield the sitemap of one post segment.
+
+    Raises Http404 if the segment holds no published posts.
+    """
+    size = segment_size()
+    if segment * size > MAX_PK:
+        # No pk can be that large, and the database driver would overflow.
+        raise Http404('No such sitemap')
+    last = min((segment + 1) * size - 1, MAX_PK)
+    posts = (_published().filter(pk__gte=segment * size, pk__lte=last)
+             .order_by('pk').values_list('pk', 'slug', 'updated_at'))
+    batch = list(posts[:BATCH_SIZE])
+    if not batch:
+        raise Http404('No such sitemap')
+    before, after = _detail_prefix(base)
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    while batch:
+        yield ''.join(_sitemap_entry(before + slug + after, updated_at) for _, slug, updated_at in batch).encode()
+        if len(batch) < BATCH_SIZE:
+            break
+        batch = list(posts.filter(pk__gt=batch[-1][0])[:BATCH_SIZE])
+    yield b'</urlset>\n'
+
+
+def _write(path, chunks):
+    """Write ``chunks`` to ``path`` via a temporary file, so readers never see part of it."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def cached_document(name, base, token, generate):
+    """Path of the copy of document ``name`` for ``token``, generating it if missing."""
+    root = Path(getattr(settings, 'SYNDICATION_ROOT', settings.BASE_DIR / 'cache' / 'syndication'))
+    prefix = f"{name}.{hashlib.md5(base.encode()).hexdigest()[:8]}."
+    path = root / f'{prefix}{token}'
+    if not path.exists():
+        root.mkdir(parents=True, exist_ok=True)
+        _write(path, generate())
+        cutoff = time.time() - PRUNE_AFTER
+        for old in root.glob(f'{prefix}*'):
+            try:
+                if old != path and old.stat().st_mtime < cutoff:
+                    old.unlink()
+            except FileNotFoundError:
+                # Pruned by another process.
+                pass
+    return path
+
+
+def serve(request, name, content_type, generate):
+    """Respond with document ``name``; ``generate(base)`` yields it when it is not cached."""
+    base = site_url(request)
+    token = _token()
+    if token is None:
+        # The cache stores nothing, so there is no token to key files on.
+        # Start generating before the response does, so a missing document
+        # is still a 404.
+        chunks = generate(base)
+        first = next(chunks)
+        return StreamingHttpResponse(itertools.chain([first], chunks), content_type=content_type)
+    path = cached_document(name, base, token, lambda: generate(base))
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        # Pruned by another process, which means the token has changed.
+        path = cached_document(name, base, _token(), lambda: generate(base))
+        f = open(path, 'rb')
+    stat = os.fstat(f.fileno())
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is not None:
+        f.close()
+    elif request.method == 'HEAD':
+        f.close()
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = stat.st_size
+    else:
+        response = FileResponse(f, content_type=content_type)
+        response.headers.pop('Content-Disposition', None)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = f"public, max-age={getattr(settings, 'SYNDICATION_MAX_AGE', 300)}"
+    return response
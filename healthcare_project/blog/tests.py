@@ -0,0 +1,315 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser, DoctorProfile
+from core import pagecache
+from core.tests import LOCMEM_PAGE_CACHE
+from .cards import rebuild_cards
+from .models import BlogCategory, BlogPost, PopularPost, PostCard, PostStats
+from .popularity import popular_posts, rebuild_popular
+from . import syndication
+
+
+class PostApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(
+            'author@example.com', 'pass-12345', user_type='doctor', first_name='Asha', last_name='Rao')
+        DoctorProfile.objects.create(user=cls.author, specialization='cardiology', medical_license='LIC-1')
+        cls.heart = BlogCategory.objects.create(name='Heart', slug='heart')
+        cls.sleep = BlogCategory.objects.create(name='Sleep', slug='sleep')
+        cls.posts = [
+            BlogPost.objects.create(title=f'Post {i}', author=cls.author, category=cls.heart if i % 2 else cls.sleep,
+                                    summary=f'Summary {i}', content=f'Content {i}', status='published')
+            for i in range(5)
+        ]
+        BlogPost.objects.create(title='Draft', author=cls.author, summary='Draft', content='Draft')
+
+    def setUp(self):
+        # Keep the write-behind view counter's thread out of the test database.
+        patcher = mock.patch('blog.popularity.view_counter.incr')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_post_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([post['title'] for post in data['results']], [f'Post {i}' for i in range(4, -1, -1)])
+        self.assertEqual(set(data['results'][0]),
+                         {'id', 'title', 'slug', 'summary', 'author', 'category', 'created_at'})
+        self.assertEqual(data['results'][0]['author'], 'Asha Rao')
+        self.assertIsNone(data['next'])
+        self.assertIsNone(data['previous'])
+
+    def test_post_list_category(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:post_list'), {'category': 'heart'})
+        self.assertEqual([post['title'] for post in response.json()['results']], ['Post 3', 'Post 1'])
+
+    def test_post_list_fields(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:post_list'), {'fields': 'slug,category_name'})
+        self.assertEqual(response.json()['results'][0], {'slug': 'post-4', 'category_name': 'Sleep'})
+
+    def test_post_list_unknown_field(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('api:post_list'), {'fields': 'title,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json()['errors'])
+
+    def test_post_list_cursor_paging(self):
+        url = reverse('api:post_list')
+        with self.assertNumQueries(1):
+            first = self.client.get(url, {'limit': 2, 'fields': 'title'}).json()
+        self.assertEqual(first['results'], [{'title': 'Post 4'}, {'title': 'Post 3'}])
+        self.assertIsNone(first['previous'])
+
+        with self.assertNumQueries(1):
+            second = self.client.get(url + first['next']).json()
+        self.assertEqual(second['results'], [{'title': 'Post 2'}, {'title': 'Post 1'}])
+
+        with self.assertNumQueries(1):
+            last = self.client.get(url + second['next']).json()
+        self.assertEqual(last['results'], [{'title': 'Post 0'}])
+        self.assertIsNone(last['next'])
+
+        with self.assertNumQueries(1):
+            back = self.client.get(url + last['previous']).json()
+        self.assertEqual(back['results'], second['results'])
+
+    def test_post_list_invalid_paging(self):
+        url = reverse('api:post_list')
+        self.assertEqual(self.client.get(url, {'limit': 500}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'after': 'not-a-cursor'}).status_code, 400)
+        # A pk beyond 64 bits must not reach the database.
+        cursor = 'MjAyNC0wMS0wMVQwMDowMDowMHw5OTk5OTk5OTk5OTk5OTk5OTk5OQ'
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, {'after': cursor}).status_code, 400)
+
+    def test_post_list_not_modified(self):
+        url = reverse('api:post_list')
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+
+    def test_post_detail(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:post_detail', args=['post-2']))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['title'], 'Post 2')
+        self.assertEqual(data['content'], 'Content 2')
+        self.assertEqual(data['category'], 'sleep')
+        self.assertIsNone(data['featured_image'])
+
+    def test_post_detail_fields(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:post_detail', args=['post-1']),
+                                       {'fields': 'title,category_name,views'})
+        self.assertEqual(response.json(), {'title': 'Post 1', 'category_name': 'Heart', 'views': 0})
+
+    def test_post_detail_not_modified(self):
+        url = reverse('api:post_detail', args=['post-1'])
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_post_detail_draft_is_not_found(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:post_detail', args=['draft']))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_category_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:category_list'))
+        self.assertEqual([category['slug'] for category in response.json()['results']], ['heart', 'sleep'])
+
+    def test_category_list_fields_and_paging(self):
+        url = reverse('api:category_list')
+        with self.assertNumQueries(1):
+            first = self.client.get(url, {'fields': 'name', 'limit': 1}).json()
+        self.assertEqual(first['results'], [{'name': 'Heart'}])
+        with self.assertNumQueries(1):
+            second = self.client.get(url + first['next']).json()
+        self.assertEqual(second['results'], [{'name': 'Sleep'}])
+        self.assertIsNone(second['next'])
+
+    def test_category_list_not_modified(self):
+        url = reverse('api:category_list')
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_read_only(self):
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user('author@example.com', 'pass-12345', user_type='doctor')
+        cls.posts = [BlogPost.objects.create(title=f'Post {i}', author=author, summary='Summary',
+                                             content='Content', status='published') for i in range(3)]
+        for views, post in enumerate(cls.posts, start=1):
+            PostStats.objects.create(post=post, views=views, score=views)
+
+    def test_rebuild_keeps_rankings(self):
+        rebuild_popular()
+        ranked = [card.post_id for card in popular_posts()['most_read']]
+        self.assertEqual(ranked, [post.pk for post in reversed(self.posts)])
+        PostCard.objects.filter(pk=self.posts[0].pk).update(title='Stale')
+
+        self.assertEqual(rebuild_cards(), 3)
+        self.assertEqual(PostCard.objects.get(pk=self.posts[0].pk).title, 'Post 0')
+        self.assertEqual(PopularPost.objects.filter(board='most_read', category_key=0).count(), 3)
+        self.assertEqual([card.post_id for card in popular_posts()['most_read']], ranked)
+
+
+@override_settings(CACHES={**settings.CACHES, settings.PAGE_CACHE_ALIAS: LOCMEM_PAGE_CACHE})
+class PostDetailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create_user(
+            'author@example.com', 'pass-12345', user_type='doctor', first_name='Asha', last_name='Rao')
+        DoctorProfile.objects.create(user=cls.author, specialization='cardiology', medical_license='LIC-1')
+        cls.post = BlogPost.objects.create(title='Post', author=cls.author, summary='Summary', content='Content',
+                                           status='published')
+
+    def setUp(self):
+        patcher = mock.patch('blog.popularity.view_counter.incr')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        pagecache.get_cache().clear()
+        pagecache.stats.reset()
+
+    def test_author_edit_changes_etag(self):
+        url = reverse('blog:blog_detail', args=[self.post.slug])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.author.first_name = 'Asha Devi'
+        self.author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Asha Devi')
+
+    def test_profile_edit_refreshes_cached_page(self):
+        url = reverse('blog:blog_detail', args=[self.post.slug])
+        self.assertContains(self.client.get(url), 'Cardiology')
+        self.assertContains(self.client.get(url), 'Cardiology')
+        self.assertEqual(pagecache.stats.snapshot()['hit'], 1)
+
+        profile = self.author.doctor_profile
+        profile.specialization = 'neurology'
+        profile.save()
+        self.assertContains(self.client.get(url), 'Neurology')
+
+    def test_unknown_category_is_not_cached(self):
+        url = reverse('blog:blog_list')
+        for _ in range(2):
+            self.assertEqual(self.client.get(url, {'category': 'no-such-category'}).status_code, 404)
+        self.assertEqual(pagecache.stats.snapshot()['hit'], 0)
+
+
+@override_settings(SYNDICATION_TOKEN_TIMEOUT=900)
+class SyndicationTokenTests(SimpleTestCase):
+    def token(self, cache):
+        with mock.patch('blog.syndication.get_cache', return_value=cache):
+            return syndication._token()
+
+    def invalidate(self, cache):
+        with mock.patch('blog.syndication.get_cache', return_value=cache):
+            syndication.invalidate()
+
+    def test_invalidation_reaches_other_processes_through_a_shared_cache(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        mine, theirs = FileBasedCache(location, {}), FileBasedCache(location, {})
+        before = self.token(theirs)
+        self.assertEqual(self.token(mine), before)
+        self.invalidate(mine)
+        self.assertNotEqual(self.token(theirs), before)
+
+    def test_token_expires_where_the_invalidation_was_missed(self):
+        mine, theirs = LocMemCache('syndication-a', {}), LocMemCache('syndication-b', {})
+        before = self.token(theirs)
+        self.invalidate(mine)
+        self.assertEqual(self.token(theirs), before)
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + 901):
+            self.assertNotEqual(self.token(theirs), before)
+
+
+# The admin templates need no collectstatic manifest.
+@override_settings(STORAGES={**settings.STORAGES, 'staticfiles': {
+    'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+class AdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser('admin@example.com', 'pass-12345')
+        author = CustomUser.objects.create_user('author@example.com', 'pass-12345', user_type='doctor')
+        cls.published = BlogPost.objects.create(title='Sleep hygiene', author=author, summary='Rest well',
+                                                content='Melatonin and circadian rhythm', status='published')
+        cls.draft = BlogPost.objects.create(title='Draft notes', author=author, summary='Unfinished',
+                                            content='More on melatonin doses')
+        BlogPost.objects.create(title='Heart health', author=author, summary='Cardio', content='Exercise',
+                                status='published')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def search(self, term):
+        response = self.client.get(reverse('admin:blog_blogpost_changelist'), {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return {post.pk for post in response.context['cl'].result_list}
+
+    def test_content_search_covers_published_posts_and_drafts(self):
+        self.assertEqual(self.search('melatonin'), {self.published.pk, self.draft.pk})
+
+    def test_summary_and_prefix_search(self):
+        self.assertEqual(self.search('rest'), {self.published.pk})
+        self.assertEqual(self.search('unfin'), {self.draft.pk})
+
+    def test_term_without_words_matches_nothing(self):
+        self.assertEqual(self.search('!!!'), set())
+
+
+@override_settings(CACHES={**settings.CACHES, settings.PAGE_CACHE_ALIAS: LOCMEM_PAGE_CACHE})
+class ListImageTests(TestCase):
+    image = 'blog_images/' + '0123456789abcdef' * 2 + '.jpg'
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user('author@example.com', 'pass-12345', user_type='doctor')
+        BlogPost.objects.create(title='Pictured', author=author, summary='Summary', content='Content',
+                                status='published', featured_image=cls.image)
+
+    def setUp(self):
+        pagecache.get_cache().clear()
+
+    def test_original_shown_until_variants_are_ready(self):
+        response = self.client.get(reverse('blog:blog_list'))
+        self.assertContains(response, f'<img src="/media/{self.image}"')
+        self.assertNotContains(response, '<picture>')
+
+    def test_variants_used_once_ready(self):
+        with mock.patch('core.templatetags.responsive_images.derivatives_ready', return_value=True):
+            response = self.client.get(reverse('blog:blog_list'))
+        self.assertContains(response, '<picture>')
+        self.assertNotContains(response, f'<img src="/media/{self.image}"')
@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+read_views = async_views if settings.ASYNC_VIEWS else views
 
 app_name = 'blog'
 
 urlpatterns = [
-    path('', views.blog_list_view, name='blog_list'),
-    path('post/<slug:slug>/', views.blog_detail_view, name='blog_detail'),
+    path('', read_views.blog_list_view, name='blog_list'),
+    path('feed.<slug:fmt>', views.feed_view, name='feed'),
+    path('search/', views.blog_search_view, name='blog_search'),
+    path('post/<slug:slug>/', read_views.blog_detail_view, name='blog_detail'),
     path('my-posts/', views.my_posts_view, name='my_posts'),
+    path('my-stats/', views.author_stats_view, name='author_stats'),
     path('create/', views.blog_create_view, name='blog_create'),
     path('update/<slug:slug>/', views.blog_update_view, name='blog_update'),
     path('delete/<slug:slug>/', views.blog_delete_view, name='blog_delete'),
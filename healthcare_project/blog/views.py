@@ -2,34 +2,211 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
-from .models import BlogPost, BlogCategory
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.http import urlencode
+from django.views.decorators.http import condition, require_safe
+from .models import BlogPost, BlogCategory, PostCard
+from core.pagecache import cache_anonymous_page, get_page_version
+from .counters import author_breakdown
 from .forms import BlogPostForm
+from .pagination import KeysetPaginator, InvalidCursor
+from .popularity import count_post_views, popular_posts
+from .search import search_posts
+from . import syndication
 
+POSTS_PER_PAGE = 12
+SEARCH_RESULTS_PER_PAGE = 20
+# Deeper pages make the search engine rank and skip every earlier match, and
+# nobody pages through a thousand results; refine the query instead.
+SEARCH_MAX_PAGES = 50
 
+
+def link_list_page(page, categories, category_slug):
+    """Attach query-string URLs for category filters and neighbouring pages."""
+    for category in categories:
+        category.list_url = '?' + urlencode({'category': category.slug})
+    base = {'category': category_slug} if category_slug else {}
+    if page.has_previous():
+        page.previous_url = '?' + urlencode({**base, 'before': page.previous_cursor})
+    if page.has_next():
+        page.next_url = '?' + urlencode({**base, 'after': page.next_cursor})
+
+
+def list_cards(categories, category_slug):
+    """Published cards for the list, filtered on the resolved category id.
+
+    Filtering on ``category_id`` (not ``category__slug``) keeps the query on
+    the ``(status, category, created_at)`` index without a join. An unknown
+    category is a 404 rather than an empty page, so made-up slugs cannot
+    fill the page cache.
+    """
+    cards = PostCard.objects.filter(status='published')
+    if category_slug:
+        category = next((c for c in categories if c.slug == category_slug), None)
+        if category is None:
+            raise Http404('No such category.')
+        cards = cards.filter(category=category)
+    return cards
+
+
+def _viewer_key(request):
+    # Pages render the navbar for the current user, so validators must too.
+    return f'u{request.user.pk}' if request.user.is_authenticated else 'anon'
+
+
+def _list_validators(request):
+    """(count, max updated_at) for the list's filter, computed once per request.
+
+    Including the count means deleting a post changes the ETag even when the
+    newest ``updated_at`` stays the same.
+    """
+    if not hasattr(request, '_blog_list_validators'):
+        posts = BlogPost.objects.filter(status='published')
+        category_slug = request.GET.get('category')
+        if category_slug:
+            posts = posts.filter(category__slug=category_slug)
+        stats = posts.aggregate(count=Count('id'), last_modified=Max('updated_at'))
+        request._blog_list_validators = (stats['count'], stats['last_modified'])
+    return request._blog_list_validators
+
+
+def _list_etag(request):
+    count, last_modified = _list_validators(request)
+    stamp = last_modified.timestamp() if last_modified else 0
+    # The page version changes when the trending/most-read rankings do.
+    return f"list-{_viewer_key(request)}-{count}-{stamp}-v{get_page_version('blog')}"
+
+
+def _list_last_modified(request):
+    return _list_validators(request)[1]
+
+
+def _detail_last_modified(request, slug):
+    if not hasattr(request, '_blog_detail_updated_at'):
+        request._blog_detail_updated_at = (BlogPost.objects.filter(slug=slug, status='published')
+                                           .values_list('updated_at', flat=True).first())
+    return request._blog_detail_updated_at
+
+
+def _detail_etag(request, slug):
+    updated_at = _detail_last_modified(request, slug)
+    if updated_at is None:
+        return None
+    # The page also shows the author, their profile and the category, whose
+    # edits bump the page version but leave the post's updated_at alone.
+    return f"post-{_viewer_key(request)}-{updated_at.timestamp()}-v{get_page_version('blog')}"
+
+
+@cache_anonymous_page('blog', query_params=('category', 'after', 'before'))
+@condition(etag_func=_list_etag, last_modified_func=_list_last_modified)
 def blog_list_view(request):
     category_slug = request.GET.get('category')
-    posts = BlogPost.objects.filter(status='published')
-    if category_slug:
-        posts = posts.filter(category__slug=category_slug)
-    categories = BlogCategory.objects.all()
+    categories = list(BlogCategory.objects.all())
+    posts = list_cards(categories, category_slug)
+    try:
+        page = KeysetPaginator(posts, per_page=POSTS_PER_PAGE).get_page(
+            after=request.GET.get('after'), before=request.GET.get('before'))
+    except InvalidCursor:
+        raise Http404('Invalid page cursor.')
+    link_list_page(page, categories, category_slug)
+    popular = popular_posts(category_slug)
     return render(request, 'blog/blog_list.html', {
-        'posts': posts, 'categories': categories, 'selected_category': category_slug
+        'posts': page, 'page': page, 'categories': categories, 'selected_category': category_slug,
+        'trending': popular['trending'], 'most_read': popular['most_read'],
+    })
+
+
+def blog_search_view(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page_number = 1
+    if page_number > SEARCH_MAX_PAGES:
+        raise Http404('No such page.')
+    offset = (page_number - 1) * SEARCH_RESULTS_PER_PAGE
+    hits = search_posts(query, limit=SEARCH_RESULTS_PER_PAGE + 1, offset=offset) if query else []
+    has_next = len(hits) > SEARCH_RESULTS_PER_PAGE and page_number < SEARCH_MAX_PAGES
+    hits = hits[:SEARCH_RESULTS_PER_PAGE]
+
+    posts = PostCard.objects.in_bulk([hit.post_id for hit in hits])
+    results = []
+    for hit in hits:
+        post = posts.get(hit.post_id)
+        if post is not None:
+            post.search_snippet = hit.snippet
+            results.append(post)
+    return render(request, 'blog/blog_search.html', {
+        'query': query, 'results': results, 'page_number': page_number,
+        'has_next': has_next, 'has_previous': page_number > 1,
     })
 
 
+@count_post_views
+@cache_anonymous_page('blog', query_params=())
+@condition(etag_func=_detail_etag, last_modified_func=_detail_last_modified)
 def blog_detail_view(request, slug):
     post = get_object_or_404(BlogPost, slug=slug, status='published')
     return render(request, 'blog/blog_detail.html', {'post': post})
 
 
+@require_safe
+def feed_view(request, fmt):
+    """Atom, RSS or JSON feed of recent posts, for one category with ``?category=``."""
+    if fmt not in syndication.FEED_FORMATS:
+        raise Http404('Unknown feed format.')
+    category_slug = request.GET.get('category')
+    # Unknown slugs 404 so arbitrary query strings cannot fill the document cache.
+    category = get_object_or_404(BlogCategory, slug=category_slug) if category_slug else None
+    name = f'feed-{category.slug}.{fmt}' if category else f'feed.{fmt}'
+
+    def generate(base):
+        feed_url = base + request.path + (f'?{urlencode({"category": category.slug})}' if category else '')
+        return syndication.generate_feed(fmt, base, feed_url, category)
+    return syndication.serve(request, name, syndication.FEED_FORMATS[fmt], generate)
+
+
+@require_safe
+def sitemap_index_view(request):
+    return syndication.serve(request, 'sitemap.xml', syndication.XML_TYPE, syndication.generate_sitemap_index)
+
+
+@require_safe
+def sitemap_pages_view(request):
+    return syndication.serve(request, 'sitemap-pages.xml', syndication.XML_TYPE, syndication.generate_sitemap_pages)
+
+
+@require_safe
+def sitemap_posts_view(request, segment):
+    return syndication.serve(request, f'sitemap-posts-{segment}.xml', syndication.XML_TYPE,
+                             lambda base: syndication.generate_sitemap_segment(segment, base))
+
+
 @login_required
 def my_posts_view(request):
     if request.user.user_type != 'doctor':
         raise PermissionDenied("Only doctors can manage posts.")
-    posts = BlogPost.objects.filter(author=request.user)
+    posts = PostCard.objects.filter(author=request.user)
     return render(request, 'blog/my_posts.html', {'posts': posts})
 
 
+@login_required
+def author_stats_view(request):
+    if request.user.user_type != 'doctor':
+        raise PermissionDenied("Only doctors have post statistics.")
+    breakdown = author_breakdown(request.user.pk)
+    names = BlogCategory.objects.in_bulk([key for key, _ in breakdown if key])
+    rows = [{
+        'category': names[key].name if key in names else 'Uncategorized',
+        'draft': counts['draft'],
+        'published': counts['published'],
+        'total': counts['draft'] + counts['published'],
+    } for key, counts in breakdown]
+    totals = {col: sum(row[col] for row in rows) for col in ('draft', 'published', 'total')}
+    return render(request, 'blog/author_stats.html', {'rows': rows, 'totals': totals})
+
+
 @login_required
 def blog_create_view(request):
     if request.user.user_type != 'doctor':
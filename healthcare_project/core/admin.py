@@ -0,0 +1,27 @@
+from django.contrib import admin
+
+from .models import DeadTask, Task, TaskMetric
+from .tasks import requeue_dead
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by']
+    list_filter = ['status', 'name']
+    ordering = ['run_at', 'pk']
+
+
+@admin.register(DeadTask)
+class DeadTaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'attempts', 'enqueued_at', 'failed_at']
+    list_filter = ['name']
+    actions = ['requeue']
+
+    @admin.action(description='Requeue selected tasks')
+    def requeue(self, request, queryset):
+        self.message_user(request, f'Requeued {requeue_dead(queryset)} tasks.')
+
+
+@admin.register(TaskMetric)
+class TaskMetricAdmin(admin.ModelAdmin):
+    list_display = ['name', 'succeeded', 'failed', 'dead', 'max_wait_ms', 'max_run_ms', 'last_run_at']
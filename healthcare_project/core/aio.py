@@ -0,0 +1,34 @@
+"""Helpers for async views on Django 4.2.
+
+The async ORM methods in 4.2 (``aget``, ``acount``...) and ``sync_to_async``
+run on the request's thread-sensitive executor. Under ASGI that is a fresh
+thread per request, so every request would open a new database connection
+and ``CONN_MAX_AGE`` would never apply; gathering such calls does not overlap
+the queries either.
+
+``independent()`` runs a block of sync ORM code on the event loop's default
+executor instead. Its threads are long-lived, so each keeps its connection
+between calls and only closes it once it is broken or older than
+``CONN_MAX_AGE``, as Django does for WSGI worker threads at the end of a
+request. Several blocks gathered with ``gather_independent()`` really run
+concurrently. Async views should do all their queries this way.
+"""
+import asyncio
+
+from django.db import connections
+
+
+def _with_own_connection(func):
+    def run():
+        for conn in connections.all(initialized_only=True):
+            conn.close_if_unusable_or_obsolete()
+        return func()
+    return run
+
+
+async def independent(func):
+    return await asyncio.to_thread(_with_own_connection(func))
+
+
+async def gather_independent(*funcs):
+    return await asyncio.gather(*(independent(f) for f in funcs))
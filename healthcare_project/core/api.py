@@ -0,0 +1,151 @@
+"""Building blocks for the read-only JSON API (``/api/``).
+
+An endpoint declares a ``FieldSet``: the public field names a client may ask
+for, each mapped to an ORM lookup. ``?fields=title,slug`` selects a subset,
+and only the selected columns (plus the paging key) are read, with
+``values()``, so rows go from the cursor to JSON as dicts without building
+model instances, and joins are only made for fields that need them.
+
+Lists are paged with the keyset cursors of ``blog.pagination``
+(``?after=``/``?before=``, ``?limit=`` up to ``MAX_LIMIT``). Every response
+carries an ETag of its body and answers a matching ``If-None-Match`` with
+304, which spares the transfer and the client's parsing.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from blog.pagination import InvalidCursor, KeysetPaginator
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class ApiError(Exception):
+    def __init__(self, field, message, code='invalid', status=400):
+        super().__init__(message)
+        self.field = field
+        self.message = message
+        self.code = code
+        self.status = status
+
+    def as_json(self):
+        return {'errors': {self.field: [{'message': self.message, 'code': self.code}]}}
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+class FieldSet:
+    """Public field names -> ORM lookups, with optional per-field converters.
+
+    ``convert`` maps a name to a callable applied to its raw column value,
+    e.g. to turn a stored file name into a URL.
+    """
+
+    def __init__(self, fields, default=None, convert=None):
+        self.fields = fields
+        self.default = tuple(default or fields)
+        self.convert = convert or {}
+
+    def select(self, request):
+        """Field names requested with ``?fields=``, or the defaults."""
+        param = request.GET.get('fields')
+        if not param:
+            return self.default
+        names = tuple(dict.fromkeys(name.strip() for name in param.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError('fields', f"Unknown field(s): {', '.join(unknown)}. "
+                                     f"Available: {', '.join(self.fields)}.")
+        return names
+
+    def values(self, queryset, names, *extra):
+        """``queryset.values()`` over the columns behind ``names`` and any ``extra`` lookups."""
+        return queryset.values(*dict.fromkeys([*extra, *(self.fields[name] for name in names)]))
+
+    def serialize(self, row, names):
+        data = {}
+        for name in names:
+            value = row[self.fields[name]]
+            convert = self.convert.get(name)
+            data[name] = convert(value) if convert else value
+        return data
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit', 'Enter a whole number.')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError('limit', f'Must be between 1 and {MAX_LIMIT}.')
+    return limit
+
+
+def _page_url(request, **cursor):
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params.update(cursor)
+    return '?' + params.urlencode()
+
+
+def paginate(request, queryset, fieldset, field, descending=True):
+    """``{'results', 'next', 'previous'}`` for one keyset page of ``queryset``."""
+    names = fieldset.select(request)
+    rows = fieldset.values(queryset, names, 'pk', field)
+    try:
+        page = KeysetPaginator(rows, per_page=_limit(request), field=field, descending=descending).get_page(
+            after=request.GET.get('after'), before=request.GET.get('before'))
+    except InvalidCursor as e:
+        raise ApiError('cursor', str(e))
+    return {
+        'results': [fieldset.serialize(row, names) for row in page],
+        'next': _page_url(request, after=page.next_cursor) if page.has_next() else None,
+        'previous': _page_url(request, before=page.previous_cursor) if page.has_previous() else None,
+    }
+
+
+def detail(request, queryset, fieldset):
+    """The single row of ``queryset`` in the requested fields; Http404 if there is none."""
+    names = fieldset.select(request)
+    rows = list(fieldset.values(queryset.order_by(), names)[:1])
+    if not rows:
+        raise Http404
+    return fieldset.serialize(rows[0], names)
+
+
+def json_response(request, data, status=200):
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    not_modified = get_conditional_response(request, etag=etag) if status == 200 else None
+    response = not_modified or HttpResponse(body, status=status, content_type='application/json')
+    response['ETag'] = etag
+    # Clients may keep responses but must revalidate them with the ETag.
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def api_view(view_func):
+    """Serve ``view_func``'s data as JSON to GET/HEAD; ApiError and Http404 become JSON errors."""
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        try:
+            data = view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return json_response(request, e.as_json(), status=e.status)
+        except Http404:
+            return json_response(request, {'errors': {'__all__': [{'message': 'Not found.', 'code': 'not_found'}]}},
+                                 status=404)
+        return json_response(request, data)
+    return _wrapped
@@ -0,0 +1,181 @@
+"""View benchmarks with query-count budgets.
+
+Every named URL in ``accounts.urls``, ``blog.urls`` and the API must have a scenario
+here; the runner fails if one is missing so new views cannot slip past the
+budgets. Budgets are absolute query counts and must hold at every dataset
+size, which is what catches N+1 regressions. Each scenario also names the
+status it must answer with, so a view that starts failing early (a 404, a
+redirect to login) cannot pass on the few queries it ran.
+
+``manage.py benchmark`` exits non-zero on a breach; ``core.tests`` runs the
+same scenarios with ``manage.py test``.
+"""
+import gc
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.urls.resolvers import URLPattern
+
+from accounts import urls as accounts_urls
+from accounts.models import CustomUser
+from blog import urls as blog_urls
+from blog.models import BlogPost
+from healthcare_project import api_urls
+
+
+@dataclass
+class Scenario:
+    url_name: str
+    max_queries: int
+    status: int = 200
+    role: str = 'anonymous'  # anonymous, doctor or patient
+    needs_slug: bool = False
+    needs_doctor: bool = False
+    url_args: tuple = ()
+    query: dict = field(default_factory=dict)
+    relogin: bool = False
+
+
+SCENARIOS = [
+    Scenario('accounts:signup', max_queries=0),
+    Scenario('accounts:login', max_queries=0),
+    Scenario('accounts:logout', max_queries=4, status=302, role='doctor', relogin=True),
+    Scenario('accounts:dashboard', max_queries=1, role='doctor'),
+    Scenario('accounts:dashboard', max_queries=1, role='patient'),
+    Scenario('accounts:doctor_directory', max_queries=2),
+    Scenario('accounts:doctor_directory', max_queries=2, query={'specialization': 'cardiology', 'sort': 'fee'}),
+    Scenario('accounts:doctor_directory_api', max_queries=2, query={'state': 'maharashtra', 'fee_max': '1500'}),
+    Scenario('accounts:profile_update', max_queries=1, role='doctor'),
+    Scenario('blog:blog_list', max_queries=4),
+    Scenario('blog:blog_search', max_queries=2, query={'q': 'heart health'}),
+    Scenario('blog:blog_detail', max_queries=5, needs_slug=True),
+    # Budgets cover regenerating the document; a cached copy needs no queries.
+    Scenario('blog:feed', max_queries=1, url_args=('atom',)),
+    Scenario('blog:feed', max_queries=1, url_args=('json',)),
+    Scenario('sitemap', max_queries=1),
+    # One query per 2,000 URLs of a full 50,000-URL segment, plus the empty final batch.
+    Scenario('sitemap_posts', max_queries=26, url_args=(0,)),
+    Scenario('api:post_list', max_queries=1),
+    Scenario('api:post_list', max_queries=1, query={'fields': 'title,slug,summary', 'limit': '50'}),
+    Scenario('api:post_detail', max_queries=1, needs_slug=True),
+    Scenario('api:post_detail', max_queries=1, needs_slug=True, query={'fields': 'title,category_name,views'}),
+    Scenario('api:category_list', max_queries=1),
+    Scenario('api:doctor_list', max_queries=1, query={'specialization': 'cardiology', 'sort': 'fee'}),
+    Scenario('api:doctor_detail', max_queries=1, needs_doctor=True, query={'fields': 'name,bio'}),
+    Scenario('blog:my_posts', max_queries=2, role='doctor'),
+    Scenario('blog:author_stats', max_queries=3, role='doctor'),
+    Scenario('blog:blog_create', max_queries=2, role='doctor'),
+    Scenario('blog:blog_update', max_queries=4, role='doctor', needs_slug=True),
+    Scenario('blog:blog_delete', max_queries=3, role='doctor', needs_slug=True),
+]
+
+URL_MODULES = [accounts_urls, blog_urls, api_urls]
+
+
+@dataclass
+class Result:
+    scenario: Scenario
+    status_codes: set
+    p50_ms: float
+    p95_ms: float
+    queries: int
+    peak_kib: float
+
+    @property
+    def over_budget(self):
+        return self.queries > self.scenario.max_queries
+
+    @property
+    def wrong_status(self):
+        return self.status_codes != {self.scenario.status}
+
+    def problems(self):
+        """Why this result fails its scenario; empty if it passes."""
+        problems = []
+        if self.wrong_status:
+            problems.append(f"status {','.join(map(str, sorted(self.status_codes)))} != {self.scenario.status}")
+        if self.over_budget:
+            problems.append(f'{self.queries} queries > {self.scenario.max_queries}')
+        return problems
+
+
+def uncovered_url_names():
+    covered = {s.url_name for s in SCENARIOS}
+    names = set()
+    for module in URL_MODULES:
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                names.add(f'{module.app_name}:{pattern.name}')
+    return sorted(names - covered)
+
+
+def _percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def _fixtures():
+    doctor = CustomUser.objects.filter(user_type='doctor', blog_posts__status='published').first()
+    patient = CustomUser.objects.filter(user_type='patient').first()
+    post = BlogPost.objects.filter(author=doctor, status='published').first()
+    return {'doctor': doctor, 'patient': patient}, post
+
+
+def run_scenario(scenario, users, post, iterations):
+    client = Client()
+    user = users.get(scenario.role)
+    if user is not None:
+        client.force_login(user)
+    if scenario.needs_slug:
+        args = [post.slug]
+    elif scenario.needs_doctor:
+        args = [users['doctor'].pk]
+    else:
+        args = list(scenario.url_args)
+    url = reverse(scenario.url_name, args=args)
+
+    # Warm-up request: fills per-process caches and lazy imports.
+    client.get(url, scenario.query)
+
+    timings, status_codes, query_counts = [], set(), []
+    for _ in range(iterations):
+        if scenario.relogin:
+            client.force_login(user)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(url, scenario.query)
+            timings.append((time.perf_counter() - start) * 1000)
+        status_codes.add(response.status_code)
+        query_counts.append(len(captured))
+
+    # Memory is measured on a separate request; tracing skews timings.
+    if scenario.relogin:
+        client.force_login(user)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        client.get(url, scenario.query)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        scenario=scenario,
+        status_codes=status_codes,
+        p50_ms=_percentile(timings, 50),
+        p95_ms=_percentile(timings, 95),
+        queries=max(query_counts),
+        peak_kib=peak / 1024,
+    )
+
+
+def run_all(iterations):
+    users, post = _fixtures()
+    return [run_scenario(s, users, post, iterations) for s in SCENARIOS]
@@ -0,0 +1,127 @@
+"""Primary/replica routing with read-your-writes pinning.
+
+Every write goes to ``default``. Reads go to a replica only inside a request
+for one of ``REPLICA_READ_VIEWS`` made with a safe method; everything else
+(other views, management commands, reads inside a transaction) reads from
+``default``. ``ReplicaRoutingMiddleware`` picks one replica per request so a
+page sees one consistent snapshot.
+
+Replicas lag the primary, so a request that writes (detected from the SQL it
+executes) sets a ``REPLICA_PIN_COOKIE`` cookie for ``REPLICA_PIN_SECONDS``.
+While it is present all of that browser's reads use the primary; a doctor who
+creates a post and is redirected to "My posts" sees it at once. The pin lives
+in a cookie rather than a shared store so every worker sees it at no cost.
+Without replicas configured the middleware removes itself at startup.
+"""
+import contextvars
+import random
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+# Models whose reads must never lag: a replica missing a fresh session would
+# log the user out.
+PRIMARY_ONLY_APPS = {'sessions'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+_write_re = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+
+class RoutingState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.read_alias = None
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('db_routing', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def _write_tracking_wrapper(execute, sql, params, many, context):
+    state = _state.get()
+    if state is not None and not state.wrote and _write_re.match(sql):
+        # Read the rest of this request, and the next few, from the primary.
+        state.read_alias = None
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def _install_write_tracking(sender, connection, **kwargs):
+    if connection.alias == DEFAULT_DB_ALIAS and _write_tracking_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_write_tracking_wrapper)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (state is None or state.read_alias is None or model._meta.app_label in PRIMARY_ONLY_APPS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return state.read_alias
+
+    def db_for_write(self, model, **hints):
+        # Also asked for validation reads, so writes are tracked from the SQL.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cookie = getattr(settings, 'REPLICA_PIN_COOKIE', 'dbpin')
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        self.read_views = set(getattr(settings, 'REPLICA_READ_VIEWS', ()))
+        connection_created.connect(_install_write_tracking)
+        for conn in connections.all(initialized_only=True):
+            _install_write_tracking(None, conn)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _finish(self, state, response):
+        if state.wrote:
+            response.set_cookie(self.cookie, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=self.cookie in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=self.cookie in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if (state is not None and not state.pinned and not state.wrote
+                and request.method in SAFE_METHODS and request.resolver_match.view_name in self.read_views):
+            state.read_alias = random.choice(replica_aliases())
@@ -0,0 +1,166 @@
+"""Streaming CSV/JSONL exports of users, patients, doctors and posts.
+
+Rows are read in keyset batches of ``chunk_size`` ordered by
+``(watermark, pk)`` and encoded into ~64 KB chunks as they are read, so memory
+use depends on ``chunk_size`` and not on the number of rows exported. Each
+batch is a fresh query, which keeps memory flat on MySQL too, where the
+driver buffers a whole result set client-side.
+
+Incremental exports select rows with ``since < watermark <= until``. ``until``
+is fixed when the export starts (it defaults to now), so rows that change
+while the export runs are left for the next one, which should pass the same
+value as its ``since``.
+"""
+import csv
+import datetime
+import io
+import json
+import zlib
+from dataclasses import dataclass, field
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from accounts.models import CustomUser
+from blog.models import BlogPost
+
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+USER_COLUMNS = (
+    ('id', 'id'), ('email', 'email'), ('first_name', 'first_name'), ('last_name', 'last_name'),
+    ('user_type', 'user_type'), ('phone', 'phone'), ('city', 'city'), ('state', 'state'),
+    ('pincode', 'pincode'), ('is_active', 'is_active'), ('date_joined', 'date_joined'),
+)
+
+
+@dataclass(frozen=True)
+class Dataset:
+    model: type
+    watermark: str
+    columns: tuple  # (header, values_list lookup)
+    filters: dict = field(default_factory=dict)
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def queryset(self):
+        return self.model.objects.filter(**self.filters)
+
+
+DATASETS = {
+    'users': Dataset(CustomUser, 'date_joined', USER_COLUMNS),
+    'patients': Dataset(CustomUser, 'date_joined', USER_COLUMNS + (
+        ('blood_group', 'patient_profile__blood_group'),
+        ('date_of_birth', 'patient_profile__date_of_birth'),
+        ('allergies', 'patient_profile__allergies'),
+        ('emergency_contact', 'patient_profile__emergency_contact'),
+    ), {'user_type': 'patient'}),
+    'doctors': Dataset(CustomUser, 'date_joined', USER_COLUMNS + (
+        ('specialization', 'doctor_profile__specialization'),
+        ('medical_license', 'doctor_profile__medical_license'),
+        ('years_of_experience', 'doctor_profile__years_of_experience'),
+        ('consultation_fee', 'doctor_profile__consultation_fee'),
+        ('qualification', 'doctor_profile__qualification'),
+    ), {'user_type': 'doctor'}),
+    'posts': Dataset(BlogPost, 'updated_at', (
+        ('id', 'id'), ('title', 'title'), ('slug', 'slug'), ('author_id', 'author_id'),
+        ('author_email', 'author__email'), ('category', 'category__slug'), ('status', 'status'),
+        ('summary', 'summary'), ('content', 'content'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    )),
+}
+
+
+def parse_watermark(value):
+    """Parse an ISO date or datetime; naive values are taken in the current time zone."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid watermark {value!r}: expected an ISO date or datetime')
+        parsed = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_rows(dataset, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Yield value tuples for ``dataset`` with ``since < watermark <= until``."""
+    mark = dataset.watermark
+    qs = dataset.queryset().filter(**{f'{mark}__lte': until or timezone.now()})
+    if since is not None:
+        qs = qs.filter(**{f'{mark}__gt': since})
+    qs = qs.order_by(mark, 'pk').values_list(mark, 'pk', *(lookup for _, lookup in dataset.columns))
+    last = None
+    while True:
+        batch = qs
+        if last is not None:
+            batch = qs.filter(Q(**{f'{mark}__gt': last[0]}) | Q(**{mark: last[0], 'pk__gt': last[1]}))
+        rows = list(batch[:chunk_size])
+        for row in rows:
+            yield row[2:]
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][:2]
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def encode_jsonl(headers, rows):
+    lines, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder, ensure_ascii=False)
+        lines.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines, size = [], 0
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+ENCODERS = {'csv': encode_csv, 'jsonl': encode_jsonl}
+
+
+def gzipped(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def filename(name, fmt, compress=False):
+    return f"{name}.{fmt}{'.gz' if compress else ''}"
+
+
+def stream(name, fmt, since=None, until=None, compress=False, chunk_size=CHUNK_SIZE):
+    """Return an iterator of bytes for dataset ``name`` in ``fmt``."""
+    dataset = DATASETS[name]
+    chunks = ENCODERS[fmt](dataset.headers, export_rows(dataset, since, until, chunk_size))
+    return gzipped(chunks) if compress else chunks
@@ -0,0 +1,227 @@
+"""Responsive image derivatives for uploaded photos.
+
+Uploads are stored under a content-hash name (see ``ContentAddressedImageField``)
+so derivatives live at a path derived from the hash alone: identical photos
+share one set of variants, and templates can build ``srcset`` URLs without a
+database lookup. Identical uploads also share the stored original, so files
+are never deleted along with a row that references them.
+
+Originals and variants are both publicly served, so neither keeps the
+upload's metadata: the original is re-encoded without EXIF (including GPS
+tags), XMP or text chunks before it is stored, and variants are re-encoded
+from pixels only.
+"""
+import hashlib
+import os
+import re
+import threading
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from django.db.models.fields.files import ImageFieldFile
+from PIL import Image, ImageOps, ImageSequence
+
+HASH_LENGTH = 32
+DERIVATIVE_ROOT = 'derivatives'
+
+# name -> target width in pixels
+VARIANTS = {
+    'thumbnail': 160,
+    'card': 480,
+    'detail': 1200,
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Formats an original is re-encoded to when its metadata is stripped, with
+# their save options; anything else is stored as PNG.
+ORIGINAL_FORMATS = {
+    'JPEG': ('.jpg', {'quality': 95, 'optimize': True}),
+    'PNG': ('.png', {'optimize': True}),
+    'WEBP': ('.webp', {'quality': 95}),
+    'GIF': ('.gif', {}),
+}
+
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'comments')
+
+_hash_re = re.compile(r'^([0-9a-f]{%d})' % HASH_LENGTH)
+_derivative_re = re.compile(r'%s/[0-9a-f]{2}/([0-9a-f]{%d})/' % (DERIVATIVE_ROOT, HASH_LENGTH))
+
+
+def content_hash(fileobj):
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def stored_format(fileobj):
+    """The format an uploaded image is stored in: its own if supported, else PNG."""
+    fileobj.seek(0)
+    with Image.open(fileobj) as image:
+        image_format = image.format
+    fileobj.seek(0)
+    return image_format if image_format in ORIGINAL_FORMATS else 'PNG'
+
+
+def strip_metadata(fileobj, pil_format):
+    """Re-encode an image as ``pil_format`` without its metadata; returns the bytes.
+
+    The EXIF orientation is applied to the pixels first, since the tag goes.
+    The ICC profile is kept: it only describes colours.
+    """
+    options = dict(ORIGINAL_FORMATS[pil_format][1])
+    fileobj.seek(0)
+    with Image.open(fileobj) as image:
+        if image.info.get('icc_profile') and pil_format != 'GIF':
+            options['icc_profile'] = image.info['icc_profile']
+        if getattr(image, 'n_frames', 1) > 1 and pil_format in ('GIF', 'WEBP'):
+            frames = [frame.copy() for frame in ImageSequence.Iterator(image)]
+        else:
+            frames = [ImageOps.exif_transpose(image)]
+        # Some encoders copy these from the source frames unless told otherwise.
+        for frame in frames:
+            for key in METADATA_KEYS:
+                frame.info.pop(key, None)
+        buffer = BytesIO()
+        frames[0].save(buffer, pil_format, save_all=len(frames) > 1, append_images=frames[1:], **options)
+    fileobj.seek(0)
+    return buffer.getvalue()
+
+
+def strip_stored_original(name, storage=None):
+    """Rewrite a stored original without its metadata, under the same name.
+
+    For uploads stored before metadata was stripped on save. Returns False
+    if the file is in a format that would have to change to be stripped.
+    """
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as f:
+        source = BytesIO(f.read())
+    with Image.open(source) as image:
+        pil_format = image.format
+    if pil_format not in ORIGINAL_FORMATS:
+        return False
+    data = strip_metadata(source, pil_format)
+    storage.delete(name)
+    storage.save(name, ContentFile(data))
+    return True
+
+
+class ContentAddressedFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        # Named after the uploaded bytes, so a repeat upload is recognised
+        # before it is re-encoded.
+        pil_format = stored_format(content)
+        name = self.field.generate_filename(
+            self.instance, f'{content_hash(content)}{ORIGINAL_FORMATS[pil_format][0]}')
+        # The same bytes were uploaded before: share that file rather than
+        # letting the storage store another copy under a suffixed name.
+        if not self.storage.exists(name):
+            name = self.storage.save(name, ContentFile(strip_metadata(content, pil_format)),
+                                     max_length=self.field.max_length)
+        self.name = name
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
+
+
+class ContentAddressedImageField(models.ImageField):
+    """ImageField that stores uploads under the SHA-256 of their content."""
+    attr_class = ContentAddressedFieldFile
+
+
+def hash_for_name(name):
+    """Return the content hash embedded in a stored file name, derivative path or URL, if any."""
+    if not name:
+        return None
+    match = _hash_re.match(os.path.basename(str(name))) or _derivative_re.search(str(name))
+    return match.group(1) if match else None
+
+
+def derivative_path(digest, variant, fmt):
+    return f'{DERIVATIVE_ROOT}/{digest[:2]}/{digest}/{variant}.{fmt}'
+
+
+def derivative_url(digest, variant, fmt):
+    return default_storage.url(derivative_path(digest, variant, fmt))
+
+
+def is_derivative(name):
+    return bool(name) and _derivative_re.search(str(name)) is not None
+
+
+def variant_url(fieldfile, variant, fmt='jpg'):
+    """URL of one variant of a stored image; '' if it has no content-hash name."""
+    digest = hash_for_name(fieldfile.name) if fieldfile else None
+    return derivative_url(digest, variant, fmt) if digest else ''
+
+
+# Hashes whose derivatives are known to exist. Derivatives are immutable, so
+# a positive answer never needs to be re-checked.
+_ready = set()
+_ready_lock = threading.Lock()
+
+
+def derivatives_ready(digest):
+    if digest in _ready:
+        return True
+    # The last file written by generate_derivatives() marks completion.
+    last_variant = list(VARIANTS)[-1]
+    last_format = list(FORMATS)[-1]
+    if default_storage.exists(derivative_path(digest, last_variant, last_format)):
+        with _ready_lock:
+            _ready.add(digest)
+        return True
+    return False
+
+
+def generate_derivatives(name, storage=None, force=False):
+    """Write every variant of a stored image; returns the content hash."""
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as source:
+        data = source.read()
+    digest = hash_for_name(name) or hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    if not force and derivatives_ready(digest):
+        return digest
+
+    with Image.open(BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+        for variant, width in VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail((width, width * 4), Image.LANCZOS)
+            for fmt, (pil_format, options) in FORMATS.items():
+                buffer = BytesIO()
+                resized.save(buffer, pil_format, **options)
+                path = derivative_path(digest, variant, fmt)
+                if storage.exists(path):
+                    storage.delete(path)
+                storage.save(path, ContentFile(buffer.getvalue()))
+    with _ready_lock:
+        _ready.add(digest)
+    return digest
+
+
+def schedule_derivatives(fieldfile):
+    """Queue derivative generation for an image (run by ``manage.py runworker``).
+
+    The task is written in the caller's transaction, so it is dropped if the
+    upload's row is rolled back.
+    """
+    # Imported here: model modules import this one, and core.tasks imports models.
+    from .tasks import enqueue
+
+    if not fieldfile:
+        return
+    digest = hash_for_name(fieldfile.name)
+    if digest and derivatives_ready(digest):
+        return
+    enqueue(generate_derivatives, fieldfile.name)
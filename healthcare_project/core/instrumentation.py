@@ -0,0 +1,206 @@
+"""Per-request SQL, template and view timing.
+
+``RequestProfilingMiddleware`` adds a ``Server-Timing`` header to every
+response and remembers requests slower than ``REQUEST_PROFILING_SLOW_MS`` in a
+bounded ring buffer (shown at ``/ops/slow-requests/``). When
+``REQUEST_PROFILING_ENABLED`` is false the middleware removes itself from the
+stack at startup, so it costs nothing.
+"""
+import contextvars
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+_literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def fingerprint(sql):
+    """Normalise a statement so repeats with different literals collide."""
+    normalised = _literal_re.sub('?', sql)
+    return hashlib.md5(normalised.encode()).hexdigest()[:12], normalised
+
+
+class RequestProfile:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.view_time = 0.0
+        self.total_time = 0.0
+        self._template_depth = 0
+        self._fingerprints = Counter()
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def record_query(self, sql, elapsed):
+        key, normalised = fingerprint(sql)
+        with self._lock:
+            self.queries += 1
+            self.sql_time += elapsed
+            self._fingerprints[key] += 1
+            self._statements.setdefault(key, normalised)
+
+    def duplicates(self):
+        return [
+            {'fingerprint': key, 'count': count, 'sql': self._statements[key][:500]}
+            for key, count in self._fingerprints.most_common() if count > 1
+        ]
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+    def as_dict(self):
+        return {
+            'method': self.method,
+            'path': self.path,
+            'total_ms': round(self.total_time * 1000, 2),
+            'view_ms': round(self.view_time * 1000, 2),
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'queries': self.queries,
+            'duplicate_queries': self.duplicates(),
+        }
+
+
+class SlowRequestLog:
+    """Bounded ring buffer of the most recent slow requests."""
+
+    def __init__(self, maxlen):
+        self._entries = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def slowest(self):
+        with self._lock:
+            entries = list(self._entries)
+        return sorted(entries, key=lambda e: e['total_ms'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_requests = SlowRequestLog(getattr(settings, 'REQUEST_PROFILING_BUFFER_SIZE', 100))
+
+_original_template_render = Template.render
+
+
+def _timed_template_render(self, context):
+    profile = _current.get()
+    if profile is None:
+        return _original_template_render(self, context)
+    # Only the outermost render is timed; includes are part of it.
+    profile._template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_template_render(self, context)
+    finally:
+        profile._template_depth -= 1
+        if profile._template_depth == 0:
+            profile.template_time += time.perf_counter() - start
+
+
+def _profiling_execute_wrapper(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, time.perf_counter() - start)
+
+
+def _install_execute_wrapper(sender, connection, **kwargs):
+    # Installed on every connection rather than per request: async views run
+    # queries on executor threads with their own connections, and the
+    # profile reaches them through the copied contextvar.
+    if _profiling_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profiling_execute_wrapper)
+
+
+class RequestProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 1.0)
+        self.slow_threshold = getattr(settings, 'REQUEST_PROFILING_SLOW_MS', 500) / 1000
+        Template.render = _timed_template_render
+        connection_created.connect(_install_execute_wrapper)
+        for conn in connections.all(initialized_only=True):
+            _install_execute_wrapper(None, conn)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def _start(self, request):
+        profile = RequestProfile(request.method, request.path)
+        request._profile = profile
+        return profile, _current.set(profile)
+
+    def _finish(self, profile, response):
+        finished = time.perf_counter()
+        profile.total_time = finished - profile.started
+        if profile.view_started is not None:
+            profile.view_time = finished - profile.view_started
+        response['Server-Timing'] = profile.server_timing()
+        if profile.total_time >= self.slow_threshold:
+            slow_requests.add(profile.as_dict())
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        profile, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(profile, response)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        profile, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(profile, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, '_profile', None)
+        if profile is not None:
+            profile.view_started = time.perf_counter()
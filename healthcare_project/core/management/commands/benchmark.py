@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment, override_settings
+
+from core import benchmarks
+from core.seeding import seed
+from blog.models import BlogPost
+
+DUMMY_PAGE_CACHE = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every accounts/blog view at several dataset sizes and enforce query budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,5000',
+                            help='Comma-separated total post counts to benchmark at')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--with-page-cache', action='store_true',
+                            help='Leave the anonymous page cache on (default measures uncached renders)')
+
+    def handle(self, *args, **options):
+        uncovered = benchmarks.uncovered_url_names()
+        if uncovered:
+            raise CommandError(f"No benchmark scenario for: {', '.join(uncovered)}")
+
+        sizes = sorted(int(s) for s in options['sizes'].split(','))
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            failures = self._run(sizes, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f'{len(failures)} scenario(s) failed: ' + '; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All views within query budgets'))
+
+    def _run(self, sizes, options):
+        from django.conf import settings
+        caches = dict(settings.CACHES)
+        if not options['with_page_cache']:
+            caches[settings.PAGE_CACHE_ALIAS] = DUMMY_PAGE_CACHE
+
+        failures = []
+        with override_settings(CACHES=caches, ALLOWED_HOSTS=['testserver']):
+            for size in sizes:
+                existing = BlogPost.objects.count()
+                seed(doctors=max(5, (size - existing) // 20), patients=max(5, (size - existing) // 5),
+                     categories=0 if existing else 8, posts=size - existing)
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{size} posts'))
+                self.stdout.write(f"{'view':<28} {'role':<10} {'status':<8} {'p50 ms':>8} "
+                                  f"{'p95 ms':>8} {'queries':>8} {'budget':>7} {'peak KiB':>9}")
+                for result in benchmarks.run_all(options['iterations']):
+                    scenario = result.scenario
+                    line = (f"{scenario.url_name:<28} {scenario.role:<10} "
+                            f"{','.join(map(str, sorted(result.status_codes))):<8} "
+                            f"{result.p50_ms:>8.1f} {result.p95_ms:>8.1f} {result.queries:>8} "
+                            f"{scenario.max_queries:>7} {result.peak_kib:>9.0f}")
+                    problems = result.problems()
+                    if problems:
+                        failures.append(f'{scenario.url_name} ({scenario.role}) at {size} posts: '
+                                        + ', '.join(problems))
+                        self.stdout.write(self.style.ERROR(line))
+                    else:
+                        self.stdout.write(line)
+        return failures
@@ -0,0 +1,140 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment, override_settings
+
+from accounts import views as account_views, async_views as account_async_views
+from accounts.models import CustomUser
+from blog import views as blog_views, async_views as blog_async_views
+from blog.models import BlogPost
+from core.seeding import seed
+
+DUMMY_PAGE_CACHE = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+_latency = 0.0
+
+
+def _simulated_latency(execute, sql, params, many, context):
+    if _latency:
+        time.sleep(_latency)
+    return execute(sql, params, many, context)
+
+
+def _install_latency(sender, connection, **kwargs):
+    connection.execute_wrappers.append(_simulated_latency)
+
+
+class Command(BaseCommand):
+    help = 'Compare sync (WSGI-style threads) and async (ASGI) read views at a fixed worker count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Threads for the sync run; executor threads for the async run')
+        parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight at once')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--db-latency-ms', type=float, default=0,
+                            help='Sleep added to every query to mimic a networked database')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        caches = dict(settings.CACHES)
+        caches[settings.PAGE_CACHE_ALIAS] = DUMMY_PAGE_CACHE
+        try:
+            with override_settings(CACHES=caches):
+                seed(doctors=max(5, options['posts'] // 20), patients=5, categories=8, posts=options['posts'])
+                self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, options):
+        factory = RequestFactory()
+        doctor = CustomUser.objects.filter(user_type='doctor', blog_posts__isnull=False).first()
+        slug = BlogPost.objects.filter(status='published').values_list('slug', flat=True).first()
+
+        def request_for(path, user=None):
+            request = factory.get(path)
+            request.user = user or AnonymousUser()
+            return request
+
+        cases = [
+            ('blog_list', lambda: request_for('/blog/'), (blog_views.blog_list_view, ()),
+             (blog_async_views.blog_list_view, ())),
+            ('blog_detail', lambda: request_for(f'/blog/post/{slug}/'), (blog_views.blog_detail_view, (slug,)),
+             (blog_async_views.blog_detail_view, (slug,))),
+            ('dashboard', lambda: request_for('/accounts/dashboard/', doctor),
+             (account_views.dashboard_view, ()), (account_async_views.dashboard_view, ())),
+        ]
+        global _latency
+        _latency = options['db_latency_ms'] / 1000
+        # Worker threads open their own connections; each gets the wrapper.
+        connection_created.connect(_install_latency)
+        for conn in connections.all(initialized_only=True):
+            _install_latency(None, conn)
+
+        self.stdout.write(f"{'view':<12} {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        try:
+            for name, make_request, (sync_view, args), (async_view, async_args) in cases:
+                for mode, runner in (('sync', self._run_sync), ('async', self._run_async)):
+                    view, view_args = (sync_view, args) if mode == 'sync' else (async_view, async_args)
+                    elapsed, timings = runner(view, view_args, make_request, options)
+                    timings.sort()
+                    self.stdout.write(
+                        f"{name:<12} {mode:<6} {len(timings) / elapsed:>8.1f} "
+                        f"{statistics.median(timings):>8.1f} {timings[int(len(timings) * 0.95) - 1]:>8.1f}")
+        finally:
+            connection_created.disconnect(_install_latency)
+
+    # Both runs keep ``--concurrency`` requests in flight on ``--workers``
+    # threads and time each request from when it is issued, so queueing for a
+    # thread counts against both alike.
+
+    def _run_sync(self, view, args, make_request, options):
+        in_flight = threading.BoundedSemaphore(options['concurrency'])
+        timings = []
+
+        def one(issued):
+            try:
+                view(make_request(), *args)
+                timings.append((time.perf_counter() - issued) * 1000)
+            finally:
+                in_flight.release()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for _ in range(options['requests']):
+                in_flight.acquire()
+                pool.submit(one, time.perf_counter())
+        return time.perf_counter() - start, timings
+
+    def _run_async(self, view, args, make_request, options):
+        async def one(semaphore):
+            async with semaphore:
+                start = time.perf_counter()
+                # As Django's ASGIHandler does for every request.
+                async with ThreadSensitiveContext():
+                    await view(make_request(), *args)
+                return (time.perf_counter() - start) * 1000
+
+        async def main():
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=options['workers']))
+            semaphore = asyncio.Semaphore(options['concurrency'])
+            return await asyncio.gather(*(one(semaphore) for _ in range(options['requests'])))
+
+        start = time.perf_counter()
+        timings = asyncio.run(main())
+        return time.perf_counter() - start, list(timings)
@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment, CaptureQueriesContext
+
+from accounts.geo import haversine_km, nearest_listings
+from accounts.models import DoctorListing, Pincode
+from core.seeding import seed
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the nearest-doctor grid lookup against a full scan on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pincodes', type=int, default=150000)
+        parser.add_argument('--doctors', type=int, default=500000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--scan-queries', type=int, default=5,
+                            help='Queries also answered by a full scan, to check results and compare cost')
+        parser.add_argument('-k', type=int, default=10)
+        parser.add_argument('--radius', type=float, default=25)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            start = time.perf_counter()
+            seed(doctors=options['doctors'], pincodes=options['pincodes'], batch_size=5000)
+            self.stdout.write(f"Seeded {options['pincodes']} pincodes and {options['doctors']} doctors "
+                              f"in {time.perf_counter() - start:.0f}s")
+            self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, options):
+        rng = random.Random(1)
+        origins = [tuple(p) for p in rng.sample(
+            list(Pincode.objects.values_list('latitude', 'longitude')), options['queries'])]
+        k, radius = options['k'], options['radius']
+
+        timings, queries, found = [], [], []
+        for lat, lon in origins:
+            # The query log is capped; seeding fills it.
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                results = nearest_listings(lat, lon, k=k, radius_km=radius)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+            found.append(len(results))
+        timings.sort()
+        self.stdout.write(
+            f"grid lookup  p50 {statistics.median(timings):.1f} ms  p95 {timings[int(len(timings) * 0.95) - 1]:.1f} ms  "
+            f"queries/lookup {statistics.mean(queries):.1f}  avg results {statistics.mean(found):.1f}/{k}")
+
+        mismatches, scan_timings = 0, []
+        for lat, lon in origins[:options['scan_queries']]:
+            start = time.perf_counter()
+            scanned = sorted(
+                (d, pk) for pk, plat, plon in DoctorListing.objects.exclude(latitude=None)
+                .values_list('pk', 'latitude', 'longitude').iterator(chunk_size=10000)
+                if (d := haversine_km(lat, lon, plat, plon)) <= radius)[:k]
+            scan_timings.append((time.perf_counter() - start) * 1000)
+            grid = [round(d, 6) for _, d in nearest_listings(lat, lon, k=k, radius_km=radius)]
+            mismatches += grid != [round(d, 6) for d, _ in scanned]
+        if scan_timings:
+            self.stdout.write(f"full scan    p50 {statistics.median(scan_timings):.1f} ms  "
+                              f"({len(scan_timings)} queries, {mismatches} result mismatches)")
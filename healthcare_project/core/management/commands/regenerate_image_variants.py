@@ -0,0 +1,50 @@
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from blog.models import BlogPost
+from core.images import generate_derivatives, hash_for_name, strip_stored_original
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image variants for existing uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild variants even if they already exist')
+        parser.add_argument('--strip-metadata', action='store_true',
+                            help='Also rewrite stored originals without their EXIF/GPS metadata '
+                                 '(uploads made before it was stripped on save)')
+
+    def handle(self, *args, **options):
+        sources = [
+            (BlogPost.objects.exclude(featured_image=''), 'featured_image'),
+            (CustomUser.objects.exclude(profile_image=''), 'profile_image'),
+        ]
+        done = failed = 0
+        for queryset, field_name in sources:
+            queryset = queryset.exclude(**{f'{field_name}__isnull': True}).only('pk', field_name)
+            for obj in queryset.iterator(chunk_size=500):
+                fieldfile = getattr(obj, field_name)
+                try:
+                    if not hash_for_name(fieldfile.name):
+                        fieldfile = self._rename_to_content_hash(obj, field_name, fieldfile)
+                    elif options['strip_metadata'] and not strip_stored_original(fieldfile.name):
+                        self.stdout.write(self.style.WARNING(f'{fieldfile.name}: format not supported, '
+                                                             f'metadata left in place'))
+                    generate_derivatives(fieldfile.name, force=options['force'])
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'{fieldfile.name}: {e}'))
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {done} images ({failed} failed)'))
+
+    def _rename_to_content_hash(self, obj, field_name, fieldfile):
+        # Legacy uploads predate content-addressed names; store a copy under
+        # the hashed name (without metadata) so templates can locate variants
+        # from the name.
+        with fieldfile.open('rb') as f:
+            data = f.read()
+        setattr(obj, field_name, ContentFile(data, name=fieldfile.name.rsplit('/', 1)[-1]))
+        obj.save(update_fields=[field_name])
+        return getattr(obj, field_name)
@@ -0,0 +1,74 @@
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.tasks import Worker
+
+
+def _run_process(options, once):
+    # Spawned (non-forked) workers start without the app registry.
+    django.setup()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    Worker(batch_size=options['batch_size'], poll_interval=options['poll_interval']).run(stop, once=once)
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks from the database queue (see core/tasks.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'TASK_WORKERS', 2),
+                            help='Tasks run at once')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Threads suit I/O-bound tasks; processes sidestep the GIL for CPU-bound ones')
+        parser.add_argument('--batch-size', type=int, default=1, help='Tasks each worker claims at a time')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds an idle worker waits before looking again (default: TASK_POLL_INTERVAL)')
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        workers = max(options['workers'], 1)
+        self.stdout.write(f"Starting {workers} {options['pool']} workers")
+        if options['pool'] == 'process':
+            # Children must open their own connections.
+            connections.close_all()
+            processes = [multiprocessing.Process(target=_run_process, args=(options, options['once']), daemon=True)
+                         for _ in range(workers)]
+            for process in processes:
+                process.start()
+            signal.signal(signal.SIGTERM, lambda *args: [p.terminate() for p in processes])
+            try:
+                for process in processes:
+                    process.join()
+            except KeyboardInterrupt:
+                # Ctrl-C reached the children too; let them finish their current task.
+                for process in processes:
+                    process.join()
+            return
+
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        pool = [Worker(batch_size=options['batch_size'], poll_interval=options['poll_interval'])
+                for _ in range(workers)]
+        threads = [threading.Thread(target=worker.run, args=(stop, options['once']), name=f'task-worker-{n}')
+                   for n, worker in enumerate(pool)]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping after the tasks in progress')
+            stop.set()
+            for thread in threads:
+                thread.join()
+        succeeded = sum(worker.succeeded for worker in pool)
+        failed = sum(worker.failed for worker in pool)
+        self.stdout.write(self.style.SUCCESS(f'Ran {succeeded + failed} tasks ({failed} failed)'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.seeding import seed, SEED_PASSWORD
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic doctors, patients, categories and posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=50)
+        parser.add_argument('--patients', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=8)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--pincodes', type=int, default=0, help='Synthetic pincodes with coordinates')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for reproducible data')
+
+    def handle(self, *args, **options):
+        try:
+            seed(doctors=options['doctors'], patients=options['patients'],
+                 categories=options['categories'], posts=options['posts'],
+                 pincodes=options['pincodes'], batch_size=options['batch_size'], random_seed=options['seed'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['doctors']} doctors, {options['patients']} patients, "
+            f"{options['categories']} categories and {options['posts']} posts "
+            f"(password: {SEED_PASSWORD})"
+        ))
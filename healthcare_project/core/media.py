@@ -0,0 +1,208 @@
+"""Serving uploaded media from ``MEDIA_ROOT``.
+
+``serve_media`` first collapses ``.`` and ``..`` segments (refusing paths
+that would leave ``MEDIA_ROOT``), so ``blog_images/../private/x`` is checked
+as ``private/x``. It then checks the path against ``MEDIA_ACCESS`` (prefix ->
+permission hook), and either streams the file itself or, with
+``MEDIA_OFFLOAD`` set, returns an empty response carrying
+``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` (Apache, lighttpd) so the
+proxy sends the bytes. Either way the worker never holds a file in memory.
+
+When streaming, conditional GET uses an ETag and Last-Modified taken from the
+file's size and mtime. A single ``Range`` (including ``If-Range``) is answered
+with 206, and the body goes through ``FileResponse`` in ``MEDIA_CHUNK_SIZE``
+blocks; whole files are handed to the WSGI server's ``sendfile``. Uploads are
+stored under content hashes (``core.images``), so those names are cached as
+immutable.
+
+A permission hook is a dotted path to ``hook(request, path) -> bool``, or None
+for public media. Paths under no configured prefix are not served.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.utils.module_loading import import_string
+
+from .images import hash_for_name
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+_range_re = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def staff_only(request, path):
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def authenticated(request, path):
+    return request.user.is_authenticated
+
+
+def _access_hook(path):
+    """Return ``(configured, hook)`` for the longest matching prefix."""
+    rules = getattr(settings, 'MEDIA_ACCESS', {})
+    prefix = max((p for p in rules if path.startswith(p)), key=len, default=None)
+    if prefix is None:
+        return False, None
+    hook = rules[prefix]
+    return True, import_string(hook) if isinstance(hook, str) else hook
+
+
+def _resolve(path):
+    """``path`` with dot segments collapsed, or None if it climbs out of the media root."""
+    resolved = posixpath.normpath(path)
+    if resolved.startswith('/') or resolved == '.' or '..' in resolved.split('/'):
+        return None
+    return resolved
+
+
+def _content_addressed(path):
+    # Uploads are named by their hash; derivatives live in a directory named by it.
+    return bool(hash_for_name(path) or hash_for_name(os.path.dirname(path)))
+
+
+def parse_range(header, size):
+    """``(start, end)`` inclusive for a single byte range, None to send the whole file.
+
+    Raises ValueError if the range cannot be satisfied.
+    """
+    match = _range_re.match(header.strip())
+    if not match or not any(match.groups()):
+        # Absent, malformed or multi-range: serve the full entity.
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the final N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('range starts past the end of the file')
+    return start, end
+
+
+class RangeFile:
+    """Read-only view of ``length`` bytes of ``f`` starting at ``start``."""
+
+    def __init__(self, f, start, length):
+        self.f = f
+        self.remaining = length
+        f.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and int(mtime) <= date
+
+
+def _offload(path, content_type):
+    response = HttpResponse(content_type=content_type)
+    mode = settings.MEDIA_OFFLOAD
+    if mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/') + quote(path)
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = safe_join(settings.MEDIA_ROOT, path)
+    else:
+        raise ValueError(f'Unknown MEDIA_OFFLOAD mode {mode!r}')
+    return response
+
+
+def serve_media(request, path):
+    # Resolve before the prefix lookup: rules must see the path that is opened.
+    path = _resolve(path)
+    if path is None:
+        raise Http404('Not found')
+    configured, hook = _access_hook(path)
+    if not configured:
+        raise Http404('Not found')
+    if hook is not None and not hook(request, path):
+        if not request.user.is_authenticated:
+            raise Http404('Not found')
+        raise PermissionDenied
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponse(status=405, headers={'Allow': 'GET, HEAD'})
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    if getattr(settings, 'MEDIA_OFFLOAD', ''):
+        response = _offload(path, content_type)
+    else:
+        response = _stream(request, full_path, stat, content_type)
+
+    if hook is not None:
+        response['Cache-Control'] = 'private, no-cache'
+    elif _content_addressed(path):
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response['Cache-Control'] = f"public, max-age={getattr(settings, 'MEDIA_MAX_AGE', 3600)}"
+    return response
+
+
+def _stream(request, full_path, stat, content_type):
+    size = stat.st_size
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{size:x}')
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+
+    byte_range = None
+    if _if_range_matches(request, etag, stat.st_mtime):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE', ''), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        f = open(full_path, 'rb')
+        response = FileResponse(f if byte_range is None else RangeFile(f, start, length), content_type=content_type)
+        response.block_size = getattr(settings, 'MEDIA_CHUNK_SIZE', 64 * 1024)
+        response.headers.pop('Content-Disposition', None)
+    if byte_range is not None:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = length
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -0,0 +1,77 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """A queued call to ``name(*args, **kwargs)``; see ``core.tasks``.
+
+    Rows are deleted once the call succeeds, so the table only holds work
+    that is due, waiting for a retry or running.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+    )
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    enqueued_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_due'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, attempt {self.attempts})"
+
+
+class DeadTask(models.Model):
+    """A task that failed ``max_attempts`` times, kept for inspection or requeueing."""
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    attempts = models.PositiveSmallIntegerField()
+    enqueued_at = models.DateTimeField()
+    failed_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-failed_at']
+
+    def __str__(self):
+        return f"{self.name} (dead after {self.attempts} attempts)"
+
+
+class TaskMetric(models.Model):
+    """Running totals per task name, written by workers after every attempt.
+
+    ``wait_ms`` is the time a task sat due before a worker claimed it and
+    ``run_ms`` how long the call took.
+    """
+
+    name = models.CharField(max_length=200, unique=True)
+    succeeded = models.PositiveBigIntegerField(default=0)
+    failed = models.PositiveBigIntegerField(default=0)
+    dead = models.PositiveBigIntegerField(default=0)
+    wait_ms = models.PositiveBigIntegerField(default=0)
+    run_ms = models.PositiveBigIntegerField(default=0)
+    max_wait_ms = models.PositiveBigIntegerField(default=0)
+    max_run_ms = models.PositiveBigIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,239 @@
+"""Full-page cache for anonymous visitors.
+
+Entries are stored in the ``PAGE_CACHE_ALIAS`` cache under a per-namespace
+version, so ``bump_page_version('blog')`` invalidates every page of that
+namespace at once without enumerating keys.
+
+Each entry carries a soft expiry. After it passes, one request takes a short
+lock and re-renders while concurrent requests keep receiving the stale copy;
+on a cold miss, requests that lose the lock wait briefly for the winner
+instead of all hitting the database (single-flight regeneration).
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from .aio import independent
+
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class PageCacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {'hit': 0, 'stale': 0, 'miss': 0, 'wait': 0, 'bypass': 0}
+
+    def incr(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        served = counts['hit'] + counts['stale'] + counts['wait']
+        lookups = served + counts['miss']
+        counts['hit_ratio'] = round(served / lookups, 4) if lookups else None
+        return counts
+
+
+stats = PageCacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'pages')]
+
+
+def _version_key(namespace):
+    return f'pagecache:{namespace}:version'
+
+
+def get_page_version(namespace):
+    cache = get_cache()
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, timeout=None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def bump_page_version(namespace):
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, timeout=None)
+
+
+def _page_key(namespace, request, query_params):
+    parts = [request.path] + [f'{p}={request.GET.get(p, "")}' for p in query_params]
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return f'pagecache:{namespace}:v{get_page_version(namespace)}:{digest}'
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Pending flash messages are rendered into the page.
+    return len(get_messages(request)) == 0
+
+
+def _serialize(response):
+    return {
+        'content': response.content,
+        'status': response.status_code,
+        'headers': {h: response[h] for h in CACHED_HEADERS if response.has_header(h)},
+    }
+
+
+def _build_response(request, entry):
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers'].items():
+        response[header] = value
+    patch_vary_headers(response, ('Cookie',))
+    last_modified = parse_http_date_safe(entry['headers'].get('Last-Modified', ''))
+    return get_conditional_response(
+        request, etag=entry['headers'].get('ETag'), last_modified=last_modified, response=response)
+
+
+def _store(cache, key, response, ttl, lock_ttl):
+    if response.status_code == 200 and not response.streaming:
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        entry = _serialize(response)
+        entry['fresh_until'] = time.time() + ttl
+        # Keep the copy past its soft expiry so it can be served stale
+        # while one request regenerates it.
+        cache.set(key, entry, timeout=ttl * 2 + lock_ttl)
+    patch_vary_headers(response, ('Cookie',))
+
+
+def cache_anonymous_page(namespace, query_params=('category',), timeout=None):
+    """Cache a view's response for anonymous GETs.
+
+    The key is the request path plus the listed query parameters. Only 200
+    responses are stored, so a view should answer 404 for parameter values it
+    cannot resolve rather than render an empty page that would be cached.
+    Works for both sync and async views.
+    """
+    def decorator(view_func):
+        def _prepare(request):
+            if not _is_cacheable_request(request):
+                return None
+            return _page_key(namespace, request, query_params)
+
+        def _settings():
+            return (timeout or getattr(settings, 'PAGE_CACHE_TIMEOUT', 300),
+                    getattr(settings, 'PAGE_CACHE_LOCK_TIMEOUT', 10),
+                    getattr(settings, 'PAGE_CACHE_WAIT_TIMEOUT', 2))
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped(request, *args, **kwargs):
+                cache = get_cache()
+                ttl, lock_ttl, wait = _settings()
+
+                # The session/user load and the cache round-trips are blocking,
+                # so they share one hop onto a pooled connection.
+                def lookup():
+                    key = _prepare(request)
+                    if key is None:
+                        return None, None, True, False
+                    entry = cache.get(key)
+                    if entry is not None and entry['fresh_until'] > time.time():
+                        return key, entry, True, False
+                    return key, entry, False, cache.add(f'{key}:lock', 1, timeout=lock_ttl)
+
+                now = time.time()
+                key, entry, fresh, have_lock = await independent(lookup)
+                if key is None:
+                    stats.incr('bypass')
+                    return await view_func(request, *args, **kwargs)
+                lock_key = f'{key}:lock'
+
+                if fresh:
+                    stats.incr('hit')
+                    return _build_response(request, entry)
+
+                if not have_lock:
+                    if entry is not None:
+                        stats.incr('stale')
+                        return _build_response(request, entry)
+                    while time.time() < now + wait:
+                        await asyncio.sleep(0.05)
+                        entry = await independent(lambda: cache.get(key))
+                        if entry is not None:
+                            stats.incr('wait')
+                            return _build_response(request, entry)
+
+                def finish(response):
+                    try:
+                        if response is not None:
+                            _store(cache, key, response, ttl, lock_ttl)
+                    finally:
+                        if have_lock:
+                            cache.delete(lock_key)
+
+                stats.incr('miss')
+                response = None
+                try:
+                    response = await view_func(request, *args, **kwargs)
+                    return response
+                finally:
+                    await independent(lambda: finish(response))
+            return _wrapped
+
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            key = _prepare(request)
+            if key is None:
+                stats.incr('bypass')
+                return view_func(request, *args, **kwargs)
+
+            cache = get_cache()
+            ttl, lock_ttl, wait = _settings()
+            lock_key = f'{key}:lock'
+
+            entry = cache.get(key)
+            now = time.time()
+            if entry is not None and entry['fresh_until'] > now:
+                stats.incr('hit')
+                return _build_response(request, entry)
+
+            have_lock = cache.add(lock_key, 1, timeout=lock_ttl)
+            if not have_lock:
+                if entry is not None:
+                    stats.incr('stale')
+                    return _build_response(request, entry)
+                while time.time() < now + wait:
+                    time.sleep(0.05)
+                    entry = cache.get(key)
+                    if entry is not None:
+                        stats.incr('wait')
+                        return _build_response(request, entry)
+
+            stats.incr('miss')
+            try:
+                response = view_func(request, *args, **kwargs)
+                _store(cache, key, response, ttl, lock_ttl)
+                return response
+            finally:
+                if have_lock:
+                    cache.delete(lock_key)
+        return _wrapped
+    return decorator
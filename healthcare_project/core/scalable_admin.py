@@ -0,0 +1,98 @@
+"""Admin changelists that stay usable on very large tables.
+
+``ScalableAdminMixin`` changes three things about a ``ModelAdmin``:
+
+* Counts. An unfiltered changelist takes its row count from table statistics
+  once the table is larger than ``estimated_count_threshold`` (default
+  ``ADMIN_ESTIMATED_COUNT_THRESHOLD``), and the second
+  "N total" count is switched off. Filtered changelists still count exactly,
+  since filters are expected to hit an index.
+* Columns. ``deferred_fields`` are left out of the changelist query (the
+  change form still loads them), and ``list_select_related`` should name
+  every relation shown in ``list_display``.
+* Search. ``search_mode`` rewrites ``search_fields`` into lookups that can use
+  an index: ``'prefix'`` (``istartswith``), ``'exact'`` (``iexact``) or
+  ``'fulltext'``, for which the admin defines ``fulltext_search_ids(term)``
+  returning the matching primary keys from its own full-text index (see
+  ``BlogPostAdmin``). ``'contains'`` keeps Django's unindexed ``icontains``.
+"""
+from django.conf import settings
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+SEARCH_PREFIXES = {'prefix': '^', 'exact': '=', 'contains': ''}
+
+
+def estimated_row_count(model, using):
+    """Row count from table statistics, or None when the database has none."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [connection.ops.quote_name(table)])
+        elif connection.vendor == 'mysql':
+            cursor.execute('SELECT table_rows FROM information_schema.tables '
+                           'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+        elif connection.vendor == 'sqlite':
+            # SQLite keeps no row count; the largest rowid is an upper bound
+            # read from the end of the table's b-tree.
+            cursor.execute(f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}')
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for a table that has never been analyzed.
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    estimate_threshold = None
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if self.estimate_threshold is not None and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+class ScalableChangeList(ChangeList):
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        if self.model_admin.deferred_fields:
+            queryset = queryset.defer(*self.model_admin.deferred_fields)
+        return queryset
+
+
+class ScalableAdminMixin:
+    estimated_count_threshold = None
+    deferred_fields = ()
+    search_mode = 'prefix'
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        return ScalableChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator = super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+        paginator.estimate_threshold = (self.estimated_count_threshold
+                                        if self.estimated_count_threshold is not None
+                                        else getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000))
+        return paginator
+
+    def get_search_fields(self, request):
+        fields = super().get_search_fields(request)
+        if self.search_mode not in SEARCH_PREFIXES:
+            return fields
+        prefix = SEARCH_PREFIXES[self.search_mode]
+        return [field if field[0] in '^=@' else prefix + field for field in fields]
+
+    def get_search_results(self, request, queryset, search_term):
+        if self.search_mode != 'fulltext' or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=self.fulltext_search_ids(search_term.strip())), False
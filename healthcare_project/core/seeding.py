@@ -0,0 +1,127 @@
+"""Synthetic data for load tests and benchmarks.
+
+Everything is written with ``bulk_create``, which skips ``save()`` and model
+signals, so the derived tables (doctor listings, post cards, author counts, search index) are rebuilt in bulk
+at the end instead of row by row.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils.text import slugify
+
+from accounts.directory import rebuild_listings
+from accounts.models import CustomUser, PatientProfile, DoctorProfile, Pincode
+from blog.cards import rebuild_cards
+from blog.counters import reconcile_counts
+from blog.models import BlogCategory, BlogPost
+from blog.search import get_backend
+from core.pagecache import bump_page_version
+
+SEED_PASSWORD = 'seed-password-123'
+CITIES = [('Mumbai', 'Maharashtra'), ('Pune', 'Maharashtra'), ('Delhi', 'Delhi'),
+          ('Bengaluru', 'Karnataka'), ('Chennai', 'Tamil Nadu'), ('Kolkata', 'West Bengal')]
+# India's bounding box; most synthetic pincodes cluster around city centres.
+LATITUDES, LONGITUDES = (8.0, 35.0), (68.5, 97.0)
+CITY_CENTRES = 60
+WORDS = ('health heart care patient doctor sleep diet exercise vaccine immunity stress '
+         'blood pressure diabetes therapy recovery symptoms treatment clinic wellness').split()
+
+
+def _sentence(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+def _seed_pincodes(count, rng, batch_size):
+    # Seven digits, so synthetic codes never collide with real six-digit pincodes.
+    start = Pincode.objects.filter(district='Seed').count()
+    centres = [(rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES)) for _ in range(CITY_CENTRES)]
+    batch = []
+    for code in range(start, start + count):
+        if rng.random() < 0.7:
+            lat, lon = rng.choice(centres)
+            lat, lon = lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3)
+        else:
+            lat, lon = rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES)
+        batch.append(Pincode(code=f'9{code:06d}', latitude=lat, longitude=lon, district='Seed'))
+        if len(batch) >= batch_size:
+            Pincode.objects.bulk_create(batch)
+            batch = []
+    Pincode.objects.bulk_create(batch)
+
+
+def _seed_users(user_type, count, rng, password, batch_size, pincodes):
+    start = CustomUser.objects.filter(email__startswith=f'seed-{user_type}-').count()
+    users = []
+    for i in range(start, start + count):
+        city, state = rng.choice(CITIES)
+        users.append(CustomUser(
+            email=f'seed-{user_type}-{i}@example.com', password=password, user_type=user_type,
+            first_name=user_type.title(), last_name=str(i), city=city, state=state,
+            pincode=rng.choice(pincodes) if pincodes else f'{400000 + rng.randrange(100000)}',
+        ))
+    CustomUser.objects.bulk_create(users, batch_size=batch_size)
+    # MySQL does not return primary keys from bulk inserts, so read them back.
+    emails = [u.email for u in users]
+    ids = []
+    for offset in range(0, len(emails), batch_size):
+        ids.extend(CustomUser.objects.filter(email__in=emails[offset:offset + batch_size])
+                   .values_list('id', flat=True))
+    return start, ids
+
+
+@transaction.atomic
+def seed(doctors=0, patients=0, categories=0, posts=0, pincodes=0, batch_size=1000, random_seed=0):
+    """Add the requested number of rows on top of what already exists.
+
+    Users get pincodes from the ``Pincode`` table when it has rows.
+    """
+    rng = random.Random(random_seed)
+    password = make_password(SEED_PASSWORD)
+
+    _seed_pincodes(pincodes, rng, batch_size)
+    codes = list(Pincode.objects.values_list('code', flat=True)) if doctors or patients else []
+    start, doctor_ids = _seed_users('doctor', doctors, rng, password, batch_size, codes)
+    specializations = [code for code, _ in DoctorProfile.SPECIALIZATION_CHOICES]
+    DoctorProfile.objects.bulk_create([
+        DoctorProfile(user_id=user_id, specialization=rng.choice(specializations),
+                      medical_license=f'SEED-{start + n}', years_of_experience=rng.randrange(40),
+                      consultation_fee=rng.randrange(200, 3000), qualification='MBBS')
+        for n, user_id in enumerate(doctor_ids)
+    ], batch_size=batch_size)
+
+    _, patient_ids = _seed_users('patient', patients, rng, password, batch_size, codes)
+    PatientProfile.objects.bulk_create(
+        [PatientProfile(user_id=user_id) for user_id in patient_ids], batch_size=batch_size)
+
+    start = BlogCategory.objects.filter(name__startswith='Seed category ').count()
+    BlogCategory.objects.bulk_create([
+        BlogCategory(name=f'Seed category {i}', slug=f'seed-category-{i}')
+        for i in range(start, start + categories)
+    ], batch_size=batch_size)
+
+    if posts:
+        author_ids = list(CustomUser.objects.filter(user_type='doctor').values_list('id', flat=True))
+        if not author_ids:
+            raise ValueError('Seeding posts requires at least one doctor.')
+        category_ids = list(BlogCategory.objects.values_list('id', flat=True)) or [None]
+        start = BlogPost.objects.filter(title__startswith='Seed post ').count()
+        batch = []
+        for i in range(start, start + posts):
+            title = f'Seed post {i}'
+            batch.append(BlogPost(
+                title=title, slug=slugify(title), author_id=rng.choice(author_ids),
+                category_id=rng.choice(category_ids), summary=_sentence(rng, 10),
+                content='\n\n'.join(_sentence(rng, 60) for _ in range(4)),
+                status='published' if rng.random() < 0.8 else 'draft',
+            ))
+            if len(batch) >= batch_size:
+                BlogPost.objects.bulk_create(batch)
+                batch = []
+        BlogPost.objects.bulk_create(batch)
+
+    rebuild_listings(chunk_size=batch_size)
+    rebuild_cards(chunk_size=batch_size)
+    reconcile_counts()
+    get_backend().rebuild()
+    bump_page_version('blog')
@@ -0,0 +1,195 @@
+"""Production static files: hashed, precompressed, served from an index.
+
+``CompressedManifestStaticFilesStorage`` is Django's manifest storage
+(content-hashed names plus ``staticfiles.json``) that also writes ``.gz``
+and ``.br`` copies of every compressible file ``collectstatic`` produces. The
+``.br`` copies need ``brotli`` (pinned in ``requirements.txt``); without it,
+as in a bare development environment, only ``.gz`` copies are written.
+
+``StaticFilesMiddleware`` indexes ``STATIC_ROOT`` once at startup (path, size,
+type, ETag and compressed variants), so a request costs a dict lookup and an
+``open()``. It picks the smallest variant the client accepts, answers
+``If-None-Match`` with 304, and streams through ``FileResponse``, which WSGI
+servers hand to ``sendfile``. Hashed names never change content and are sent
+with a one-year ``immutable`` lifetime; unhashed names get
+``STATIC_FILES_MAX_AGE``. Paths not in the index fall through to the URL
+resolver, so the ``DEBUG`` static view keeps working during development.
+Files collected after startup are only served after a restart.
+"""
+import gzip
+import json
+import mimetypes
+import os
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # missing outside the production install; gzip copies are always written
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml',
+                      'image/svg+xml', 'application/manifest+json')
+MIN_COMPRESS_SIZE = 256
+# name suffix -> Content-Encoding, in order of preference
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def is_compressible(name):
+    content_type, encoding = mimetypes.guess_type(name)
+    return encoding is None and content_type is not None and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        processed = []
+        for original, hashed, was_processed in super().post_process(paths, dry_run, **options):
+            processed.append((original, hashed))
+            yield original, hashed, was_processed
+        if dry_run:
+            return
+        # Compress once hashing has finished rewriting file contents.
+        for original, hashed in processed:
+            for name in {original, hashed} - {None}:
+                if isinstance(name, str) and is_compressible(name):
+                    self._write_compressed(name)
+
+    def _write_compressed(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+
+
+@dataclass
+class StaticFile:
+    path: str
+    size: int
+    etag: str
+    content_type: str
+    immutable: bool
+    variants: dict = field(default_factory=dict)  # Content-Encoding -> (path, size)
+
+
+def _manifest_names(root):
+    try:
+        with open(os.path.join(root, ManifestStaticFilesStorage.manifest_name), encoding='utf-8') as f:
+            return set(json.load(f).get('paths', {}).values())
+    except (OSError, ValueError):
+        return set()
+
+
+def build_index(root):
+    """``{relative url path: StaticFile}`` for every file under ``root``."""
+    hashed = _manifest_names(root)
+    entries = {}
+    compressed = []
+    for directory, _, names in os.walk(root):
+        for filename in names:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            stat = os.stat(path)
+            if any(name.endswith(suffix) for suffix, _ in ENCODINGS):
+                compressed.append((name, path, stat.st_size))
+                continue
+            content_type, encoding = mimetypes.guess_type(filename)
+            if content_type and content_type.startswith('text/'):
+                content_type += '; charset=utf-8'
+            entries[name] = StaticFile(
+                path=path, size=stat.st_size, etag=f'{int(stat.st_mtime):x}-{stat.st_size:x}',
+                content_type=content_type or 'application/octet-stream', immutable=name in hashed,
+            )
+    encodings = dict(ENCODINGS)
+    for name, path, size in compressed:
+        base, suffix = os.path.splitext(name)
+        if base in entries:
+            entries[base].variants[encodings[suffix]] = (path, size)
+        else:
+            # A genuinely compressed asset, e.g. a downloadable .gz archive.
+            entries[name] = StaticFile(path=path, size=size, etag=f'{size:x}',
+                                       content_type='application/octet-stream', immutable=name in hashed)
+    return entries
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts, from an ``Accept-Encoding`` header."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        name, _, value = params.strip().partition('=')
+        try:
+            if name.strip() == 'q' and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def etag_matches(header, etag):
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'STATIC_FILES_SERVE', True) or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.max_age = getattr(settings, 'STATIC_FILES_MAX_AGE', 60)
+        self.files = build_index(str(settings.STATIC_ROOT)) if os.path.isdir(settings.STATIC_ROOT) else {}
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefix):
+            static_file = self.files.get(request.path_info[len(self.prefix):])
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    def serve(self, request, static_file):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        path, size, encoding = static_file.path, static_file.size, None
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for _, coding in ENCODINGS:
+            if coding in accepted and coding in static_file.variants:
+                path, size = static_file.variants[coding]
+                encoding = coding
+                break
+        etag = f'"{static_file.etag}{"-" + encoding if encoding else ""}"'
+
+        if etag_matches(request.META.get('HTTP_IF_NONE_MATCH', ''), etag):
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=static_file.content_type)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            response.headers.pop('Content-Disposition', None)
+        if response.status_code == 200:
+            response['Content-Length'] = size
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        if static_file.immutable:
+            response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={self.max_age}'
+        if static_file.variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
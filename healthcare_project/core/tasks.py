@@ -0,0 +1,235 @@
+"""Background tasks stored in the project database.
+
+``enqueue(func, *args, **kwargs)`` inserts a ``Task`` row naming a
+module-level function by its dotted path; arguments must be JSON-serialisable.
+Inside a transaction the task commits or rolls back with the request's own
+writes, so a worker never sees work for rows that were not saved.
+
+Workers (``manage.py runworker``) claim due tasks in ``(run_at, pk)`` order.
+Where the database supports it (MySQL 8, PostgreSQL) claiming uses
+``SELECT ... FOR UPDATE SKIP LOCKED``, so workers never wait on each other.
+SQLite has no row locks; there each candidate is claimed with a conditional
+UPDATE that only one worker can win. A claim is a lease of
+``TASK_LEASE_SECONDS``: if a worker dies mid-task the task is claimed again
+once the lease runs out, so tasks must be safe to run twice. A queue error
+(a locked or unreachable database) is logged and the worker backs off,
+doubling its pause up to ``ERROR_BACKOFF_MAX`` seconds, instead of exiting.
+
+A failed call is retried after ``TASK_RETRY_BACKOFF`` seconds, doubling per
+attempt up to ``TASK_RETRY_BACKOFF_MAX``. After ``max_attempts`` failures the
+task moves to ``DeadTask``. Every attempt adds its queue wait and run time
+to the task's ``TaskMetric`` row, shown at ``/ops/tasks/``.
+"""
+import datetime
+import itertools
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Count, F, PositiveBigIntegerField, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import DeadTask, Task, TaskMetric
+
+logger = logging.getLogger(__name__)
+
+_worker_ids = itertools.count(1)
+# Longest pause after repeated queue errors (a locked or unreachable database).
+ERROR_BACKOFF_MAX = 60
+
+
+def task_name(func):
+    return func if isinstance(func, str) else f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, delay=0, max_attempts=None, **kwargs):
+    """Queue ``func(*args, **kwargs)`` to run in a worker; returns the ``Task``.
+
+    ``delay`` (seconds) and ``max_attempts`` are taken by the queue, not
+    passed to ``func``.
+    """
+    now = timezone.now()
+    return Task.objects.create(
+        name=task_name(func), args=list(args), kwargs=kwargs,
+        max_attempts=max_attempts or getattr(settings, 'TASK_MAX_ATTEMPTS', 5),
+        run_at=now + datetime.timedelta(seconds=delay), enqueued_at=now,
+    )
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying a task that has failed ``attempts`` times."""
+    base = getattr(settings, 'TASK_RETRY_BACKOFF', 10)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, 'TASK_RETRY_BACKOFF_MAX', 3600))
+    # Jitter keeps tasks that failed together from retrying in lockstep.
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _due(now):
+    expired = Q(status=Task.RUNNING, locked_until__lt=now)
+    return Task.objects.filter(Q(status=Task.QUEUED, run_at__lte=now) | expired)
+
+
+def claim(worker, limit=1):
+    """Lease up to ``limit`` due tasks to ``worker``."""
+    now = timezone.now()
+    due = _due(now)
+    changes = {
+        'status': Task.RUNNING, 'locked_by': worker, 'attempts': F('attempts') + 1,
+        'locked_until': now + datetime.timedelta(seconds=getattr(settings, 'TASK_LEASE_SECONDS', 300)),
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.order_by('run_at', 'pk').select_for_update(skip_locked=True)
+                       .values_list('pk', flat=True)[:limit])
+            Task.objects.filter(pk__in=ids).update(**changes)
+    else:
+        # The UPDATE re-checks the row is still due, so of two workers that
+        # picked the same candidate only one changes it.
+        ids = [pk for pk in due.order_by('run_at', 'pk').values_list('pk', flat=True)[:limit]
+               if due.filter(pk=pk).update(**changes)]
+    if not ids:
+        return []
+    return list(Task.objects.filter(pk__in=ids, locked_by=worker).order_by('run_at', 'pk'))
+
+
+def _record(name, outcome, wait_ms, run_ms):
+    now = timezone.now()
+    fields = {
+        outcome: F(outcome) + 1,
+        'wait_ms': F('wait_ms') + wait_ms,
+        'run_ms': F('run_ms') + run_ms,
+        'max_wait_ms': Greatest(F('max_wait_ms'), Value(wait_ms, output_field=PositiveBigIntegerField())),
+        'max_run_ms': Greatest(F('max_run_ms'), Value(run_ms, output_field=PositiveBigIntegerField())),
+        'last_run_at': now,
+    }
+    rows = TaskMetric.objects.filter(name=name)
+    if rows.update(**fields):
+        return
+    try:
+        with transaction.atomic():
+            TaskMetric.objects.create(name=name, wait_ms=wait_ms, run_ms=run_ms, max_wait_ms=wait_ms,
+                                      max_run_ms=run_ms, last_run_at=now, **{outcome: 1})
+    except IntegrityError:
+        # Another worker created the row first.
+        rows.update(**fields)
+
+
+def execute(task, worker):
+    """Run a claimed task, then delete it, schedule a retry or dead-letter it.
+
+    Returns True if the call succeeded.
+    """
+    wait_ms = max(int((timezone.now() - task.run_at).total_seconds() * 1000), 0)
+    started = time.monotonic()
+    try:
+        import_string(task.name)(*task.args, **task.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        run_ms = int((time.monotonic() - started) * 1000)
+        logger.warning('Task %s (%s) failed on attempt %d of %d', task.pk, task.name, task.attempts,
+                       task.max_attempts, exc_info=True)
+        mine = Task.objects.filter(pk=task.pk, locked_by=worker)
+        if task.attempts >= task.max_attempts:
+            with transaction.atomic():
+                if mine.delete()[0]:
+                    DeadTask.objects.create(name=task.name, args=task.args, kwargs=task.kwargs,
+                                            attempts=task.attempts, enqueued_at=task.enqueued_at,
+                                            last_error=error)
+            _record(task.name, 'dead', wait_ms, run_ms)
+        else:
+            mine.update(status=Task.QUEUED, locked_by='', locked_until=None, last_error=error,
+                        run_at=timezone.now() + datetime.timedelta(seconds=backoff(task.attempts)))
+            _record(task.name, 'failed', wait_ms, run_ms)
+        return False
+    run_ms = int((time.monotonic() - started) * 1000)
+    Task.objects.filter(pk=task.pk, locked_by=worker).delete()
+    _record(task.name, 'succeeded', wait_ms, run_ms)
+    return True
+
+
+def requeue_dead(queryset):
+    """Move dead tasks back onto the queue with a fresh set of attempts; returns how many."""
+    requeued = 0
+    for dead in queryset:
+        with transaction.atomic():
+            enqueue(dead.name, *dead.args, max_attempts=dead.attempts, **dead.kwargs)
+            dead.delete()
+        requeued += 1
+    return requeued
+
+
+class Worker:
+    """Claims and runs tasks until ``stop`` is set (or the queue is empty, with ``once``)."""
+
+    def __init__(self, name=None, batch_size=1, poll_interval=None):
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}:{next(_worker_ids)}'
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval or getattr(settings, 'TASK_POLL_INTERVAL', 1)
+        self.succeeded = 0
+        self.failed = 0
+        self.errors = 0
+
+    def run(self, stop, once=False):
+        errors_in_a_row = 0
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    tasks = self._run_batch()
+                except Exception:
+                    # A locked or dropped database must not end the worker.
+                    # Tasks of the batch that did not finish are claimed
+                    # again once their lease runs out.
+                    self.errors += 1
+                    errors_in_a_row += 1
+                    logger.exception('Worker %s: queue error (%d in a row)', self.name, errors_in_a_row)
+                    connection.close()
+                    stop.wait(min(self.poll_interval * 2 ** errors_in_a_row, ERROR_BACKOFF_MAX))
+                    continue
+                errors_in_a_row = 0
+                if not tasks:
+                    if once:
+                        break
+                    stop.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    def _run_batch(self):
+        tasks = claim(self.name, self.batch_size)
+        for task in tasks:
+            if execute(task, self.name):
+                self.succeeded += 1
+            else:
+                self.failed += 1
+        return tasks
+
+
+def queue_snapshot():
+    """Queue depth by state plus per-task counts and latencies."""
+    now = timezone.now()
+    depth = Task.objects.aggregate(
+        due=Count('pk', filter=Q(status=Task.QUEUED, run_at__lte=now)),
+        scheduled=Count('pk', filter=Q(status=Task.QUEUED, run_at__gt=now)),
+        running=Count('pk', filter=Q(status=Task.RUNNING)),
+    )
+    tasks = {}
+    for metric in TaskMetric.objects.order_by('name'):
+        attempts = metric.succeeded + metric.failed + metric.dead
+        tasks[metric.name] = {
+            'succeeded': metric.succeeded,
+            'failed': metric.failed,
+            'dead': metric.dead,
+            'avg_wait_ms': round(metric.wait_ms / attempts, 1) if attempts else None,
+            'avg_run_ms': round(metric.run_ms / attempts, 1) if attempts else None,
+            'max_wait_ms': metric.max_wait_ms,
+            'max_run_ms': metric.max_run_ms,
+            'last_run_at': metric.last_run_at,
+        }
+    return dict(depth, dead=DeadTask.objects.count(), tasks=tasks)
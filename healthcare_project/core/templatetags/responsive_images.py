@@ -0,0 +1,53 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core.images import VARIANTS, derivative_url, derivatives_ready, hash_for_name, is_derivative
+
+register = template.Library()
+
+# Largest variant a preset may use, and the ``sizes`` hint sent to browsers.
+PRESETS = {
+    'thumbnail': ('thumbnail', '160px'),
+    'card': ('card', '(min-width: 768px) 33vw, 100vw'),
+    'detail': ('detail', '(min-width: 768px) 66vw, 100vw'),
+}
+
+
+def _srcset(digest, fmt, max_variant):
+    entries = []
+    for variant, width in VARIANTS.items():
+        entries.append(f'{derivative_url(digest, variant, fmt)} {width}w')
+        if variant == max_variant:
+            break
+    return ', '.join(entries)
+
+
+@register.simple_tag
+def responsive_image(image, preset='card', **attrs):
+    """Render ``<picture>`` with WebP/JPEG ``srcset`` for a stored image.
+
+    ``image`` may be an ImageFieldFile or a URL/name string, including a
+    variant's URL. Falls back to a plain ``<img>`` of the original while
+    derivatives are still being built, or to nothing when only a variant's
+    URL is known.
+    """
+    if not image:
+        return ''
+    url = image if isinstance(image, str) else image.url
+    name = image if isinstance(image, str) else image.name
+    extra = format_html_join('', ' {}="{}"', sorted(attrs.items()))
+
+    digest = hash_for_name(name)
+    if not digest or not derivatives_ready(digest):
+        if is_derivative(name):
+            return ''
+        return format_html('<img src="{}"{}>', url, extra)
+
+    max_variant, sizes = PRESETS[preset]
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" loading="lazy" decoding="async"{}></picture>',
+        _srcset(digest, 'webp', max_variant), sizes,
+        derivative_url(digest, max_variant, 'jpg'), _srcset(digest, 'jpg', max_variant), sizes,
+        extra,
+    )
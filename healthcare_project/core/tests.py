@@ -0,0 +1,371 @@
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from accounts.models import CustomUser
+from . import benchmarks, pagecache, staticfiles, tasks, throttling
+from .management.commands.benchmark import DUMMY_PAGE_CACHE
+from .seeding import seed
+
+LOCMEM_PAGE_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'page-cache-tests'}
+
+
+@override_settings(CACHES={**settings.CACHES, settings.PAGE_CACHE_ALIAS: DUMMY_PAGE_CACHE})
+class QueryBudgetTests(TestCase):
+    """The ``manage.py benchmark`` scenarios as a test: every view answers with
+    its expected status within its query budget. Timings are left to the command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(doctors=10, patients=10, categories=8, posts=200)
+
+    def setUp(self):
+        # Keep the write-behind view counter's thread out of the test database.
+        patcher = mock.patch('blog.popularity.view_counter.incr')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_every_view_has_a_scenario(self):
+        self.assertEqual(benchmarks.uncovered_url_names(), [])
+
+    def test_query_budgets(self):
+        for result in benchmarks.run_all(iterations=1):
+            scenario = result.scenario
+            with self.subTest(scenario.url_name, role=scenario.role, query=scenario.query):
+                self.assertEqual(result.problems(), [])
+
+
+@override_settings(CACHES={**settings.CACHES, 'throttle': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-tests'}})
+class ThrottlingTests(SimpleTestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.factory = RequestFactory()
+
+    def backends(self):
+        return [throttling.LocalMemoryBackend(), throttling.CacheBackend('throttle')]
+
+    def test_local_backend_drops_least_recently_used_keys(self):
+        backend = throttling.LocalMemoryBackend()
+        backend.max_keys = 2
+        backend.hit('a', 60, 0)
+        backend.hit('b', 60, 1)
+        backend.hit('a', 60, 2)
+        backend.hit('c', 60, 3)
+        self.assertEqual(backend.hit('a', 60, 4), 3)
+        self.assertEqual(backend.hit('b', 60, 5), 1)
+
+        backend.lock('a', 60, 3600, 0)
+        backend.lock('b', 60, 3600, 0)
+        backend.lock('c', 60, 3600, 0)
+        self.assertEqual(set(backend.locked_until(['a', 'b', 'c'], 1)), {'b', 'c'})
+
+    def test_local_backend_window_slides(self):
+        backend = throttling.LocalMemoryBackend()
+        for now in (0, 10, 20):
+            backend.hit('key', 60, now)
+        self.assertEqual(backend.hit('key', 60, 65), 3)
+
+    def test_cache_backend_weights_previous_bucket(self):
+        backend = throttling.CacheBackend('throttle')
+        for _ in range(4):
+            count = backend.hit('key', 100, 1010)
+        self.assertEqual(count, 4)
+        # A quarter into the next bucket, three quarters of the last one count.
+        self.assertEqual(backend.hit('key', 100, 1125), 1 + 4 * 0.75)
+        self.assertEqual(backend.hit('key', 100, 1150), 2 + 4 * 0.5)
+
+    def test_lockout_doubles_up_to_maximum(self):
+        for backend in self.backends():
+            with self.subTest(backend=type(backend).__name__):
+                now, durations = 1000, []
+                for _ in range(4):
+                    duration = backend.lock('key', 60, 300, now)
+                    self.assertIn('key', backend.locked_until(['key'], now + duration - 1))
+                    self.assertNotIn('key', backend.locked_until(['key'], now + duration))
+                    durations.append(duration)
+                    now += duration
+                self.assertEqual(durations, [60, 120, 240, 300])
+
+    def test_lockout_strikes_expire(self):
+        backend = throttling.LocalMemoryBackend()
+        self.assertEqual(backend.lock('key', 60, 300, 0), 60)
+        self.assertEqual(backend.lock('key', 60, 300, 60 + 300), 60)
+
+    @override_settings(AUTH_THROTTLE_ENABLED=True, AUTH_THROTTLE_LOCKOUT_BASE=60, AUTH_THROTTLE_LOCKOUT_MAX=3600)
+    def test_check_locks_out_after_limit(self):
+        throttle = throttling.Throttle('tests', {'ip': (2, 60), 'email': (5, 60)}, throttling.LocalMemoryBackend())
+        request = self.factory.post('/', REMOTE_ADDR='10.0.0.1')
+        decisions = [throttle.check(request, 'A@example.com') for _ in range(4)]
+        self.assertEqual([d.allowed for d in decisions], [True, True, False, False])
+        self.assertEqual((decisions[2].scope, decisions[2].retry_after), ('ip', 60))
+        self.assertEqual(decisions[3].scope, 'ip')
+        other = self.factory.post('/', REMOTE_ADDR='10.0.0.2')
+        self.assertTrue(throttle.check(other, 'a@example.com ').allowed)
+
+    def test_client_ip(self):
+        request = self.factory.get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2')
+        with self.settings(AUTH_THROTTLE_TRUSTED_PROXIES=0):
+            self.assertEqual(throttling.client_ip(request), '10.0.0.1')
+        with self.settings(AUTH_THROTTLE_TRUSTED_PROXIES=1):
+            self.assertEqual(throttling.client_ip(request), '2.2.2.2')
+        with self.settings(AUTH_THROTTLE_TRUSTED_PROXIES=2):
+            self.assertEqual(throttling.client_ip(request), '1.1.1.1')
+        with self.settings(AUTH_THROTTLE_TRUSTED_PROXIES=3):
+            # Fewer hops than trusted proxies: the header cannot be trusted.
+            self.assertEqual(throttling.client_ip(request), '10.0.0.1')
+
+
+class MediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.media_root)
+        for name, data in [('blog_images/note.txt', b'0123456789'), ('private/doc.txt', b'staff only')]:
+            path = Path(cls.media_root, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        cls.enterClassContext(override_settings(
+            MEDIA_ROOT=cls.media_root, MEDIA_OFFLOAD='',
+            MEDIA_ACCESS={'blog_images/': None, 'private/': 'core.media.staff_only'}))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('staff@example.com', 'pass-12345', user_type='doctor',
+                                                   is_staff=True)
+        cls.patient = CustomUser.objects.create_user('patient@example.com', 'pass-12345', user_type='patient')
+
+    def test_public_file(self):
+        response = self.client.get('/media/blog_images/note.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.MEDIA_MAX_AGE}')
+
+    def test_permissions(self):
+        self.assertEqual(self.client.get('/media/private/doc.txt').status_code, 404)
+        self.assertEqual(self.client.get('/media/unlisted/doc.txt').status_code, 404)
+        self.client.force_login(self.patient)
+        self.assertEqual(self.client.get('/media/private/doc.txt').status_code, 403)
+        self.client.force_login(self.staff)
+        response = self.client.get('/media/private/doc.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_traversal_is_checked_against_the_resolved_path(self):
+        for url in ['/media/blog_images/../private/doc.txt', '/media/blog_images/%2e%2e/private/doc.txt',
+                    '/media/blog_images/./../private/doc.txt']:
+            with self.subTest(url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.patient)
+        self.assertEqual(self.client.get('/media/blog_images/../private/doc.txt').status_code, 403)
+
+    def test_traversal_out_of_media_root(self):
+        for url in ['/media/../settings.py', '/media/blog_images/../../settings.py']:
+            with self.subTest(url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_offload_uses_the_resolved_path(self):
+        with self.settings(MEDIA_OFFLOAD='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            self.assertEqual(self.client.get('/media/blog_images/../private/doc.txt').status_code, 404)
+            response = self.client.get('/media/blog_images/./note.txt')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/blog_images/note.txt')
+
+    def test_ranges(self):
+        url = '/media/blog_images/note.txt'
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+    def test_not_modified(self):
+        url = '/media/blog_images/note.txt'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        files = [('css/site.0123abcd.css', b'body {}'), ('css/site.0123abcd.css.gz', b'gz'),
+                 ('css/site.0123abcd.css.br', b'br'), ('robots.txt', b'User-agent: *'),
+                 ('staticfiles.json', b'{"paths": {"css/site.css": "css/site.0123abcd.css"}}')]
+        for name, data in files:
+            path = Path(cls.static_root, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.static_root, STATIC_FILES_SERVE=True))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = staticfiles.StaticFilesMiddleware(lambda request: HttpResponse('app'))
+
+    def get(self, path, **headers):
+        return self.middleware(self.factory.get(path, **headers))
+
+    def test_encoding_negotiation(self):
+        for accept, encoding, body in [('gzip, deflate, br', 'br', b'br'), ('gzip', 'gzip', b'gz'),
+                                       ('gzip;q=0, br;q=0', None, b'body {}'), ('', None, b'body {}')]:
+            with self.subTest(accept=accept):
+                response = self.get('/static/css/site.0123abcd.css', HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(response['Content-Length'], str(len(body)))
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertIn('immutable', response['Cache-Control'])
+
+    def test_not_modified(self):
+        etag = self.get('/static/css/site.0123abcd.css', HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        response = self.get('/static/css/site.0123abcd.css', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # The identity copy has its own ETag, so a gzip ETag does not match it.
+        response = self.get('/static/css/site.0123abcd.css', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unhashed_and_unknown_paths(self):
+        response = self.get('/static/robots.txt', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.STATIC_FILES_MAX_AGE}')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('Vary', response)
+        self.assertEqual(self.get('/static/missing.css').content, b'app')
+        self.assertEqual(self.get('/static/css/site.0123abcd.css.gz').content, b'app')
+
+
+@override_settings(CACHES={**settings.CACHES, settings.PAGE_CACHE_ALIAS: LOCMEM_PAGE_CACHE},
+                   PAGE_CACHE_TIMEOUT=60, PAGE_CACHE_LOCK_TIMEOUT=10, PAGE_CACHE_WAIT_TIMEOUT=2)
+class PageCacheTests(SimpleTestCase):
+    def setUp(self):
+        pagecache.get_cache().clear()
+        pagecache.stats.reset()
+        self.factory = RequestFactory()
+        self.renders = 0
+
+        @pagecache.cache_anonymous_page('tests')
+        def view(request):
+            self.renders += 1
+            return HttpResponse(f'render {self.renders}')
+        self.view = view
+
+    def request(self, path='/page/'):
+        request = self.factory.get(path)
+        request.user = AnonymousUser()
+        return request
+
+    def get(self, path='/page/'):
+        return self.view(self.request(path)).content.decode()
+
+    def key(self, path='/page/'):
+        return pagecache._page_key('tests', self.request(path), ('category',))
+
+    def test_hit(self):
+        self.assertEqual(self.get(), 'render 1')
+        self.assertEqual(self.get(), 'render 1')
+        self.assertEqual(self.get('/page/?category=heart'), 'render 2')
+        self.assertEqual(self.get('/page/?unrelated=1'), 'render 1')
+        counts = pagecache.stats.snapshot()
+        self.assertEqual((counts['miss'], counts['hit']), (2, 2))
+
+    def test_version_bump_invalidates(self):
+        self.get()
+        pagecache.bump_page_version('tests')
+        self.assertEqual(self.get(), 'render 2')
+
+    def test_authenticated_bypass(self):
+        request = self.request()
+        request.user = mock.Mock(is_authenticated=True)
+        self.view(request)
+        self.view(request)
+        self.assertEqual(self.renders, 2)
+        self.assertEqual(pagecache.stats.snapshot()['bypass'], 2)
+
+    def test_stale_entry_served_while_another_request_renders(self):
+        self.get()
+        cache = pagecache.get_cache()
+        with mock.patch('core.pagecache.time.time', return_value=time.time() + 61):
+            cache.add(f'{self.key()}:lock', 1)
+            self.assertEqual(self.get(), 'render 1')
+            self.assertEqual(pagecache.stats.snapshot()['stale'], 1)
+            cache.delete(f'{self.key()}:lock')
+            self.assertEqual(self.get(), 'render 2')
+
+    def test_cold_miss_waits_for_the_lock_holder(self):
+        cache = pagecache.get_cache()
+        key = self.key()
+        cache.add(f'{key}:lock', 1)
+
+        def winner_stores(seconds):
+            pagecache._store(cache, key, HttpResponse('winner'), 60, 10)
+
+        with mock.patch('core.pagecache.time.sleep', side_effect=winner_stores):
+            self.assertEqual(self.get(), 'winner')
+        self.assertEqual(self.renders, 0)
+        self.assertEqual(pagecache.stats.snapshot()['wait'], 1)
+
+    async def test_async_single_flight(self):
+        @pagecache.cache_anonymous_page('tests')
+        async def slow_view(request):
+            self.renders += 1
+            await asyncio.sleep(0.2)
+            return HttpResponse('rendered once')
+
+        responses = await asyncio.gather(slow_view(self.request()), slow_view(self.request()))
+        self.assertEqual([r.content for r in responses], [b'rendered once'] * 2)
+        self.assertEqual(self.renders, 1)
+        counts = pagecache.stats.snapshot()
+        self.assertEqual((counts['miss'], counts['wait']), (1, 1))
+
+
+def record_task_call(value):
+    TaskWorkerTests.calls.append(value)
+
+
+class TaskWorkerTests(TestCase):
+    calls = []
+
+    def setUp(self):
+        TaskWorkerTests.calls = []
+
+    def test_claim_error_does_not_stop_worker(self):
+        tasks.enqueue(record_task_call, 'ran')
+        real_claim = tasks.claim
+        failures = iter([OperationalError('database is locked')])
+
+        def flaky_claim(*args, **kwargs):
+            for error in failures:
+                raise error
+            return real_claim(*args, **kwargs)
+
+        worker = tasks.Worker(poll_interval=0.01)
+        with mock.patch.object(tasks, 'claim', side_effect=flaky_claim), \
+                self.assertLogs('core.tasks', 'ERROR'):
+            worker.run(threading.Event(), once=True)
+        self.assertEqual(self.calls, ['ran'])
+        self.assertEqual((worker.errors, worker.succeeded), (1, 1))
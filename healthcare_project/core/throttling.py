@@ -0,0 +1,255 @@
+"""Sliding-window rate limiting for password endpoints.
+
+Login and signup both run a full PBKDF2 hash per POST, so a credential
+stuffing burst is a CPU exhaustion attack. ``get_throttle('login')`` returns a
+limiter configured from ``AUTH_THROTTLE_RATES``; views call ``check()`` before
+any form validation or hashing. Each scope (client IP, normalised email) has
+its own window, and a key that overruns its limit is locked out for
+``AUTH_THROTTLE_LOCKOUT_BASE`` seconds, doubling on each repeat offence up to
+``AUTH_THROTTLE_LOCKOUT_MAX``. While locked out a request costs one cache read.
+
+Two backends are available via ``AUTH_THROTTLE_BACKEND``: ``local`` keeps an
+exact sliding log in process memory (per worker), ``cache`` keeps a weighted
+two-bucket window in ``AUTH_THROTTLE_CACHE_ALIAS`` so limits are shared by
+every worker pointed at the same cache.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_RATES = {
+    'login': {'ip': (30, 300), 'email': (5, 300)},
+    'signup': {'ip': (10, 3600)},
+}
+
+
+class ThrottleStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {}
+
+    def incr(self, name, outcome):
+        with self._lock:
+            counts = self.counts.setdefault(name, {'allowed': 0, 'rejected': 0, 'locked_out': 0})
+            counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(counts) for name, counts in self.counts.items()}
+
+
+stats = ThrottleStats()
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    scope: str = None
+    retry_after: int = 0
+
+
+class LocalMemoryBackend:
+    """Exact sliding log per key, private to this process.
+
+    At most ``max_keys`` keys are tracked for hits and for lockouts. Both are
+    kept in least-recently-used order and the oldest key is dropped to make
+    room, so rotating through fresh emails cannot grow memory without bound.
+    """
+
+    max_keys = 100000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = OrderedDict()
+        self._lockouts = OrderedDict()  # key -> (locked_until, strikes, strikes_expire_at)
+
+    def locked_until(self, keys, now):
+        with self._lock:
+            return {key: self._lockouts[key][0] for key in keys
+                    if key in self._lockouts and self._lockouts[key][0] > now}
+
+    def hit(self, key, window, now):
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                self._make_room(self._hits)
+                hits = self._hits[key] = deque()
+            else:
+                self._hits.move_to_end(key)
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            hits.append(now)
+            return len(hits)
+
+    def lock(self, key, base, maximum, now):
+        with self._lock:
+            _, strikes, expires = self._lockouts.get(key, (0, 0, 0))
+            strikes = strikes + 1 if expires > now else 1
+            duration = min(base * 2 ** (strikes - 1), maximum)
+            if key in self._lockouts:
+                self._lockouts.move_to_end(key)
+            else:
+                self._make_room(self._lockouts)
+            self._lockouts[key] = (now + duration, strikes, now + duration + maximum)
+            self._hits.pop(key, None)
+            return duration
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+            self._lockouts.pop(key, None)
+
+    def _make_room(self, entries):
+        # The least recently used keys come first; they are the idle ones
+        # whose windows have usually expired anyway.
+        while len(entries) >= self.max_keys:
+            entries.popitem(last=False)
+
+
+class CacheBackend:
+    """Sliding-window counter shared through a Django cache.
+
+    The count is the current fixed bucket plus the previous bucket weighted by
+    how much of it still overlaps the window, which needs two counters per key
+    and only atomic ``incr``.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def locked_until(self, keys, now):
+        found = self.cache.get_many([f'{key}:lock' for key in keys])
+        return {key: found[f'{key}:lock'] for key in keys
+                if found.get(f'{key}:lock', 0) > now}
+
+    def hit(self, key, window, now):
+        cache = self.cache
+        bucket = int(now // window)
+        current = f'{key}:{bucket}'
+        cache.add(current, 0, timeout=window * 2)
+        try:
+            count = cache.incr(current)
+        except ValueError:
+            # Evicted between add() and incr().
+            cache.set(current, 1, timeout=window * 2)
+            count = 1
+        previous = cache.get(f'{key}:{bucket - 1}', 0)
+        overlap = 1 - (now - bucket * window) / window
+        return count + previous * overlap
+
+    def lock(self, key, base, maximum, now):
+        cache = self.cache
+        strikes_key = f'{key}:strikes'
+        cache.add(strikes_key, 0, timeout=maximum * 2)
+        try:
+            strikes = cache.incr(strikes_key)
+        except ValueError:
+            strikes = 1
+        duration = min(base * 2 ** (strikes - 1), maximum)
+        cache.set(strikes_key, strikes, timeout=duration + maximum)
+        cache.set(f'{key}:lock', now + duration, timeout=math.ceil(duration))
+        return duration
+
+    def reset(self, key):
+        bucket_keys = []
+        now = time.time()
+        for _, window in _windows_for(key):
+            bucket = int(now // window)
+            bucket_keys += [f'{key}:{bucket}', f'{key}:{bucket - 1}']
+        self.cache.delete_many(bucket_keys + [f'{key}:lock', f'{key}:strikes'])
+
+
+def _rates():
+    return getattr(settings, 'AUTH_THROTTLE_RATES', DEFAULT_RATES)
+
+
+def _windows_for(key):
+    _, name, scope, _ = key.split(':', 3)
+    rate = _rates().get(name, {}).get(scope)
+    return [rate] if rate else []
+
+
+_local_backend = LocalMemoryBackend()
+
+
+def get_backend():
+    if getattr(settings, 'AUTH_THROTTLE_BACKEND', 'local') == 'cache':
+        return CacheBackend(getattr(settings, 'AUTH_THROTTLE_CACHE_ALIAS', 'default'))
+    return _local_backend
+
+
+def client_ip(request):
+    """The client address, trusting ``AUTH_THROTTLE_TRUSTED_PROXIES`` hops of X-Forwarded-For."""
+    proxies = getattr(settings, 'AUTH_THROTTLE_TRUSTED_PROXIES', 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+class Throttle:
+    def __init__(self, name, rates, backend):
+        self.name = name
+        self.rates = rates
+        self.backend = backend
+
+    def _keys(self, request, email):
+        identities = {'ip': client_ip(request), 'email': normalize_email(email)}
+        keys = []
+        for scope, (limit, window) in self.rates.items():
+            if identities.get(scope):
+                digest = hashlib.md5(identities[scope].encode()).hexdigest()
+                keys.append((scope, f'throttle:{self.name}:{scope}:{digest}', limit, window))
+        return keys
+
+    def check(self, request, email=None):
+        """Record an attempt and decide whether it may proceed to hashing."""
+        if not getattr(settings, 'AUTH_THROTTLE_ENABLED', True):
+            return Decision(True)
+        now = time.time()
+        keys = self._keys(request, email)
+
+        locked = self.backend.locked_until([key for _, key, _, _ in keys], now)
+        for scope, key, _, _ in keys:
+            if key in locked:
+                stats.incr(self.name, 'rejected')
+                return Decision(False, scope, math.ceil(locked[key] - now))
+
+        for scope, key, limit, window in keys:
+            if self.backend.hit(key, window, now) > limit:
+                duration = self.backend.lock(
+                    key, getattr(settings, 'AUTH_THROTTLE_LOCKOUT_BASE', 60),
+                    getattr(settings, 'AUTH_THROTTLE_LOCKOUT_MAX', 3600), now)
+                stats.incr(self.name, 'locked_out')
+                return Decision(False, scope, math.ceil(duration))
+        stats.incr(self.name, 'allowed')
+        return Decision(True)
+
+    def reset(self, request, email=None, scopes=('email',)):
+        """Forget attempts for the given scopes, e.g. after a successful login."""
+        for scope, key, _, _ in self._keys(request, email):
+            if scope in scopes:
+                self.backend.reset(key)
+
+
+def get_throttle(name):
+    return Throttle(name, _rates().get(name, {}), get_backend())
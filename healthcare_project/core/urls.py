@@ -0,0 +1,13 @@
+from django.urls import path
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('page-cache/', views.page_cache_stats_view, name='page_cache_stats'),
+    path('auth-throttle/', views.auth_throttle_stats_view, name='auth_throttle_stats'),
+    path('slow-requests/', views.slow_requests_view, name='slow_requests'),
+    path('view-counts/', views.view_counts_view, name='view_counts'),
+    path('tasks/', views.task_queue_view, name='task_queue'),
+    path('exports/<slug:dataset>.<slug:fmt>', views.export_view, name='export'),
+]
@@ -0,0 +1,52 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from blog.popularity import view_counter
+from . import exports, instrumentation, pagecache, tasks, throttling
+
+
+@staff_member_required
+def page_cache_stats_view(request):
+    return JsonResponse(pagecache.stats.snapshot())
+
+
+@staff_member_required
+def slow_requests_view(request):
+    return JsonResponse({'requests': instrumentation.slow_requests.slowest()})
+
+
+@staff_member_required
+def auth_throttle_stats_view(request):
+    return JsonResponse(throttling.stats.snapshot())
+
+
+@staff_member_required
+def view_counts_view(request):
+    return JsonResponse(view_counter.snapshot())
+
+
+@staff_member_required
+def task_queue_view(request):
+    return JsonResponse(tasks.queue_snapshot())
+
+
+@staff_member_required
+def export_view(request, dataset, fmt):
+    """Stream a dataset; ``?since=`` and ``?until=`` bound the watermark, ``?gzip=1`` compresses."""
+    if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+        raise Http404('Unknown export')
+    try:
+        since = exports.parse_watermark(request.GET.get('since'))
+        until = exports.parse_watermark(request.GET.get('until')) or timezone.now()
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    compress = request.GET.get('gzip') in ('1', 'true')
+    response = StreamingHttpResponse(
+        exports.stream(dataset, fmt, since=since, until=until, compress=compress),
+        content_type='application/gzip' if compress else exports.FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{exports.filename(dataset, fmt, compress)}"'
+    # Pass this back as ?since= for the next incremental export.
+    response['X-Export-Watermark'] = until.isoformat()
+    return response
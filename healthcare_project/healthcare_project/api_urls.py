@@ -0,0 +1,14 @@
+from django.urls import path
+
+from accounts import api as accounts_api
+from blog import api as blog_api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', blog_api.post_list_view, name='post_list'),
+    path('posts/<slug:slug>/', blog_api.post_detail_view, name='post_detail'),
+    path('categories/', blog_api.category_list_view, name='category_list'),
+    path('doctors/', accounts_api.doctor_list_view, name='doctor_list'),
+    path('doctors/<int:pk>/', accounts_api.doctor_detail_view, name='doctor_detail'),
+]
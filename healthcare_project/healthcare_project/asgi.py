@@ -2,4 +2,5 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare_project.settings')
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', 'true')
 application = get_asgi_application()
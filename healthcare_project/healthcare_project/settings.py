@@ -26,16 +26,20 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     # Custom apps
+    'core',
     'accounts',
     'blog',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',
+    'core.instrumentation.RequestProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.dbrouting.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,6 +65,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'healthcare_project.wsgi.application'
 
+# Serve the async read views (blog list/detail, dashboard). asgi.py turns
+# this on; WSGI deployments keep the sync views.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS', 'false').lower() == 'true'
+
 # Database Configuration
 # Check if MySQL environment variables are provided
 mysql_password = os.environ.get('MYSQL_PASSWORD') or os.environ.get('DB_PASSWORD')
@@ -94,8 +102,111 @@ else:
         }
     }
 
+# Persistent connections: each worker reuses its connection for
+# DB_CONN_MAX_AGE seconds and checks it is still alive before reusing it.
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+    database['CONN_HEALTH_CHECKS'] = os.environ.get('DB_CONN_HEALTH_CHECKS', 'true').lower() == 'true'
+
+# Read replicas (see core/dbrouting.py): DB_REPLICAS is a comma-separated list
+# of MySQL host[:port] values, or of database file paths when using SQLite.
+for number, replica in enumerate(filter(None, map(str.strip, os.environ.get('DB_REPLICAS', '').split(','))), 1):
+    database = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if mysql_password:
+        host, _, port = replica.partition(':')
+        database.update(HOST=host, PORT=port or mysql_port)
+    else:
+        database['NAME'] = replica
+    DATABASES[f'replica{number}'] = database
+DATABASE_ROUTERS = ['core.dbrouting.ReplicaRouter']
+# Views whose GET requests may read from a replica.
+REPLICA_READ_VIEWS = [
+    'blog:blog_list', 'blog:blog_detail', 'blog:blog_search', 'blog:my_posts', 'blog:author_stats',
+    'accounts:doctor_directory', 'accounts:doctor_directory_api',
+    'api:post_list', 'api:post_detail', 'api:category_list', 'api:doctor_list', 'api:doctor_detail',
+]
+# After a write, the writer's reads stay on the primary for this long.
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '10'))
+REPLICA_PIN_COOKIE = 'dbpin'
+
+# Caches
+# The page cache holds rendered anonymous blog pages (see core.pagecache).
+# Every worker process must see the same invalidation versions, so the
+# default is the file backend; 'locmem' is only correct for a single process.
+PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'file')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('PAGE_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'pages')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    } if PAGE_CACHE_BACKEND == 'file' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', '300'))
+PAGE_CACHE_LOCK_TIMEOUT = 10
+PAGE_CACHE_WAIT_TIMEOUT = 2
+
+# Post view counting (see blog/popularity.py). Hits are held in memory and
+# written every VIEW_COUNT_FLUSH_INTERVAL seconds or once this many are pending.
+# The rankings are then rebuilt by a task worker POPULAR_REBUILD_INTERVAL
+# seconds later.
+VIEW_COUNT_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', '5'))
+VIEW_COUNT_FLUSH_THRESHOLD = int(os.environ.get('VIEW_COUNT_FLUSH_THRESHOLD', '1000'))
+POPULARITY_HALF_LIFE_HOURS = float(os.environ.get('POPULARITY_HALF_LIFE_HOURS', '24'))
+POPULAR_REBUILD_INTERVAL = int(os.environ.get('POPULAR_REBUILD_INTERVAL', '60'))
+POPULAR_POSTS_PER_BOARD = 5
+
+# Blog feeds and sitemaps (see blog/syndication.py), cached as files until a
+# published post changes. SITE_URL (e.g. https://example.com) fixes the host in
+# their absolute URLs; by default the requesting host is used.
+SITE_URL = os.environ.get('SITE_URL', '').rstrip('/')
+SYNDICATION_ROOT = Path(os.environ.get('SYNDICATION_ROOT', BASE_DIR / 'cache' / 'syndication'))
+SYNDICATION_MAX_AGE = 300
+# Lifetime of the token naming the current documents: the longest a process
+# that missed an invalidation (a per-process page cache) serves old ones.
+SYNDICATION_TOKEN_TIMEOUT = int(os.environ.get('SYNDICATION_TOKEN_TIMEOUT', '900'))
+FEED_ITEMS = 20
+SITEMAP_SEGMENT_SIZE = 50000
+
+# Request profiling (Server-Timing header and /ops/slow-requests/)
+REQUEST_PROFILING_ENABLED = os.environ.get('REQUEST_PROFILING_ENABLED', 'true').lower() == 'true'
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', '1.0'))
+REQUEST_PROFILING_SLOW_MS = int(os.environ.get('REQUEST_PROFILING_SLOW_MS', '500'))
+REQUEST_PROFILING_BUFFER_SIZE = 100
+
+# Login/signup rate limiting (see core/throttling.py). Use the 'cache' backend
+# with a shared cache when running more than one worker process.
+AUTH_THROTTLE_ENABLED = os.environ.get('AUTH_THROTTLE_ENABLED', 'true').lower() == 'true'
+AUTH_THROTTLE_BACKEND = os.environ.get('AUTH_THROTTLE_BACKEND', 'local')
+AUTH_THROTTLE_CACHE_ALIAS = 'default'
+AUTH_THROTTLE_RATES = {
+    # scope: (attempts, window seconds)
+    'login': {'ip': (30, 300), 'email': (5, 300)},
+    'signup': {'ip': (10, 3600)},
+}
+AUTH_THROTTLE_LOCKOUT_BASE = 60
+AUTH_THROTTLE_LOCKOUT_MAX = 3600
+AUTH_THROTTLE_TRUSTED_PROXIES = int(os.environ.get('AUTH_THROTTLE_TRUSTED_PROXIES', '0'))
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.CustomUser'
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+
+# Logged-in user + role profile cache (see accounts/usercache.py). Point this
+# at a cache shared by all workers so saves evict entries everywhere.
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', '300'))
+
+# Admin changelists on tables larger than this show an estimated row count
+# from table statistics instead of running COUNT(*) (see core/scalable_admin.py).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', '10000'))
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -115,10 +226,48 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# collectstatic writes content-hashed names, a manifest and .gz/.br copies;
+# StaticFilesMiddleware serves them from STATIC_ROOT (see core/staticfiles.py).
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+STATIC_FILES_SERVE = os.environ.get('STATIC_FILES_SERVE', 'true').lower() == 'true'
+# Cache lifetime for unhashed names; hashed names are cached for a year.
+STATIC_FILES_MAX_AGE = int(os.environ.get('STATIC_FILES_MAX_AGE', '60'))
 
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Served by core.media.serve_media. MEDIA_ACCESS maps path prefixes to a
+# permission hook (a dotted path to hook(request, path), or None for public);
+# paths under no prefix are not served. With MEDIA_OFFLOAD set to
+# 'x-accel-redirect' (nginx, internal location MEDIA_ACCEL_PREFIX) or
+# 'x-sendfile', the proxy sends the file after the permission check.
+MEDIA_SERVE = os.environ.get('MEDIA_SERVE', 'true').lower() == 'true'
+MEDIA_ACCESS = {
+    'blog_images/': None,
+    'profiles/': None,
+    'derivatives/': None,
+}
+MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CHUNK_SIZE = 64 * 1024
+MEDIA_MAX_AGE = 3600
+
+# Output of `manage.py export_static_blog`
+STATIC_EXPORT_ROOT = Path(os.environ.get('STATIC_EXPORT_ROOT', BASE_DIR / 'static_export'))
+
+# Background tasks (see core/tasks.py), run by `manage.py runworker`. Failed
+# tasks are retried after TASK_RETRY_BACKOFF seconds, doubling each attempt up
+# to TASK_RETRY_BACKOFF_MAX, then moved to the dead-letter table. A claimed
+# task that outlives TASK_LEASE_SECONDS is assumed lost and run again.
+TASK_WORKERS = int(os.environ.get('TASK_WORKERS', '2'))
+TASK_POLL_INTERVAL = float(os.environ.get('TASK_POLL_INTERVAL', '1'))
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BACKOFF = 10
+TASK_RETRY_BACKOFF_MAX = 3600
+TASK_LEASE_SECONDS = int(os.environ.get('TASK_LEASE_SECONDS', '300'))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -1,15 +1,30 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from blog import views as blog_views
+from core.media import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('blog/', include('blog.urls')),
+    path('ops/', include('core.urls')),
+    path('api/', include('healthcare_project.api_urls')),
+    path('sitemap.xml', blog_views.sitemap_index_view, name='sitemap'),
+    path('sitemap-pages.xml', blog_views.sitemap_pages_view, name='sitemap_pages'),
+    path('sitemap-posts-<int:segment>.xml', blog_views.sitemap_posts_view, name='sitemap_posts'),
     path('', include('blog.urls')),
 ]
 
-if settings.DEBUG:
+if settings.MEDIA_SERVE:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]
+elif settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)